@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Month-sharded domain archives and the manifest that lists them.
+
+Each domain's entries live in Archive/<Domain>/YYYY-MM.md, by the month of the
+entry's own date; entries whose date doesn't start with YYYY-MM ("Ongoing")
+go to undated.md. Archive/<Domain>.md is a rolled-up index note linking the
+shards, so the vault still has one page per domain. Archive/manifest.json
+lists every shard with its entry count and a sha256 of its contents:
+
+    {"version": 1,
+     "domains": {"Environmental": {
+         "description": "Dates refer to ...",
+         "shards": {"2026-08": {"file": "Environmental/2026-08.md",
+                                "entries": 12, "sha256": "9f2c..."}}}}}
+
+The digest writes it through ArchiveStore; build_site reads it and re-parses
+only the shards whose hash moved since its last build. Stdlib only, since
+build_site is.
+
+    python scripts/archive_store.py migrate    # split flat <Domain>.md archives
+"""
+import argparse, hashlib, json, os, re, sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+ARCHIVE = REPO / "Starlink Watch" / "Archive"
+INDEX_FILE = REPO / ".state" / "archive_index.json"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+UNDATED = "undated"
+
+RX_ENTRY = re.compile(r"^- (?P<date>[^|]*?)\s*\|\s*\*\*(?P<headline>.+?)\*\*(?P<rest>.*)$")
+RX_URL = re.compile(r"https?://\S+")
+RX_MONTH = re.compile(r"\s*(\d{4}-\d{2})(?!\d)")
+RX_DESCRIPTION = re.compile(r"^\*([^*].*)\*$")
+TAIL_BYTES = 512
+
+
+def archive_key(line):
+    """Short hash of an entry's date, headline and first URL (of the whole line
+    when it isn't a "- date | **headline** ..." entry)."""
+    line = line.strip()
+    m = RX_ENTRY.match(line)
+    if m:
+        url = RX_URL.search(m.group("rest"))
+        parts = [m.group("date").strip(), m.group("headline").strip(), url.group() if url else ""]
+    else:
+        parts = [line]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def shard_name(date):
+    """"2026-08" for "2026-08-01" or "2023-10 → 2024-02"; UNDATED otherwise."""
+    m = RX_MONTH.match(date)
+    return m.group(1) if m else UNDATED
+
+
+def shard_order(name):
+    """Sort key putting the undated shard first, then months oldest first."""
+    return (name != UNDATED, name)
+
+
+def file_tail(path):
+    """(size, hash of the last TAIL_BYTES) of `path`, or (0, "") if it's missing."""
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - TAIL_BYTES))
+            return size, hashlib.sha1(f.read()).hexdigest()[:16]
+    except FileNotFoundError:
+        return 0, ""
+
+
+def load_manifest(archive_dir=ARCHIVE):
+    try:
+        manifest = json.loads((Path(archive_dir) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "domains": {}}
+    return manifest
+
+
+def _write_atomic(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def index_note(domain, description, shards):
+    """Markdown of the rolled-up Archive/<Domain>.md note, newest month first."""
+    out = [f"# {domain} — Archive", ""]
+    if description:
+        out += [f"*{description}*", ""]
+    for name in sorted(shards, key=shard_order, reverse=True):
+        n = shards[name]["entries"]
+        label = "Undated" if name == UNDATED else name
+        out.append(f"- [[{domain}/{name}|{label}]] — {n} entr{'y' if n == 1 else 'ies'}")
+    if not shards:
+        out.append("No entries yet.")
+    return "\n".join(out) + "\n"
+
+
+class ArchiveStore:
+    """Appends entries to month shards without re-reading what's already there.
+
+    append_archives used to read each whole archive and substring-search it for
+    every new line. Entry keys are kept per shard in .state/archive_index.json
+    instead, with each shard's size and a hash of its last bytes; a shard that
+    no longer ends that way (edited by hand, or new) has its keys rebuilt from
+    the file. Size and tail rather than mtime, since every checkout resets
+    mtimes. Only shards that were appended to or rebuilt are read again, to
+    refresh their manifest hash.
+    """
+
+    def __init__(self, archive_dir=ARCHIVE, index_path=INDEX_FILE):
+        self.archive_dir = Path(archive_dir)
+        self.index_path = Path(index_path)
+        self.index = None
+        self.manifest = None
+        self.domain_keys = {}
+        self.changed = set()
+        self.rebuilt = []
+
+    def _load(self):
+        if self.index is None:
+            try:
+                self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.index = {}
+            self.manifest = load_manifest(self.archive_dir)
+        return self.index
+
+    def shard_file(self, domain, shard):
+        return self.archive_dir / domain / f"{shard}.md"
+
+    def keys(self, domain):
+        """Set of entry keys across the domain's shards, rebuilding stale ones."""
+        if domain in self.domain_keys:
+            return self.domain_keys[domain]
+        index = self._load()
+        keys = set()
+        folder = self.archive_dir / domain
+        present = sorted(p.stem for p in folder.glob("*.md")) if folder.is_dir() else []
+        for shard in present:
+            name = f"{domain}/{shard}"
+            entry = index.get(name)
+            size, tail = file_tail(self.shard_file(domain, shard))
+            if entry is None or entry["size"] != size or entry["tail"] != tail:
+                text = self.shard_file(domain, shard).read_text(encoding="utf-8")
+                entry = index[name] = {
+                    "size": size, "tail": tail,
+                    "keys": sorted({archive_key(ln) for ln in text.splitlines()
+                                    if ln.strip().startswith("- ")}),
+                }
+                self.rebuilt.append(name)
+                self.changed.add((domain, shard))
+            keys.update(entry["keys"])
+        gone = {s for s in self.manifest["domains"].get(domain, {}).get("shards", {})
+                if s not in present}
+        for shard in gone:
+            index.pop(f"{domain}/{shard}", None)
+            self.changed.add((domain, shard))
+        self.domain_keys[domain] = keys
+        return keys
+
+    def append(self, domain, lines):
+        """Append the entries whose key isn't archived yet, each to its month's
+        shard; returns those lines. Lines that aren't entries are skipped."""
+        keys = self.keys(domain)
+        by_shard = {}
+        for line in lines:
+            m = RX_ENTRY.match(line.strip())
+            key = archive_key(line)
+            if m and key not in keys:
+                keys.add(key)
+                by_shard.setdefault(shard_name(m.group("date")), []).append((key, line.strip()))
+        for shard, new in by_shard.items():
+            target = self.shard_file(domain, shard)
+            size, _ = file_tail(target)
+            if size:
+                with open(target, "rb") as f:
+                    f.seek(size - 1)
+                    lead = "" if f.read(1) == b"\n" else "\n"
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                label = "Undated" if shard == UNDATED else shard
+                lead = f"# {domain} — {label}\n\n"
+            with open(target, "a", encoding="utf-8") as f:
+                f.write(lead + "\n".join(line for _, line in new) + "\n")
+            entry = self.index.setdefault(f"{domain}/{shard}", {"keys": []})
+            entry["keys"] = sorted(set(entry["keys"]) | {k for k, _ in new})
+            entry["size"], entry["tail"] = file_tail(target)
+            self.changed.add((domain, shard))
+        return [line for new in by_shard.values() for _, line in new]
+
+    def set_description(self, domain, description):
+        self._load()
+        self.manifest["domains"].setdefault(domain, {"description": "", "shards": {}})
+        self.manifest["domains"][domain]["description"] = description
+        self.changed.add((domain, None))
+
+    def save(self):
+        """Refresh the manifest and index notes of changed domains, then write both."""
+        self._load()
+        for domain in sorted({d for d, _ in self.changed}):
+            info = self.manifest["domains"].setdefault(domain, {"description": "", "shards": {}})
+            for shard in sorted({s for d, s in self.changed if d == domain and s}):
+                target = self.shard_file(domain, shard)
+                if not target.exists():
+                    info["shards"].pop(shard, None)
+                    continue
+                data = target.read_bytes()
+                info["shards"][shard] = {
+                    "file": f"{domain}/{shard}.md",
+                    "entries": sum(1 for ln in data.decode("utf-8").splitlines()
+                                   if RX_ENTRY.match(ln.strip())),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                }
+            info["shards"] = {s: info["shards"][s] for s in sorted(info["shards"], key=shard_order)}
+            _write_atomic(self.archive_dir / f"{domain}.md",
+                          index_note(domain, info["description"], info["shards"]))
+        if self.changed:
+            self.manifest["domains"] = dict(sorted(self.manifest["domains"].items()))
+            _write_atomic(self.archive_dir / MANIFEST_NAME,
+                          json.dumps(self.manifest, indent=1, ensure_ascii=False) + "\n")
+        self.changed = set()
+        _write_atomic(self.index_path, json.dumps(self.index, separators=(",", ":")))
+
+    def migrate(self, domains):
+        """Split any flat Archive/<Domain>.md left from before sharding into
+        shards; its *description* line moves to the manifest. Returns the
+        domains migrated. A domain already in the manifest is left alone."""
+        self._load()
+        migrated = []
+        for domain in domains:
+            flat = self.archive_dir / f"{domain}.md"
+            if domain in self.manifest["domains"] or not flat.exists():
+                continue
+            lines = flat.read_text(encoding="utf-8").splitlines()
+            description = next((m.group(1).strip() for m in map(RX_DESCRIPTION.match, lines) if m), "")
+            self.append(domain, [ln for ln in lines if ln.strip().startswith("- ")])
+            self.set_description(domain, description)
+            migrated.append(domain)
+        return migrated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="Split flat <Domain>.md archives into month shards")
+    parser.parse_args(argv)
+
+    sys.path.append(str(Path(__file__).resolve().parent))
+    from build_site import DOMAINS
+    store = ArchiveStore()
+    migrated = store.migrate(DOMAINS)
+    store.save()
+    for domain in migrated:
+        shards = store.manifest["domains"][domain]["shards"]
+        print(f"{domain}: {sum(s['entries'] for s in shards.values())} entries "
+              f"in {len(shards)} shard(s)")
+    if not migrated:
+        print("Nothing to migrate.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
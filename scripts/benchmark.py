@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Pipeline benchmark: per-stage wall time and peak memory, fully offline.
+
+Copies the scripts, config, state and vault into a scratch directory and runs
+each stage there in its own process, with http_get replaying a cassette — one
+recorded from the live sources, or synthetic fixtures generated at a chosen
+scale. Results are written as JSON meant to be diffed between commits.
+
+    # record the live sources once
+    STARLINK_HTTP_RECORD=/tmp/live python scripts/compute_starlink_metrics.py
+    STARLINK_HTTP_RECORD=/tmp/live python scripts/compute_space_totals.py
+    STARLINK_HTTP_RECORD=/tmp/live python scripts/starlink_daily_digest.py --force --dry-run
+
+    python scripts/benchmark.py --cassette /tmp/live --out bench.json
+    python scripts/benchmark.py --synthetic --satcat-scale 10 --feeds 300 --out bench.json
+    python scripts/benchmark.py --cassette /tmp/live --stages digest --parse
+
+--parse adds a per-feed comparison of the digest's feed parser against plain
+feedparser over the same payloads; --filter 100000 times the Starlink filter
+over that many synthetic headlines.
+
+Peak memory is the stage process's max RSS (Linux/macOS), so it includes the
+interpreter and imports, just as the scheduled job pays for them.
+"""
+import argparse, datetime, json, os, platform, random, shutil, subprocess, sys, tempfile, time
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import yaml
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from starlink_utils import Cassette, REPLAY_ENV
+
+REPO = Path(__file__).resolve().parents[1]
+
+STAGES = {
+    "metrics": ["scripts/compute_starlink_metrics.py", "--force-recompute"],
+    "totals": ["scripts/compute_space_totals.py", "--force-recompute"],
+    "digest": ["scripts/starlink_daily_digest.py", "--force"],
+    "site": ["scripts/build_site.py"],
+    # All of the above in one process via the DAG runner. Opt in with
+    # --stages pipeline on its own: the digest only emits once per hour.
+    "pipeline": ["scripts/starlink_watch.py", "run", "--force", "--force-recompute"],
+}
+DEFAULT_STAGES = ("metrics", "totals", "digest", "site")
+
+# Roughly today's live sizes; --satcat-scale multiplies all three.
+SATCAT_ROWS = 70_000
+GP_ROWS = 9_000
+DECAYED_ROWS = 1_500
+
+SATCAT_HEADER = ("OBJECT_NAME,OBJECT_ID,NORAD_CAT_ID,OBJECT_TYPE,OPS_STATUS_CODE,OWNER,"
+                 "LAUNCH_DATE,LAUNCH_SITE,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,RCS,"
+                 "DATA_STATUS_CODE,ORBIT_CENTER,ORBIT_TYPE\n")
+
+# Headline vocabulary for synthetic feeds: enough Starlink criticism to pass the
+# filter at a realistic rate, plus the general space news it has to reject.
+SUBJECTS = ["Starlink", "SpaceX Starlink", "Starshield", "Starship", "Falcon 9", "Kuiper",
+            "OneWeb", "NASA", "ESA", "The ISS crew"]
+EVENTS = ["outage hits users", "satellites re-entry raises ozone concerns",
+          "debris study published", "astronomers warn of satellite streaks",
+          "faces FCC filing over spectrum", "terminal vulnerability disclosed",
+          "jamming reported near the front line", "expands service to new market",
+          "launch scrubbed due to weather", "lawsuit filed by residents",
+          "alumina emissions measured in stratosphere", "radio interference at observatory",
+          "secures new funding round", "mission completes docking"]
+FILLER = ("the company said on Tuesday that operations continue while regulators and "
+          "scientists review the data from recent weeks").split()
+
+
+def synthetic_satcat(rows, rng):
+    yield SATCAT_HEADER
+    batch = []
+    for i in range(rows):
+        starlink = i % 5 == 0
+        name = f"STARLINK-{i}" if starlink else f"OBJECT {i} {'DEB' if i % 3 else 'R/B'}"
+        otype = "PAY" if starlink else ("DEB" if i % 3 else "R/B")
+        decay = f"{rng.randint(1990, 2025)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}" \
+            if rng.random() < 0.45 else ""
+        rcs = f"{rng.uniform(0.001, 20):.4f}" if rng.random() < 0.8 else ""
+        batch.append(f"{name},{1957 + i % 68}-{i:03d}A,{i},{otype},,US,2019-01-01,AFETR,"
+                     f"{decay},95.1,53.0,550,540,{rcs},,EA,LEO\n")
+        if len(batch) == 5_000:
+            yield "".join(batch)
+            batch = []
+    yield "".join(batch)
+
+
+def synthetic_gp(rows):
+    yield "OBJECT_NAME,OBJECT_ID,EPOCH,MEAN_MOTION,ECCENTRICITY,INCLINATION,NORAD_CAT_ID\n"
+    for start in range(0, rows, 5_000):
+        yield "".join(f"STARLINK-{i},2019-029A,2026-01-01T00:00:00,15.06,0.0001,53.0,{44000 + i}\n"
+                      for i in range(start, min(rows, start + 5_000)))
+
+
+def synthetic_decayed(rows):
+    ids = " ; ".join(f"{40000 + i}, STARLINK-{i}" for i in range(rows))
+    return f"<html><body><h1>Recently decayed</h1><p>{ids}</p></body></html>"
+
+
+def synthetic_feed(index, entries, rng, now):
+    items = []
+    for j in range(entries):
+        title = f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)}"
+        summary = " ".join(rng.choice(FILLER) for _ in range(rng.randint(20, 60)))
+        published = now - datetime.timedelta(hours=rng.randint(1, 24 * 40))
+        items.append(
+            f"<item><title>{escape(title)}</title>"
+            f"<link>https://bench.invalid/{index}/{j}</link>"
+            f"<guid>https://bench.invalid/{index}/{j}</guid>"
+            f"<description>{escape('<p>' + summary + '</p>')}</description>"
+            f"<pubDate>{format_datetime(published)}</pubDate></item>")
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Synthetic feed {index}</title>{''.join(items)}</channel></rss>")
+
+
+def build_synthetic(cassette_dir, config, satcat_scale, feeds, entries, seed=1):
+    """Fill a cassette with scaled fixtures; returns the synthetic feed list."""
+    rng = random.Random(seed)
+    cassette = Cassette(cassette_dir)
+    endpoints = config["endpoints"]
+    cassette.save(endpoints["satcat_csv"],
+                  synthetic_satcat(int(SATCAT_ROWS * satcat_scale), rng),
+                  headers={"Content-Type": "text/csv"})
+    cassette.save(endpoints["starlink_gp_csv"], synthetic_gp(int(GP_ROWS * satcat_scale)),
+                  headers={"Content-Type": "text/csv"})
+    cassette.save(endpoints["decayed_recent_html"],
+                  synthetic_decayed(int(DECAYED_ROWS * satcat_scale)),
+                  headers={"Content-Type": "text/html; charset=utf-8"})
+    now = datetime.datetime.now(datetime.timezone.utc)
+    feed_list = []
+    for i in range(feeds):
+        url = f"https://bench.invalid/feed/{i}.xml"
+        cassette.save(url, synthetic_feed(i, entries, rng, now),
+                      headers={"Content-Type": "application/rss+xml; charset=utf-8"})
+        feed_list.append({"name": f"Synthetic feed {i}", "url": url})
+    return feed_list
+
+
+def prepare_workdir(workdir):
+    """Copy what the stages read into a scratch tree so nothing real is touched."""
+    for name in ("scripts", "data", "Starlink Watch", ".state"):
+        src = REPO / name
+        if src.exists():
+            shutil.copytree(src, workdir / name, ignore=shutil.ignore_patterns(
+                "cache", "run_*.flag", "__pycache__"))
+
+
+def run_stage(workdir, argv, env, log):
+    """Run one stage; returns (seconds, peak RSS in MB or None, exit code)."""
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, *argv], cwd=workdir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        peak = round(usage.ru_maxrss * scale / 2**20, 1)
+    else:
+        proc.wait()
+        peak = None
+    return round(time.perf_counter() - started, 3), peak, proc.returncode
+
+
+def bench_parsers(cassette_dir, feeds, repeat=5):
+    """Per-feed parse time, fast path vs feedparser, over the cassette's payloads."""
+    import feedparser
+    import starlink_daily_digest as digest
+
+    def best_ms(parse, data):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parse(data)
+            best = min(best, time.perf_counter() - started)
+        return round(best * 1000, 3)
+
+    cassette = Cassette(cassette_dir)
+    rows = []
+    for feed in feeds:
+        if not cassette.has(feed["url"]):
+            continue
+        data = cassette.replay(feed["url"]).content
+        parser = getattr(digest.parse_feed(data), "parser", "feedparser")
+        fast = best_ms(digest.parse_feed, data)
+        full = best_ms(feedparser.parse, data)
+        rows.append({"url": feed["url"], "bytes": len(data), "parser": parser,
+                     "parse_ms": fast, "feedparser_ms": full,
+                     "speedup": round(full / fast, 1) if fast else None})
+    total_fast = sum(r["parse_ms"] for r in rows)
+    total_full = sum(r["feedparser_ms"] for r in rows)
+    return {"feeds": rows, "parse_ms": round(total_fast, 3),
+            "feedparser_ms": round(total_full, 3),
+            "speedup": round(total_full / total_fast, 1) if total_fast else None}
+
+
+def headline_corpus(n, seed=2):
+    """`n` synthetic (title, summary, link) triples in the feeds' proportions."""
+    rng = random.Random(seed)
+    return [(f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)}",
+             " ".join(rng.choice(FILLER) for _ in range(rng.randint(10, 40))),
+             f"https://bench.invalid/story/{i}") for i in range(n)]
+
+
+def bench_filter(n):
+    """Headlines/second through the filter and the domain scorer, old vs new."""
+    import re
+    import starlink_utils
+
+    def regex(rule):
+        # (first, then) pairs as the `first.*then` patterns they replaced.
+        return ".*".join(rule) if isinstance(rule, tuple) else rule
+
+    def per_pattern(title, summary, link):
+        # The filter as it was before RelevanceMatcher: one re.search per pattern.
+        t = " ".join([title, summary, link]).lower()
+        if not any(re.search(regex(rx), t, re.I) for rx in starlink_utils.POS):
+            return False
+        head = title.lower()
+        if not re.search(r"\bstar\s?link\b|\bstarshield\b", head, re.I) and \
+                any(re.search(regex(rx), head, re.I) for rx in starlink_utils.NEG):
+            return False
+        return any(re.search(regex(rx), t, re.I) for rx in starlink_utils.CRITICISM)
+
+    def findall_scores(title, summary, link):
+        # Domain scoring as it was before DomainScorer: one findall per pattern.
+        t = " ".join([title, summary, link]).lower()
+        return {domain: sum(len(re.findall(regex(rx), t, re.I)) for rx in patterns)
+                for domain, patterns in starlink_utils.DOMAIN_KEYWORDS.items()}
+
+    corpus = headline_corpus(n)
+    timings, decisions = {}, {}
+    for name, judge in (("per_pattern", per_pattern),
+                        ("matcher", starlink_utils.looks_starlink_critical),
+                        ("findall_scores", findall_scores),
+                        ("scorer", starlink_utils.domain_scores)):
+        started = time.perf_counter()
+        decisions[name] = [judge(*item) for item in corpus]
+        timings[name] = time.perf_counter() - started
+    # The same batch with per-rule counters and sampled timing switched on.
+    for name, stats in (("batch", None), ("batch_counted", starlink_utils.RuleStats())):
+        started = time.perf_counter()
+        decisions[name] = starlink_utils.classify_batch(corpus, threshold=n + 1, stats=stats)
+        timings[name] = time.perf_counter() - started
+    return {"headlines": n,
+            "per_pattern_per_sec": round(n / timings["per_pattern"]),
+            "matcher_per_sec": round(n / timings["matcher"]),
+            "speedup": round(timings["per_pattern"] / timings["matcher"], 2),
+            "accepted": sum(decisions["matcher"]),
+            "identical": decisions["per_pattern"] == decisions["matcher"],
+            "classify": {
+                "findall_per_sec": round(n / timings["findall_scores"]),
+                "scorer_per_sec": round(n / timings["scorer"]),
+                "speedup": round(timings["findall_scores"] / timings["scorer"], 2),
+                "identical": decisions["findall_scores"] == decisions["scorer"],
+            },
+            "rule_stats": {
+                "overhead": round(timings["batch_counted"] / timings["batch"] - 1, 3),
+                "identical": decisions["batch"] == decisions["batch_counted"],
+            }}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each pipeline stage offline.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--cassette", type=Path, help="Replay responses recorded here")
+    source.add_argument("--synthetic", action="store_true", help="Generate scaled fixtures")
+    parser.add_argument("--satcat-scale", type=float, default=1.0,
+                        help="Multiplier on SATCAT/GP/decayed sizes (synthetic only)")
+    parser.add_argument("--feeds", type=int, default=22, help="Synthetic feed count")
+    parser.add_argument("--entries", type=int, default=60, help="Entries per synthetic feed")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--out", type=Path, default=Path("bench.json"))
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--filter", type=int, default=0, metavar="N",
+                        help="Also time the Starlink filter over N synthetic headlines")
+    parser.add_argument("--parse", action="store_true",
+                        help="Also time the feed parser against feedparser per feed")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="starlink-bench-"))
+    try:
+        prepare_workdir(workdir)
+        if args.synthetic:
+            config = yaml.safe_load((workdir / "data" / "starlink_config.yml").read_text(
+                encoding="utf-8"))
+            cassette_dir = workdir / "cassette"
+            feeds = build_synthetic(cassette_dir, config, args.satcat_scale, args.feeds,
+                                    args.entries)
+            (workdir / "scripts" / "feeds.yml").write_text(
+                yaml.safe_dump({"feeds": feeds}, sort_keys=False), encoding="utf-8")
+        else:
+            cassette_dir = args.cassette.resolve()
+
+        env = dict(os.environ, **{REPLAY_ENV: str(cassette_dir)})
+        env.pop("STARLINK_HTTP_RECORD", None)
+        results = {}
+        with open(workdir / "stages.log", "w", encoding="utf-8") as log:
+            for name in stages:
+                seconds, peak, code = run_stage(workdir, STAGES[name], env, log)
+                results[name] = {"seconds": seconds, "peak_rss_mb": peak, "exit_code": code}
+                print(f"{name:8s} {seconds:8.2f}s  peak {peak if peak is not None else '?'} MB"
+                      f"{'' if code == 0 else f'  (exit {code})'}")
+
+        parse = None
+        if args.parse:
+            feeds = yaml.safe_load((workdir / "scripts" / "feeds.yml").read_text(
+                encoding="utf-8")).get("feeds", [])
+            parse = bench_parsers(cassette_dir, feeds)
+            print(f"parse    {parse['parse_ms']:8.1f}ms vs feedparser "
+                  f"{parse['feedparser_ms']:.1f}ms over {len(parse['feeds'])} feeds")
+
+        filter_bench = None
+        if args.filter:
+            filter_bench = bench_filter(args.filter)
+            print(f"filter   {filter_bench['matcher_per_sec']:,}/s vs "
+                  f"{filter_bench['per_pattern_per_sec']:,}/s per-pattern "
+                  f"(x{filter_bench['speedup']}, identical={filter_bench['identical']})")
+            scoring = filter_bench["classify"]
+            print(f"classify {scoring['scorer_per_sec']:,}/s vs "
+                  f"{scoring['findall_per_sec']:,}/s findall "
+                  f"(x{scoring['speedup']}, identical={scoring['identical']})")
+
+        report = {
+            "generated_at": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "source": "synthetic" if args.synthetic else "cassette",
+            "params": ({"satcat_scale": args.satcat_scale, "feeds": args.feeds,
+                        "entries_per_feed": args.entries} if args.synthetic else
+                       {"cassette": str(args.cassette)}),
+            "stages": results,
+            "parse": parse,
+            "filter": filter_bench,
+            "total_seconds": round(sum(r["seconds"] for r in results.values()), 3),
+        }
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}")
+        if any(r["exit_code"] for r in results.values()):
+            print(f"A stage failed; see {workdir / 'stages.log'}", file=sys.stderr)
+            args.keep = True
+            return 1
+        return 0
+    finally:
+        if args.keep:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
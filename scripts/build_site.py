@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """Starlink Watch — static site builder.
 
-Reads data/ (metrics, series, incidents, sources) and the vault archives, and
-writes site/index.html. Charts are interactive inline SVG rendered client-side
+Reads data/ (metrics, series, incidents, sources, and the digest event log in
+events.jsonl, falling back to the vault archives without it), and writes
+site/index.html. Charts are interactive inline SVG rendered client-side
 from embedded series data — no matplotlib/pandas, stdlib only.
 """
 import datetime
@@ -12,12 +13,17 @@ import math
 import re
 from pathlib import Path
 
+import archive_store
+import digest_index
+import event_log
+
 REPO = Path(__file__).resolve().parents[1]
 VAULT = REPO / "Starlink Watch"
 EVENTS = VAULT / "Events"
 ARCH = VAULT / "Archive"
 DATA = REPO / "data"
 SITE = REPO / "site"
+EVENT_LOG = DATA / "events.jsonl"
 
 # Report order; mirrors DOMAINS in starlink_daily_digest.py.
 DOMAINS = ("Environmental", "Cybersecurity", "Astronomical", "Regulatory")
@@ -110,6 +116,9 @@ def normalize_sort_key(raw_date):
     return m.group(1) if m else ""
 
 
+RX_HTML_COMMENT = re.compile(r"\s*<!--.*?-->")
+
+
 def parse_archive_file(domain, path):
     lines = path.read_text(encoding="utf-8").splitlines()
     description = ""
@@ -126,6 +135,8 @@ def parse_archive_file(domain, path):
         if item == "No new items." or "|" not in item:
             continue
 
+        # The digest appends a "<!-- scores: ... -->" note for vault readers.
+        item = RX_HTML_COMMENT.sub("", item).strip()
         raw_date, remainder = (s.strip() for s in item.split("|", 1))
         m = re.search(r"\*\*(.+?)\*\*", remainder)
         if not m:
@@ -151,40 +162,123 @@ def parse_archive_file(domain, path):
 
 
 def load_archives():
+    """Each domain's entries from its month shards (see archive_store.py).
+
+    Entries come in shard order, the undated shard first and then months
+    oldest first, and in file order within a shard. That is not the order of
+    the flat pre-sharding files, where "Ongoing" entries sat wherever they
+    were written. A domain not in the manifest yet is read from its flat
+    <Domain>.md."""
+    manifest = archive_store.load_manifest(ARCH)
     archives = []
     for name in DOMAINS:
-        path = ARCH / f"{name}.md"
-        if path.exists():
-            archives.append(parse_archive_file(name, path))
+        info = manifest["domains"].get(name)
+        if info is None:
+            path = ARCH / f"{name}.md"
+            if path.exists():
+                archives.append(parse_archive_file(name, path))
+            continue
+        entries = []
+        for shard in sorted(info["shards"], key=archive_store.shard_order):
+            path = ARCH / info["shards"][shard]["file"]
+            if path.exists():
+                entries.extend(parse_archive_file(name, path)["entries"])
+        archives.append({"domain": name, "description": info["description"], "entries": entries})
     return archives
 
 
 def load_latest_digest():
-    """Parsed fields from the most recent event file, or None."""
-    files = sorted(EVENTS.glob("*.md"), reverse=True) if EVENTS.exists() else []
-    if not files:
-        return None
-    latest = files[0]
-    text = latest.read_text(encoding="utf-8")
-
-    def section(header):
-        m = re.search(rf"### {header}\s*\n(.*?)(?=\n###|\n## |\Z)", text, re.S)
-        return m.group(1).strip() if m else ""
-
-    def update_flag(domain):
-        m = re.search(rf"\| {domain}\s*\| (Yes|No)", text, re.I)
-        return m.group(1) if m else "No"
-
-    date = re.search(r"## Starlink Daily Digest — (\S+)", text)
+    """Sections of the most recent digest from Events/index.json, or None.
+    Without an index (a vault from before it existed) it is rebuilt from the
+    markdown once and written back."""
+    index = digest_index.load_index(EVENTS)
+    if index is None:
+        if not EVENTS.exists():
+            return None
+        index = digest_index.rebuild_index(EVENTS, DOMAINS)
+        if index["latest"]:
+            digest_index.save_index(EVENTS, index)
+    latest = index["latest"]
+    return digest_fields(latest["date"], latest["sections"]) if latest else None
+
+
+def digest_fields(date, sections):
+    """render_digest_section's input from {domain: {"summary", "updated"}}."""
     return {
-        "date": date.group(1) if date else latest.stem[:10],
+        "date": date,
         "sections": [
-            (name, section(name), update_flag(name))
+            (name, sections[name]["summary"] if name in sections else "",
+             "Yes" if sections.get(name, {}).get("updated") else "No")
             for name in DOMAINS
         ],
     }
 
 
+def log_entry(record):
+    """An archive entry, as parse_archive_file returns it, from an item record."""
+    also = f" (also: {', '.join(record['also'])})" if record.get("also") else ""
+    return {
+        "domain": record["domain"],
+        "date_display": record["date"],
+        "date_sort_key": normalize_sort_key(record["date"]),
+        "title": record["headline"],
+        "rest": f"{record['source']}{also}".strip(),
+        "primary_url": record["url"],
+    }
+
+
+def archived_records(domain):
+    """{key: item record} of every entry in a domain's shards, in shard order.
+    The folder is listed rather than the manifest, which a shard created by
+    hand isn't in until the next digest run."""
+    records = {}
+    folder = ARCH / domain
+    shards = sorted((p.stem for p in folder.glob("*.md")), key=archive_store.shard_order)
+    for shard in shards:
+        path = folder / f"{shard}.md"
+        for line in path.read_text(encoding="utf-8").splitlines():
+            record = event_log.entry_record(domain, line)
+            if record:
+                records.setdefault(record["key"], record)
+    return records
+
+
+def load_event_log(path=None):
+    """(archives, latest digest) streamed from data/events.jsonl, or None when
+    there is no log yet. The same story logged twice shows once; descriptions
+    still come from the archive manifest.
+
+    The archives stay authoritative for what is listed: a domain in the
+    manifest shows only entries still in its shards, and entries added to a
+    shard by hand (so never logged) are listed after the logged ones. Running
+    `event_log.py import` puts them in the log proper."""
+    path = path or EVENT_LOG
+    if not path.exists():
+        return None
+    entries = {name: {} for name in DOMAINS}
+    latest = None
+    for record in event_log.read_events(path):
+        kind = record.get("type")
+        if kind == "item" and record.get("domain") in entries:
+            entries[record["domain"]].setdefault(record["key"], log_entry(record))
+        elif kind == "emission" and "sections" in record:
+            if latest is None or record["emitted"] >= latest["emitted"]:
+                latest = record
+    manifest = archive_store.load_manifest(ARCH)
+    for name in DOMAINS:
+        if name not in manifest["domains"]:
+            continue
+        archived = archived_records(name)
+        logged = entries[name]
+        entries[name] = {key: entry for key, entry in logged.items() if key in archived}
+        entries[name].update((key, log_entry(record)) for key, record in archived.items()
+                             if key not in logged)
+    archives = [{"domain": name,
+                 "description": manifest["domains"].get(name, {}).get("description", ""),
+                 "entries": list(entries[name].values())} for name in DOMAINS]
+    return archives, digest_fields(latest["digest_date"], latest["sections"]) if latest else None
+
+
 # ---------- rendering ----------
 def esc(s):
     return html.escape(s)
@@ -600,29 +694,75 @@ def render_feed_health(health):
     rows = []
     for f in feeds:
         status = f.get("status", "")
-        cls = {"ok": "feed-ok", "empty": "feed-empty",
-               "skipped": "feed-empty"}.get(status, "feed-error")
-        label = {"ok": "ok", "empty": "no entries",
-                 "skipped": "skipped"}.get(status, "unreachable")
+        cls = {"ok": "feed-ok", "empty": "feed-empty", "skipped": "feed-empty",
+               "circuit_open": "feed-empty"}.get(status, "feed-error")
+        label = {"ok": "ok", "empty": "no entries", "skipped": "skipped",
+                 "circuit_open": "circuit open"}.get(status, "unreachable")
         detail = f.get("detail", "")
         rows.append(
             f'<tr><td>{esc(f.get("name", ""))}</td>'
             f'<td><span class="feed-status {cls}" title="{esc(detail)}">{label}</span></td>'
             f'<td>{f.get("entries", 0):,}</td><td>{f.get("recent", 0):,}</td>'
+            f'<td>{f.get("new", f.get("recent", 0)):,}</td>'
             f'<td>{f.get("matched", 0):,}</td></tr>')
 
     return f"""
     <h3 style="margin-top:18px">Feed Health</h3>
     <p class="muted">
       {health.get("feeds_ok", 0)} of {health.get("feeds_configured", 0)} feeds responded on the
-      last run · {health.get("entries_recent", 0):,} entries from the last 30 days ·
+      last run · {health.get("entries_recent", 0):,} entries from the last 30 days
+      ({health.get("entries_new", health.get("entries_recent", 0)):,} new since the run before) ·
       {health.get("items_matched", 0):,} passed the Starlink filter ·
       {health.get("items_kept", 0):,} kept after de-duplication.
       A low match count with healthy feeds means the filter is strict, not that the feeds are down.
     </p>
     <details class="chart-table">
       <summary>Per-feed detail</summary>
-      <table><thead><tr><th>Feed</th><th>Status</th><th>Entries</th><th>Last 30d</th><th>Matched</th></tr></thead>
+      <table><thead><tr><th>Feed</th><th>Status</th><th>Entries</th><th>Last 30d</th><th>New</th><th>Matched</th></tr></thead>
+      <tbody>{"".join(rows)}</tbody></table>
+    </details>{render_rule_stats(health.get("rules"))}"""
+
+
+RULE_TABLE_ROWS = 12
+
+
+def render_rule_stats(rules, top=RULE_TABLE_ROWS):
+    """Which filter and domain patterns fired on the last run, and what they cost.
+
+    A rule is only called out as idle from the running totals: the last run
+    classified just the texts the cache hadn't seen, so its own counts miss
+    every story that was already known."""
+    patterns = (rules or {}).get("patterns") or []
+    if not rules or not rules.get("evaluated"):
+        return ""
+    totals = rules.get("totals")
+    rows = []
+    for p in patterns[:top]:
+        cost = p.get("us_per_text")
+        total = f'<td>{p.get("total_hits", 0):,}</td>' if totals else ""
+        rows.append(
+            f'<tr><td>{esc(p.get("rule", ""))}</td>'
+            f'<td><code>{esc(p.get("pattern", "")[:80])}</code></td>'
+            f'<td>{p.get("hits", 0):,}</td>{total}'
+            f'<td>{"—" if cost is None else f"{cost:.1f} µs"}</td></tr>')
+    rejected = rules.get("rejected", {})
+    dead_note = total_head = ""
+    if totals:
+        total_head = f'<th>Since {esc(totals["since"])}</th>'
+        dead = [p["rule"] for p in patterns if not p.get("total_hits")]
+        if dead:
+            dead_note = (f' No hits in the {totals["evaluated"]:,} entries classified since '
+                         f'{esc(totals["since"])}: {esc(", ".join(dead))}.')
+    return f"""
+    <details class="chart-table">
+      <summary>Filter rules</summary>
+      <p class="muted">
+        {rules["evaluated"]:,} entries classified · rejected for no Starlink mention
+        {rejected.get("no_starlink", 0):,}, an off-topic headline
+        {rejected.get("off_topic_headline", 0):,}, no criticism signal
+        {rejected.get("no_criticism", 0):,}.{dead_note}
+      </p>
+      <table><thead><tr><th>Rule</th><th>Pattern</th><th>Hits</th>{total_head}<th>Cost per entry</th></tr></thead>
       <tbody>{"".join(rows)}</tbody></table>
     </details>"""
 
@@ -1070,8 +1210,11 @@ def build():
     feed_health = load_json(DATA / "feed_health.json", {})
     incidents = load_json(DATA / "incidents.json", [])
     sources = load_json(DATA / "sources.json", [])
-    archives = load_archives()
-    digest = load_latest_digest()
+    # The event log when there is one; the archive shards and digest index
+    # for a vault that hasn't been imported into it.
+    logged = load_event_log()
+    archives = logged[0] if logged else load_archives()
+    digest = (logged and logged[1]) or load_latest_digest()
 
     series_by_key = {spec["key"]: load_series(spec["key"]) for spec in CHART_SPECS}
     deltas = {key: delta_30d(series) for key, series in series_by_key.items()}
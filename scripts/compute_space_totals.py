@@ -15,25 +15,30 @@ data/starlink_config.yml). Starlink objects reuse the generation mass mix the
 rest of the site already uses, so the numbers stay consistent. Everything is an
 estimate and is labelled as one on the site.
 """
-import csv, datetime, io, json, sys
+import argparse, codecs, csv, datetime, json, sys
 from pathlib import Path
 
-import yaml
-
 sys.path.append(str(Path(__file__).resolve().parent))
-from starlink_utils import http_get, FetchError
+from starlink_utils import (http_get, load_config, FetchError, HTTP_CACHE, CIRCUIT_BREAKER,
+                            CHUNK_BYTES, INPUTS, content_hash, file_hash, force_recompute,
+                            print_http_report)
 
 REPO = Path(__file__).resolve().parents[1]
 DATA = REPO / "data"
 
-CFG = yaml.safe_load((DATA / "starlink_config.yml").read_text(encoding="utf-8"))
+CONFIG_FILE = DATA / "starlink_config.yml"
+CFG = load_config(CONFIG_FILE)
 TOTALS_CFG = CFG.get("space_totals", {})
 SATCAT_CSV = CFG["endpoints"]["satcat_csv"]
+SATCAT_MAX_AGE = CFG.get("http_max_age_seconds", {}).get("satcat_csv", 0)
 
 ALUMINA_YIELD = float(CFG.get("alumina_kg_per_kg_aluminum", 1.89))
 STARLINK_AL_FRACTION = float(CFG.get("aluminum_fraction_of_satellite", 0.7))
 
 REQUIRED_COLUMNS = ("OBJECT_NAME", "OBJECT_TYPE", "DECAY_DATE")
+
+# sha256 of each payload this run fetched, for the input manifest.
+PAYLOAD_HASHES = {}
 OBJECT_TYPES = ("PAY", "R/B", "DEB", "UNK")
 
 
@@ -91,26 +96,63 @@ def parse_year(raw):
     return year if 1957 <= year <= datetime.date.today().year else None
 
 
+def iter_lines(resp):
+    """Decoded CSV lines from the response body, read a chunk at a time.
+
+    Splits on "\n" only and keeps the terminator, exactly as iterating over
+    io.StringIO(resp.text) did, so the csv module sees the same input.
+    """
+    import requests
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    pending = ""
+    try:
+        for chunk in resp.iter_content(CHUNK_BYTES):
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+    except requests.exceptions.RequestException as err:
+        raise FetchError(f"SATCAT download interrupted: {err}") from err
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
 def fetch_catalog():
-    resp = http_get(SATCAT_CSV, timeout=(10, 180))
-    reader = csv.DictReader(io.StringIO(resp.text))
+    """Validated SATCAT rows, streamed.
+
+    The catalogue used to be held as one string and then as a list of 70k+
+    dicts at the same time, although summarize only needs a single pass. Rows
+    now come straight off the response (or the cached copy on disk), so memory
+    stays flat however large the catalogue grows. The header is checked before
+    this returns; the rows are read as they are consumed.
+    """
+    resp = http_get(SATCAT_CSV, timeout=(10, 180), cache=HTTP_CACHE, max_age=SATCAT_MAX_AGE,
+                    stream=True, breaker=CIRCUIT_BREAKER)
+    PAYLOAD_HASHES["satcat_csv"] = content_hash(resp)
+    reader = csv.DictReader(iter_lines(resp))
     missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
     if missing:
         raise CatalogError(
             f"SATCAT is missing expected column(s) {missing}; got {reader.fieldnames}"
         )
-    return list(reader)
+    return reader
 
 
 def summarize(rows):
-    """Aggregate the catalogue into on-orbit totals and per-year re-entry totals."""
+    """Aggregate the catalogue into on-orbit totals and per-year re-entry totals.
+
+    Single pass over any iterable of rows; returns (on_orbit, by_year, count).
+    """
     starlink_active_mass = avg_starlink_mass("mix_active")
     starlink_decayed_mass = avg_starlink_mass("mix_decayed")
 
     on_orbit = {"starlink_kg": 0.0, "other_kg": 0.0, "starlink_n": 0, "other_n": 0}
     years = {}   # year -> per-bucket kg of re-entered mass and alumina
+    count = 0
 
     for row in rows:
+        count += 1
         name = (row.get("OBJECT_NAME") or "").upper()
         is_starlink = "STARLINK" in name
         otype = object_type(row.get("OBJECT_TYPE"))
@@ -141,7 +183,7 @@ def summarize(rows):
         year[f"{bucket}_alumina_kg"] += alumina
         year[f"{bucket}_n"] += 1
 
-    return on_orbit, [years[y] for y in sorted(years)]
+    return on_orbit, [years[y] for y in sorted(years)], count
 
 
 def share(part, whole):
@@ -149,7 +191,7 @@ def share(part, whole):
 
 
 def build_totals(rows):
-    on_orbit, by_year = summarize(rows)
+    on_orbit, by_year, count = summarize(rows)
 
     for y in by_year:
         for key in ("starlink_kg", "other_kg", "starlink_alumina_kg", "other_alumina_kg"):
@@ -166,7 +208,7 @@ def build_totals(rows):
 
     return {
         "generated_at": ts(),
-        "catalog_objects": len(rows),
+        "catalog_objects": count,
         "on_orbit": {
             "total_kg": round(total_on_orbit, 1),
             "starlink_kg": round(on_orbit["starlink_kg"], 1),
@@ -212,10 +254,24 @@ def build_totals(rows):
     }
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force-recompute", action="store_true",
+                        help="Rebuild even when SATCAT and the config are unchanged")
+    args = parser.parse_args([] if argv is None else argv)
+    PAYLOAD_HASHES.clear()
+
     out_path = DATA / "space_totals.json"
     try:
         rows = fetch_catalog()
+        inputs = {"satcat_csv": PAYLOAD_HASHES["satcat_csv"], "config": file_hash(CONFIG_FILE)}
+        if (out_path.exists() and not force_recompute(args.force_recompute)
+                and INPUTS.unchanged("space_totals", inputs)):
+            print("SATCAT and config unchanged since the last run; "
+                  "keeping the previous comparison.")
+            print_http_report()
+            return 0
+        totals = build_totals(rows)
     except (FetchError, CatalogError) as err:
         if out_path.exists():
             print(f"SATCAT unavailable ({err}); keeping the previous comparison.",
@@ -225,8 +281,8 @@ def main():
               file=sys.stderr)
         return 1
 
-    totals = build_totals(rows)
     out_path.write_text(json.dumps(totals, indent=2), encoding="utf-8")
+    INPUTS.record("space_totals", inputs)
 
     on_orbit = totals["on_orbit"]
     cum = totals["cumulative_alumina"]
@@ -235,8 +291,9 @@ def main():
           f"({on_orbit['starlink_share'] * 100:.1f}% Starlink). "
           f"Cumulative Al₂O₃ {cum['with_starlink_kg']:,.0f} kg, "
           f"{cum['delta_kg']:,.0f} kg of it from Starlink.")
+    print_http_report()
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(sys.argv[1:]))
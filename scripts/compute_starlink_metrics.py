@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-import csv, json, math, re, sys, time, datetime, pathlib, io
+import argparse, csv, json, math, re, sys, time, datetime, pathlib, io
 from pathlib import Path
 import requests
-import yaml
 from bs4 import BeautifulSoup  # lightweight HTML parsing for decayed list
 
 sys.path.append(str(Path(__file__).resolve().parent))
-from starlink_utils import http_get, FetchError
+from starlink_utils import (http_get, load_config, FetchError, HTTP_CACHE, CIRCUIT_BREAKER,
+                            INPUTS, content_hash, file_hash, force_recompute, print_http_report)
 
 REPO = Path(__file__).resolve().parents[1]
 DATA = REPO / "data"
@@ -16,16 +16,23 @@ DATA.mkdir(exist_ok=True, parents=True)
 STATE.mkdir(exist_ok=True, parents=True)
 (SITE / "assets").mkdir(exist_ok=True, parents=True)
 
-CFG = yaml.safe_load((DATA / "starlink_config.yml").read_text(encoding="utf-8"))
+CONFIG_FILE = DATA / "starlink_config.yml"
+CFG = load_config(CONFIG_FILE)
 
 STARLINK_CSV = CFG["endpoints"]["starlink_gp_csv"]
 DECAYED_HTML = CFG["endpoints"]["decayed_recent_html"]
+MAX_AGE = CFG.get("http_max_age_seconds", {})
+
+# sha256 of each payload this run fetched, for the input manifest.
+PAYLOAD_HASHES = {}
 
 def ts():
     return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
 def fetch_starlink_active_count():
-    resp = http_get(STARLINK_CSV)
+    resp = http_get(STARLINK_CSV, cache=HTTP_CACHE, max_age=MAX_AGE.get("starlink_gp_csv", 0),
+                    breaker=CIRCUIT_BREAKER)
+    PAYLOAD_HASHES["starlink_gp_csv"] = content_hash(resp)
     reader = csv.DictReader(io.StringIO(resp.text))
     rows = [row for row in reader]
     # Filter only rows whose OBJECT_NAME contains 'STARLINK'
@@ -49,11 +56,13 @@ def fetch_recent_decayed_starlink():
     """
     store, seen = load_decayed_store()
     try:
-        resp = http_get(DECAYED_HTML)
+        resp = http_get(DECAYED_HTML, cache=HTTP_CACHE,
+                        max_age=MAX_AGE.get("decayed_recent_html", 0), breaker=CIRCUIT_BREAKER)
     except FetchError as err:
         print(f"Decayed list unavailable ({err}); reusing {len(seen)} stored entries.",
               file=sys.stderr)
         return len(seen)
+    PAYLOAD_HASHES["decayed_recent_html"] = content_hash(resp)
     soup = BeautifulSoup(resp.text, "html.parser")
     text = soup.get_text(" ", strip=True)
     # Match chunks like "... 47995, STARLINK-2309 ; ..."
@@ -87,7 +96,13 @@ def rolling_series_push(series_file, point):
     series_file.write_text(json.dumps(ser, indent=2), encoding="utf-8")
     return ser
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute Starlink constellation metrics.")
+    parser.add_argument("--force-recompute", action="store_true",
+                        help="Rewrite metrics even when every input is unchanged")
+    args = parser.parse_args([] if argv is None else argv)
+    PAYLOAD_HASHES.clear()
+
     try:
         active = fetch_starlink_active_count()
     except FetchError as err:
@@ -105,6 +120,23 @@ def main():
 
     decayed_total = fetch_recent_decayed_starlink()  # keeps a running total
 
+    # The series take one point per day, so the date is an input too: identical
+    # payloads still produce today's point once.
+    date = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+    inputs = {
+        "starlink_gp_csv": PAYLOAD_HASHES.get("starlink_gp_csv", ""),
+        "decayed_recent_html": PAYLOAD_HASHES.get("decayed_recent_html", ""),
+        "decayed_total": decayed_total,
+        "config": file_hash(CONFIG_FILE),
+        "date": date,
+    }
+    if ((DATA / "metrics.json").exists() and not force_recompute(args.force_recompute)
+            and INPUTS.unchanged("metrics", inputs)):
+        print("CelesTrak payloads and config unchanged since the last run; "
+              "keeping the previous metrics.")
+        print_http_report()
+        return 0
+
     # Mass estimates
     on_orbit_mass = weighted_mass(active, CFG["mix_active"])              # kg
     reentered_mass = weighted_mass(decayed_total, CFG["mix_decayed"])     # kg (historical)
@@ -133,7 +165,6 @@ def main():
     (DATA / "metrics.json").write_text(json.dumps(metrics, indent=2), encoding="utf-8")
 
     # Persist time series (for charts)
-    date = datetime.datetime.utcnow().strftime("%Y-%m-%d")
     series_dir = DATA / "series"
     series_dir.mkdir(exist_ok=True)
     rolling_series_push(series_dir / "active_count.json", {"date": date, "value": active})
@@ -142,7 +173,9 @@ def main():
     rolling_series_push(series_dir / "alumina_kg.json", {"date": date, "value": round(alumina_kg,1)})
 
     print(f"Metrics computed: {active} active, {decayed_total} decayed, {round(on_orbit_mass,1)} kg on-orbit, {round(alumina_kg,1)} kg alumina")
+    INPUTS.record("metrics", inputs)
+    print_http_report()
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(sys.argv[1:]))
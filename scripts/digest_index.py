@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Events/index.json: what each digest in Events/ said, without opening it.
+
+write_digest records every digest it writes here, from the dict
+build_digest_data already had, and keeps the newest one's sections in full:
+
+    {"version": 1,
+     "latest": {"file": "2026-08-22_0925 — Starlink Daily Digest.md",
+                "date": "2026-08-22",
+                "sections": {"Cybersecurity": {"summary": "1 new item(s) ...",
+                                               "updated": true}, ...}},
+     "digests": {"2026-08-22_0925 — Starlink Daily Digest.md":
+                     {"date": "2026-08-22", "items": {"Cybersecurity": 1}}, ...}}
+
+build_site reads "latest" instead of globbing and sorting the folder. When the
+index is missing it is rebuilt once from the markdown. Stdlib only, since
+build_site is.
+
+Rows also carry the sha256 of the digest's markdown. A digest identical to the
+previous one (the hourly "nothing new" emission) isn't written again; the run
+is logged in Events/runs.tsv instead, one "emitted<TAB>sha256<TAB>file" line
+per emission pointing at the note that holds its content, so quiet hours stay
+on record. `compact` folds duplicates written before that into the ledger:
+
+    python scripts/digest_index.py compact
+"""
+import argparse, hashlib, json, os, re, sys
+from pathlib import Path
+
+INDEX_NAME = "index.json"
+LEDGER_NAME = "runs.tsv"
+INDEX_VERSION = 1
+DIGEST_GLOB = "*.md"
+
+RX_DATE = re.compile(r"## Starlink Daily Digest — (\S+)")
+RX_ARCHIVE_HEADER = re.compile(r"^\*\*Archive\s+—\s+(.+?)\*\*\s*$", re.M)
+
+
+def load_index(events_dir):
+    """The index, or None if it is missing or from another version."""
+    try:
+        index = json.loads((Path(events_dir) / INDEX_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def save_index(events_dir, index):
+    path = Path(events_dir) / INDEX_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def empty_index():
+    return {"version": INDEX_VERSION, "latest": None, "digests": {}}
+
+
+def parse_digest(text, fallback_date, domains):
+    """(date, sections, items) recovered from a digest's markdown."""
+    def section(header):
+        m = re.search(rf"### {header}\s*\n(.*?)(?=\n###|\n## |\Z)", text, re.S)
+        return m.group(1).strip() if m else ""
+
+    def update_flag(domain):
+        m = re.search(rf"\| {domain}\s*\| (Yes|No)", text, re.I)
+        return bool(m) and m.group(1).lower() == "yes"
+
+    blocks = RX_ARCHIVE_HEADER.split(text)
+    items = {name.strip(): sum(1 for ln in body.splitlines() if ln.strip().startswith("- "))
+             for name, body in zip(blocks[1::2], blocks[2::2])}
+    date = RX_DATE.search(text)
+    return (date.group(1) if date else fallback_date,
+            {name: (section(name), update_flag(name)) for name in domains},
+            items)
+
+
+def content_hash(md):
+    return hashlib.sha256(md.encode("utf-8")).hexdigest()
+
+
+def latest_hash(index):
+    """sha256 of the newest digest's markdown, or None."""
+    if not index["latest"]:
+        return None
+    return index["digests"].get(index["latest"]["file"], {}).get("sha256")
+
+
+def record(index, file, date, sections, items, sha256):
+    """Add one digest to `index`, and make it the latest if its name sorts
+    last. `sections` maps domain -> (summary, updated); `items` maps domain ->
+    archive entries."""
+    index["digests"][file] = {"date": date, "sha256": sha256,
+                              "items": {name: n for name, n in items.items() if n}}
+    if index["latest"] is None or file >= index["latest"]["file"]:
+        index["latest"] = {
+            "file": file, "date": date,
+            "sections": {name: {"summary": summary, "updated": bool(updated)}
+                         for name, (summary, updated) in sections.items()},
+        }
+    return index
+
+
+def rebuild_index(events_dir, domains):
+    """Index of every digest markdown file in `events_dir`, read one by one."""
+    index = empty_index()
+    for path in sorted(Path(events_dir).glob(DIGEST_GLOB)):
+        md = path.read_text(encoding="utf-8")
+        date, sections, items = parse_digest(md, path.stem[:10], domains)
+        record(index, path.name, date, sections, items, content_hash(md))
+    return index
+
+
+def log_run(events_dir, emitted, sha256, file):
+    """Append one emission to the run ledger."""
+    with open(Path(events_dir) / LEDGER_NAME, "a", encoding="utf-8") as f:
+        f.write(f"{emitted}\t{sha256}\t{file}\n")
+
+
+def read_ledger(events_dir):
+    """{emitted: (sha256, file)} from the run ledger."""
+    try:
+        lines = (Path(events_dir) / LEDGER_NAME).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return {}
+    runs = {}
+    for line in lines:
+        parts = line.split("\t")
+        if len(parts) == 3:
+            runs[parts[0]] = (parts[1], parts[2])
+    return runs
+
+
+def compact(events_dir, index):
+    """Fold digest files identical to an earlier one into the ledger: each
+    becomes a ledger line pointing at the first file with that content and is
+    deleted. Every remaining file gets its own ledger line too, so the ledger
+    covers all emissions. Updates `index` in place; returns the files removed."""
+    events_dir = Path(events_dir)
+    runs = read_ledger(events_dir)
+    first, removed = {}, []
+    for path in sorted(events_dir.glob(DIGEST_GLOB)):
+        sha = content_hash(path.read_text(encoding="utf-8"))
+        kept = first.setdefault(sha, path.name)
+        runs.setdefault(path.stem.split(" ", 1)[0], (sha, path.name))
+        if kept != path.name:
+            path.unlink()
+            removed.append(path.name)
+            index["digests"].pop(path.name, None)
+            if index["latest"] and index["latest"]["file"] == path.name:
+                index["latest"]["file"] = kept
+    ledger = events_dir / LEDGER_NAME
+    tmp = ledger.with_suffix(".tmp")
+    tmp.write_text("".join(f"{emitted}\t{sha}\t{first.get(sha, file)}\n"
+                           for emitted, (sha, file) in sorted(runs.items())), encoding="utf-8")
+    os.replace(tmp, ledger)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="Fold identical digest notes into the run ledger")
+    parser.parse_args(argv)
+
+    sys.path.append(str(Path(__file__).resolve().parent))
+    from build_site import DOMAINS, EVENTS
+    index = load_index(EVENTS) or rebuild_index(EVENTS, DOMAINS)
+    removed = compact(EVENTS, index)
+    save_index(EVENTS, index)
+    print(f"Folded {len(removed)} duplicate digest(s) into {LEDGER_NAME}; "
+          f"{len(index['digests'])} remain.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
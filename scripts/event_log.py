@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""data/events.jsonl: the digest's structured output, one JSON object per line.
+
+build_digest_data appends one "item" line per digested story and one
+"emission" line per run, from the same dict the markdown notes are rendered
+from, so nothing is lost to the round trip through markdown:
+
+    {"type": "item", "emitted": "2026-08-22_0925", "domain": "Regulatory",
+     "date": "2026-08-22", "published": "2026-08-22T07:10:00", "headline": "...",
+     "source": "...", "url": "...", "summary": "...", "scores": {...},
+     "also": [...], "key": "3f9a...", "seen_key": "https://..."}
+    {"type": "emission", "emitted": "2026-08-22_0925", "digest_date": "2026-08-22",
+     "sections": {"Regulatory": {"summary": "...", "updated": true}, ...},
+     "items": {"Regulatory": 3}}
+    {"type": "seen", "emitted": "2026-08-22_0925", "keys": [...]}
+
+`emitted` is the run's Pacific-time stamp. `seen_key` is the key the digest's
+seen-items table holds the story under, and a "seen" line records keys it took
+over from the old JSON list; the table is rebuilt from both if it is lost.
+
+The log is only ever appended to. build_site streams it for the archives and
+the latest digest. `key` is archive_store.archive_key of the item's archive
+line, so a story logged twice shows once. Stdlib only, since build_site is.
+
+    python scripts/event_log.py import    # backfill from the archives and Events/index.json
+
+The import is idempotent: entries and emissions already in the log are skipped,
+so it can be re-run to pick up archive entries added by hand. Until it is, the
+site merges such entries in from the shards at build time (and leaves out
+logged entries since removed from them).
+"""
+import argparse, json, re, sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+import archive_store, digest_index
+
+REPO = Path(__file__).resolve().parents[1]
+EVENT_LOG = REPO / "data" / "events.jsonl"
+
+RX_SCORES = re.compile(r"\s*<!--\s*scores:\s*(.*?)\s*-->")
+RX_ALSO = re.compile(r"\s*\(also: ([^()]*)\)\s*$")
+
+
+class EventLog:
+    """Appends records to the JSONL log, one line each."""
+
+    def __init__(self, path=EVENT_LOG):
+        self.path = Path(path)
+
+    def append(self, records):
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                            for r in records))
+
+
+def read_events(path=EVENT_LOG):
+    """Records of the log in order, streamed. A line that doesn't parse (a run
+    killed mid-write) is skipped."""
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def parse_scores(text):
+    """{"Environmental": 2, ...} from "Environmental 2, Cybersecurity 0"."""
+    scores = {}
+    for part in text.split(","):
+        name, _, score = part.strip().rpartition(" ")
+        if name and score.lstrip("-").isdigit():
+            scores[name] = int(score)
+    return scores
+
+
+def entry_record(domain, line):
+    """Item record for one archive line, or None if it isn't an entry.
+    `source` holds the text after the headline, as the site showed it."""
+    m = archive_store.RX_ENTRY.match(line.strip())
+    if not m:
+        return None
+    rest = m.group("rest")
+    scores = RX_SCORES.search(rest)
+    rest = RX_SCORES.sub("", rest)
+    also = RX_ALSO.search(rest)
+    rest = RX_ALSO.sub("", rest)
+    urls = archive_store.RX_URL.findall(rest)
+    source = " ".join(re.sub(r"\s*\|\s*", " ", archive_store.RX_URL.sub("", rest)).split())
+    return {
+        "type": "item", "emitted": None, "domain": domain,
+        "date": m.group("date").strip(), "headline": m.group("headline").strip(),
+        "source": source.strip("— ").strip(), "url": urls[0] if urls else "",
+        "scores": parse_scores(scores.group(1)) if scores else {},
+        "also": [s.strip() for s in also.group(1).split(",")] if also else [],
+        "key": archive_store.archive_key(line),
+    }
+
+
+def import_archives(log, archive_dir=archive_store.ARCHIVE, events_dir=None, domains=()):
+    """Append to `log` every archived entry and indexed digest it doesn't have
+    yet, oldest shard first. Returns (items, emissions) added."""
+    have_keys, have_emissions = set(), set()
+    for record in read_events(log.path):
+        if record.get("type") == "item":
+            have_keys.add(record.get("key"))
+        elif record.get("type") == "emission":
+            have_emissions.add(record.get("emitted"))
+
+    items = []
+    manifest = archive_store.load_manifest(archive_dir)
+    for domain in domains:
+        shards = manifest["domains"].get(domain, {}).get("shards", {})
+        for meta in shards.values():
+            path = Path(archive_dir) / meta["file"]
+            if not path.exists():
+                continue
+            for line in path.read_text(encoding="utf-8").splitlines():
+                record = entry_record(domain, line)
+                if record and record["key"] not in have_keys:
+                    have_keys.add(record["key"])
+                    items.append(record)
+
+    emissions = []
+    index = digest_index.load_index(events_dir) if events_dir else None
+    if index:
+        latest = index["latest"]["file"] if index["latest"] else None
+        for file, row in sorted(index["digests"].items()):
+            emitted = file.split(" ", 1)[0]
+            if emitted in have_emissions:
+                continue
+            record = {"type": "emission", "emitted": emitted, "digest_date": row["date"],
+                      "items": row["items"]}
+            if file == latest:
+                record["sections"] = index["latest"]["sections"]
+            emissions.append(record)
+
+    log.append(items + emissions)
+    return len(items), len(emissions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="Backfill the log from the archives and Events/index.json")
+    parser.parse_args(argv)
+
+    from build_site import DOMAINS, EVENTS
+    items, emissions = import_archives(EventLog(), events_dir=EVENTS, domains=DOMAINS)
+    print(f"Imported {items} archive entr{'y' if items == 1 else 'ies'} and "
+          f"{emissions} emission(s) into {EVENT_LOG.relative_to(REPO)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
-import os, sys, time, json, datetime, re, argparse
+import os, sys, io, time, json, datetime, re, argparse, hashlib, threading, sqlite3
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait
+from email.utils import parsedate_tz, mktime_tz
 from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlsplit
 
 try:
     import feedparser, yaml
@@ -10,7 +15,14 @@ except ImportError:
 
 # Import shared utils
 sys.path.append(str(Path(__file__).resolve().parent))
-from starlink_utils import now_pt, looks_starlink_critical, classify_domain, http_get
+from starlink_utils import (PT, now_pt, classify_batch, domain_scores, best_domain, http_get,
+                            HTTP_CACHE, CIRCUIT_BREAKER, CLASSIFY_CACHE, RULE_STATS,
+                            CircuitOpenError, NearDuplicateIndex, NEAR_DUP_SIMILARITY,
+                            minhash, story_words, clean_text,
+                            filter_fingerprint, connection_stats, print_http_report)
+from archive_store import ArchiveStore, archive_key
+from event_log import EventLog, read_events
+import digest_index
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 VAULT = REPO_ROOT
@@ -29,12 +41,6 @@ for p in (EVENTS, ARCHIVE, STATE):
 DOMAINS = ("Environmental", "Cybersecurity", "Astronomical", "Regulatory")
 FALLBACK_DOMAIN = "Regulatory"
 
-# Ensure archive files exist
-for name in DOMAINS:
-    f = ARCHIVE / f"{name}.md"
-    if not f.exists():
-        f.write_text(f"# {name} — Archive\n", encoding="utf-8")
-
 FEEDS_FILE = REPO_ROOT / "scripts" / "feeds.yml"
 if FEEDS_FILE.exists():
     FEEDS = yaml.safe_load(FEEDS_FILE.read_text())
@@ -51,6 +57,22 @@ FEED_TIMEOUT = (5, 20)
 FEED_ATTEMPTS = 2
 FEED_BUDGET_SECONDS = 420
 
+# Feeds are fetched concurrently. Walking them one at a time made the pass as
+# slow as the sum of every feed's latency, so a few slow hosts used up the
+# budget and the rest were skipped. The per-host cap keeps us polite to hosts
+# that serve several feeds (six of them are Google News queries).
+FEED_WORKERS = 8
+FEED_PER_HOST = 2
+
+# A feed fetched less than this long ago (seconds) is reused from the HTTP cache
+# without a request, so a rerun in the same hour is free. Older copies are
+# revalidated. A feed can set its own `max_age` in feeds.yml.
+FEED_MAX_AGE = 3600
+
+# Entries older than this are ignored, and state about them (seen keys,
+# near-duplicate signatures) can be forgotten.
+FEED_WINDOW_DAYS = 30
+
 # Google News and the like append " - Publisher" to headlines; strip it so the
 # same story arriving from two feeds collapses into one item.
 RX_TITLE_SUFFIX = re.compile(r"\s+[-–—|]\s+[^-–—|]{2,40}$")
@@ -78,32 +100,308 @@ def dedupe_items(items):
     return out
 
 
-def gather_items():
+# ---------- Near-duplicate stories ----------
+# dedupe_items only catches the same headline or link. The same story rewritten
+# by another outlet is caught by MinHash similarity of its words instead, both
+# within a run and against stories kept in earlier runs (.state/near_duplicates.json).
+# The first (newest) copy survives and lists the others in "also_reported_by";
+# a rewrite of a story already kept in an earlier run is noted on that story's
+# index entry and dropped. Only stories a digest actually published stay in the
+# index, and it is saved by main once the digest is written.
+NEAR_DUP_FILE = STATE / "near_duplicates.json"
+
+
+def near_duplicate_index():
+    similarity = (FEEDS.get("near_duplicates") or {}).get("similarity", NEAR_DUP_SIMILARITY)
+    return NearDuplicateIndex(NEAR_DUP_FILE, threshold=float(similarity),
+                              window_days=FEED_WINDOW_DAYS)
+
+
+def near_duplicate_key(item):
+    return title_key(item["title"]) or item.get("link", "")
+
+
+def collapse_near_duplicates(items, index):
+    """Drop rewrites of a story already kept this run or in an earlier one."""
+    out, by_key = [], {}
+    for item in items:
+        key = near_duplicate_key(item)
+        signature = minhash(story_words(item["title"], item.get("summary", "")))
+        match = index.find(signature, key)
+        if match is None:
+            item.setdefault("also_reported_by", [])
+            index.add(key, signature, item["source"])
+            by_key[key] = item
+            out.append(item)
+            continue
+        index.note_duplicate(match, item["source"], item.get("link", ""))
+        kept = by_key.get(match)
+        if kept is not None and not any(r["link"] == item.get("link", "")
+                                        for r in kept["also_reported_by"]):
+            kept["also_reported_by"].append({"source": item["source"],
+                                             "link": item.get("link", "")})
+    return out
+
+
+# ---------- Per-feed watermarks ----------
+# Feeds serve their whole recent window every time, so most entries a run sees
+# were already judged by the filter eight hours earlier. Each feed keeps the
+# newest publish time it has seen and short hashes of the entries it has
+# processed; an entry the filter rejected before is skipped without being
+# re-filtered. Entries that matched are filtered again: they are few, and they
+# still have to reach the digest, which drops the ones already published.
+# The whole file is void once the filter rules change (see filter_fingerprint).
+WATERMARK_FILE = STATE / "feed_watermarks.json"
+
+
+def entry_guid(entry):
+    """Short stable hash of an entry's GUID (or link, or title)."""
+    guid = (getattr(entry, "id", "") or getattr(entry, "link", "")
+            or getattr(entry, "title", "") or "")
+    return hashlib.sha1(guid.encode("utf-8")).hexdigest()[:16]
+
+
+def load_watermarks():
+    """{feed url: {"newest", "matched", "rejected"}}; empty if the rules changed."""
+    try:
+        data = json.loads(WATERMARK_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("filter") != filter_fingerprint():
+        return {}
+    return data.get("feeds", {})
+
+
+def save_watermarks(feeds):
+    WATERMARK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    WATERMARK_FILE.write_text(json.dumps({"filter": filter_fingerprint(), "feeds": feeds},
+                                         indent=1, sort_keys=True), encoding="utf-8")
+
+
+# ---------- Feed parsing ----------
+# feedparser builds a fully normalised tree for every entry (sanitising, date
+# guessing, dozens of namespaces) and we read five fields of it. Well-formed
+# RSS 2.0 and Atom go through a streaming iterparse pass that pulls just those
+# fields; anything it can't read (RSS 1.0/RDF, HTML entities that aren't valid
+# XML, broken markup) falls back to feedparser. Entries come back with the same
+# attribute names feedparser uses, so gather_items can't tell them apart.
+ATOM = "{http://www.w3.org/2005/Atom}"
+DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+
+
+class FastParseError(ValueError):
+    """The payload isn't plain RSS 2.0 or Atom; use feedparser instead."""
+
+
+def _rfc822_parsed(text):
+    parts = parsedate_tz(text or "")
+    if not parts:
+        return None
+    return time.gmtime(mktime_tz(parts))
+
+
+def _iso_parsed(text):
+    try:
+        dt = datetime.datetime.fromisoformat((text or "").strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.utctimetuple()
+
+
+def _entry(title, link, guid, summary, published, updated):
+    # Mirror feedparser: RSS pubDate fills both published and updated. The
+    # summary stays raw HTML; gather_items' clean_text strips scripts and
+    # styles from either parser's output, on a bounded slice of it.
+    return SimpleNamespace(title=(title or "").strip(), link=(link or "").strip(),
+                           id=(guid or "").strip() or None, summary=(summary or "").strip(),
+                           published_parsed=published, updated_parsed=updated or published)
+
+
+def fast_parse(data):
+    """Stream title/link/id/summary/dates out of RSS 2.0 or Atom bytes."""
+    entries = []
+    root = None
+    open_elements = []
+    try:
+        for event, el in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = el
+                    if el.tag not in ("rss", f"{ATOM}feed"):
+                        raise FastParseError(f"unsupported root <{el.tag}>")
+                open_elements.append(el)
+                continue
+            open_elements.pop()
+            if el.tag == "item":
+                published = _rfc822_parsed(el.findtext("pubDate"))
+                updated = None if published else _iso_parsed(el.findtext(DC_DATE))
+                summary = el.findtext("description")
+                if summary is None:
+                    summary = el.findtext(CONTENT_ENCODED)
+                entries.append(_entry(el.findtext("title"), el.findtext("link"),
+                                      el.findtext("guid"), summary, published, updated))
+                # Drop finished items from their parent (<channel>, not the
+                # root), so memory holds one item at a time.
+                open_elements[-1].clear()
+            elif el.tag == f"{ATOM}entry":
+                link = None
+                for candidate in el.findall(f"{ATOM}link"):
+                    if candidate.get("rel", "alternate") == "alternate":
+                        link = candidate.get("href")
+                        break
+                summary = el.findtext(f"{ATOM}summary")
+                if summary is None:
+                    summary = el.findtext(f"{ATOM}content")
+                entries.append(_entry(el.findtext(f"{ATOM}title"), link,
+                                      el.findtext(f"{ATOM}id"), summary,
+                                      _iso_parsed(el.findtext(f"{ATOM}published")),
+                                      _iso_parsed(el.findtext(f"{ATOM}updated"))))
+                open_elements[-1].clear()
+    except ET.ParseError as err:
+        raise FastParseError(str(err)) from err
+    if root is None:
+        raise FastParseError("empty document")
+    return SimpleNamespace(entries=entries, parser="fast")
+
+
+def parse_feed(data):
+    """Parse feed bytes, fast path first; `.parser` says which one did it."""
+    try:
+        return fast_parse(data)
+    except FastParseError:
+        parsed = feedparser.parse(data)
+        parsed["parser"] = "feedparser"
+        return parsed
+
+
+def fetch_feed(feed, deadline=None):
+    """Download and parse one feed. Runs on a worker thread."""
+    # Fetch ourselves rather than letting feedparser open the URL: it has no
+    # timeout, so one unresponsive feed could hang the scheduled run.
+    resp = http_get(feed["url"], timeout=FEED_TIMEOUT, attempts=FEED_ATTEMPTS,
+                    cache=HTTP_CACHE, max_age=feed.get("max_age", FEED_MAX_AGE),
+                    breaker=CIRCUIT_BREAKER, deadline=deadline)
+    return parse_feed(resp.content)
+
+
+class FeedTimeoutError(TimeoutError):
+    """A feed was started but hadn't finished by the feed deadline."""
+
+
+def fetch_feeds(feeds, workers=FEED_WORKERS, per_host=FEED_PER_HOST,
+                budget=FEED_BUDGET_SECONDS):
+    """Fetch every feed concurrently under one wall-clock deadline.
+
+    Returns one (parsed, error) pair per feed, in the configured order, so the
+    merge downstream is as deterministic as the sequential pass was. A feed
+    never started before the deadline comes back as (None, None); one still
+    downloading when it passed, as (None, FeedTimeoutError).
+
+    Feeds wait in a queue per host and are handed to the pool only while
+    their host has a free slot, so a host serving many feeds never holds more
+    than `per_host` workers and the rest stay free for other hosts.
+    """
+    deadline = time.monotonic() + budget
+    queues = {}
+    for i, f in enumerate(feeds):
+        queues.setdefault(urlsplit(f["url"]).netloc.lower(), []).append(i)
+    for host in queues:
+        queues[host].reverse()          # pop() takes them in configured order
+    futures = [None] * len(feeds)
+    # Reentrant: a future that is already done runs its callback, and so
+    # release(), inside start().
+    lock, finished = threading.RLock(), threading.Event()
+    left, closed = len(feeds), False
+
+    def start(i, host):
+        # Called with the lock held, so the pool can't be shut down between
+        # the check on `closed` and the submit.
+        futures[i] = pool.submit(fetch_feed, feeds[i], deadline=deadline)
+        futures[i].add_done_callback(lambda _: release(host))
+
+    def release(host):
+        # A slot came free: start the host's next feed, unless time is up.
+        nonlocal left
+        with lock:
+            left -= 1
+            if queues[host] and not closed and time.monotonic() < deadline:
+                start(queues[host].pop(), host)
+            elif left == 0:
+                finished.set()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="feed")
+    try:
+        with lock:
+            for host, queue in queues.items():
+                for _ in range(min(max(1, per_host), len(queue))):
+                    start(queue.pop(), host)
+        if feeds:
+            finished.wait(timeout=max(0.0, deadline - time.monotonic()))
+    finally:
+        with lock:
+            closed = True
+        # Don't wait on stragglers; their own timeouts bound how long they linger.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for fut in futures:
+        if fut is None or fut.cancelled():
+            results.append((None, None))
+        elif not fut.done():
+            results.append((None, FeedTimeoutError(
+                "still downloading when the feed time budget ran out")))
+        elif fut.exception() is not None:
+            results.append((None, fut.exception()))
+        else:
+            results.append((fut.result(), None))
+    return results
+
+
+def gather_items(workers=FEED_WORKERS, per_host=FEED_PER_HOST, persist=True, index=None):
+    """Fetch, filter and de-duplicate every feed's new entries. With
+    persist=False (a dry run) the feed watermarks and the classification cache
+    are read but not written back, so the next real run sees the same entries
+    as new. `index` (a NearDuplicateIndex) is compared against and added to
+    but not saved; see remember_published."""
     items = []
     health = []
+    states, pending = [], []   # per-feed bookkeeping; entries awaiting the filter
     now = datetime.datetime.utcnow()
-    cutoff = now - datetime.timedelta(days=30)
-    started = time.monotonic()
-    for f in FEEDS.get("feeds", []):
+    cutoff = now - datetime.timedelta(days=FEED_WINDOW_DAYS)
+    feeds = FEEDS.get("feeds", [])
+    marks = load_watermarks()
+    # Feeds that fail this run keep their watermark; removed feeds drop theirs.
+    next_marks = {f["url"]: marks[f["url"]] for f in feeds if f["url"] in marks}
+    fetched = fetch_feeds(feeds, workers=workers, per_host=per_host)
+    for f, (d, err) in zip(feeds, fetched):
         name = f.get("name", f["url"])
-        if time.monotonic() - started > FEED_BUDGET_SECONDS:
+        if d is None and err is None:
             print(f"Feed budget exhausted; skipping {name}", file=sys.stderr)
             health.append({"name": name, "status": "skipped", "entries": 0,
                            "recent": 0, "matched": 0,
                            "detail": "not reached within the feed time budget"})
             continue
-        # Fetch ourselves rather than letting feedparser open the URL: it has no
-        # timeout, so one unresponsive feed could hang the scheduled run.
-        try:
-            d = feedparser.parse(
-                http_get(f["url"], timeout=FEED_TIMEOUT, attempts=FEED_ATTEMPTS).content)
-        except Exception as err:
+        if isinstance(err, CircuitOpenError):
+            print(f"Circuit open; skipping {name}", file=sys.stderr)
+            health.append({"name": name, "status": "circuit_open", "entries": 0,
+                           "recent": 0, "matched": 0,
+                           "detail": CIRCUIT_BREAKER.describe(f["url"])[:300]})
+            continue
+        if err is not None:
             print(f"Failed to fetch {f.get('url')}: {err}", file=sys.stderr)
             health.append({"name": name, "status": "error", "entries": 0,
                            "recent": 0, "matched": 0, "detail": str(err)[:200]})
             continue
 
-        entries = recent = matched = 0
+        mark = marks.get(f["url"], {})
+        was_matched = set(mark.get("matched", ()))
+        was_rejected = set(mark.get("rejected", ()))
+        newest = mark.get("newest", "")
+        state = {"url": f["url"], "matched": [], "rejected": []}
+        entries = recent = fresh = 0
         for entry in d.entries:
             entries += 1
             dt = None
@@ -117,35 +415,66 @@ def gather_items():
             if dt < cutoff:
                 continue
             recent += 1
+            newest = max(newest, dt.isoformat())
 
-            title = getattr(entry, "title", "") or ""
-            summary = getattr(entry, "summary", "") or ""
-            link = getattr(entry, "link", "") or ""
-
-            if not looks_starlink_critical(title, summary, link):
+            guid = entry_guid(entry)
+            if guid in was_rejected:
+                state["rejected"].append(guid)
                 continue
-            matched += 1
-
-            items.append({
+            if guid not in was_matched:
+                fresh += 1
+            pending.append((state, guid, {
                 "source": name,
-                "title": title,
-                "summary": summary,
-                "link": link,
-                "date": dt.isoformat()
-            })
-
-        status = "ok" if entries else "empty"
-        health.append({"name": name, "status": status, "entries": entries,
-                       "recent": recent, "matched": matched, "detail": ""})
-        print(f"{name}: {entries} entries, {recent} within 30d, {matched} matched")
-
+                "title": getattr(entry, "title", "") or "",
+                "summary": clean_text(getattr(entry, "summary", "") or ""),
+                "link": getattr(entry, "link", "") or "",
+                "date": dt.isoformat(),
+            }))
+
+        state["newest"] = newest
+        state["health"] = {"name": name, "status": "ok" if entries else "empty",
+                           "entries": entries, "recent": recent, "new": fresh,
+                           "previously_seen": recent - fresh, "matched": 0, "detail": "",
+                           "cache": HTTP_CACHE.outcome(f["url"]),
+                           "parser": getattr(d, "parser", "feedparser")}
+        health.append(state["health"])
+        states.append(state)
+
+    # Every feed's new entries go through the filter and scorer in one batch;
+    # each is evaluated once (or answered from the cache of earlier runs) and
+    # carries its verdict from here on.
+    verdicts = classify_batch([(c["title"], c["summary"], c["link"]) for _, _, c in pending],
+                              cache=CLASSIFY_CACHE, stats=RULE_STATS, persist=persist)
+    for (state, guid, candidate), (critical, scores) in zip(pending, verdicts):
+        if not critical:
+            state["rejected"].append(guid)
+            continue
+        state["matched"].append(guid)
+        state["health"]["matched"] += 1
+        candidate["domain_scores"] = scores
+        items.append(candidate)
+
+    for state in states:
+        # Only entries still in the window are kept, so each set stays feed-sized.
+        next_marks[state["url"]] = {"newest": state["newest"],
+                                    "matched": sorted(set(state["matched"])),
+                                    "rejected": sorted(set(state["rejected"]))}
+        h = state["health"]
+        print(f"{h['name']}: {h['entries']} entries, {h['recent']} within 30d "
+              f"({h['new']} new), {h['matched']} matched")
+
+    if persist:
+        save_watermarks(next_marks)
     items.sort(key=lambda x: x["date"], reverse=True)
-    items = dedupe_items(items)[:MAX_ITEMS]
-    write_feed_health(health, len(items))
-    return items
+    items = dedupe_items(items)
+    if index is None:
+        index = near_duplicate_index()
+    unique = collapse_near_duplicates(items, index)
+    write_feed_health(health, len(unique[:MAX_ITEMS]), near_duplicates=len(items) - len(unique))
+    return unique[:MAX_ITEMS]
 
 
-def write_feed_health(health, kept):
+def write_feed_health(health, kept, near_duplicates=0):
     """Publish per-feed yield so a quiet digest is diagnosable, not mysterious."""
     ok = [h for h in health if h["status"] == "ok"]
     payload = {
@@ -155,41 +484,164 @@ def write_feed_health(health, kept):
         "feeds_failed": len([h for h in health if h["status"] == "error"]),
         "feeds_empty": len([h for h in health if h["status"] == "empty"]),
         "feeds_skipped": len([h for h in health if h["status"] == "skipped"]),
+        "feeds_circuit_open": len([h for h in health if h["status"] == "circuit_open"]),
         "entries_seen": sum(h["entries"] for h in health),
         "entries_recent": sum(h["recent"] for h in health),
+        "entries_new": sum(h.get("new", 0) for h in health),
+        "entries_previously_seen": sum(h.get("previously_seen", 0) for h in health),
         "items_matched": sum(h["matched"] for h in health),
+        "items_near_duplicate": near_duplicates,
         "items_kept": kept,
+        "parsers": {p: len([h for h in health if h.get("parser") == p])
+                    for p in sorted({h["parser"] for h in health if h.get("parser")})},
+        "http_cache": HTTP_CACHE.summary(),
+        "classify_cache": CLASSIFY_CACHE.summary(),
+        "rules": RULE_STATS.summary(),
+        "connections": connection_stats(),
+        "circuit_breaker": CIRCUIT_BREAKER.snapshot(),
         "feeds": sorted(health, key=lambda h: (-h["matched"], h["name"])),
     }
     FEED_HEALTH_FILE.parent.mkdir(parents=True, exist_ok=True)
     FEED_HEALTH_FILE.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     print(f"Feeds: {payload['feeds_ok']}/{payload['feeds_configured']} ok, "
-          f"{payload['entries_recent']} recent entries, "
+          f"{payload['entries_recent']} recent entries ({payload['entries_new']} new), "
           f"{payload['items_matched']} matched, {kept} kept after dedupe.")
 
 # ---------- Deterministic digest (no external API) ----------
-SEEN_FILE = STATE / "seen_items.json"
-
-SEEN_CAP = 2000
-
-def load_seen():
-    """Keys of already-digested items, oldest first."""
-    if SEEN_FILE.exists():
+# Items already put in a digest. Keys expire a feed window after they were last
+# seen in a feed, so nothing still being served can resurface however busy the
+# window was (the old JSON list was capped at 2,000 keys and could). Keys are
+# 64-bit hashes in a sqlite table: membership is an index lookup and a run
+# writes only the rows it touches. A binary file doesn't belong in the commits
+# the workflow makes, so the table lives in .state/cache/ with the other
+# caches. The committed copy is the event log: every digested item carries the
+# key it was seen under, and the keys migrated from the JSON list are logged
+# too, so a lost table is rebuilt from the log's last window.
+SEEN_DB = STATE / "cache" / "seen_items.sqlite"
+SEEN_FILE = STATE / "seen_items.json"    # pre-sqlite list, migrated on first open
+EMITTED_FORMAT = "%Y-%m-%d_%H%M"          # a run's stamp in the event log, Pacific time
+
+
+class SeenStore:
+    """Digested item keys with a last-seen time, expiring after `window_days`."""
+
+    def __init__(self, path, window_days=FEED_WINDOW_DAYS, legacy=None, events=None):
+        self.window = window_days * 86400
+        self.now = int(time.time())
+        fresh = str(path) == ":memory:" or not Path(path).exists()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen "
+                        "(key INTEGER PRIMARY KEY, last_seen INTEGER NOT NULL)")
+        if fresh and legacy is not None and Path(legacy).exists():
+            self._migrate(Path(legacy), events)
+        elif fresh and events is not None:
+            self._rebuild(events)
+
+    @staticmethod
+    def hash(key):
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(),
+                              "big", signed=True)
+
+    def _migrate(self, legacy, events=None):
+        # The JSON list has no timestamps; its keys get a full window from now.
+        # They are logged before the list is deleted, so a rebuild finds them.
         try:
-            return list(json.loads(SEEN_FILE.read_text(encoding="utf-8")))
-        except Exception:
-            return []
-    return []
-
-def save_seen(seen):
-    # Cap the file so it can't grow without bound, keeping the most recent keys.
-    # (Sorting before truncating used to drop keys alphabetically, which could
-    # evict a recent link and let an old story resurface.)
-    SEEN_FILE.write_text(json.dumps(list(seen)[-SEEN_CAP:]), encoding="utf-8")
+            keys = json.loads(legacy.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            keys = []
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO seen VALUES (?, ?)",
+                                ((self.hash(k), self.now) for k in keys))
+        if events is not None and keys:
+            EventLog(events).append([{"type": "seen",
+                                      "emitted": now_pt().strftime(EMITTED_FORMAT),
+                                      "keys": keys}])
+        legacy.unlink()
+        print(f"Migrated {len(keys)} seen keys from {legacy.name}.")
+
+    def _rebuild(self, events):
+        # Every key digested or migrated within the window, last seen when it
+        # was logged. Entries imported from the archives have no emission and
+        # predate the window anyway.
+        rows = {}
+        for record in read_events(events):
+            if record.get("type") == "item":
+                # Items logged before `seen_key` was recorded: item_key's parts.
+                keys = [record.get("seen_key") or record.get("url") or record.get("headline")]
+            elif record.get("type") == "seen":
+                keys = record.get("keys") or []
+            else:
+                continue
+            seen_at = emitted_time(record.get("emitted"))
+            if seen_at is None or seen_at < self.now - self.window:
+                continue
+            for key in filter(None, keys):
+                rows[self.hash(key)] = max(seen_at, rows.get(self.hash(key), 0))
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO seen VALUES (?, ?)", rows.items())
+        if rows:
+            print(f"Rebuilt {len(rows)} seen keys from {Path(events).name}.")
+
+    def __contains__(self, key):
+        return self.db.execute("SELECT 1 FROM seen WHERE key = ?",
+                               (self.hash(key),)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def add(self, key):
+        """Mark `key` seen now (again, if it already was)."""
+        self.db.execute("INSERT OR REPLACE INTO seen VALUES (?, ?)", (self.hash(key), self.now))
+
+    def close(self):
+        """Commit this run's keys and drop those not seen for a whole window."""
+        with self.db:
+            self.db.execute("DELETE FROM seen WHERE last_seen < ?", (self.now - self.window,))
+        self.db.close()
+
+
+def emitted_time(emitted):
+    """Unix time of an "emitted" stamp, which is Pacific time; None if it isn't one."""
+    try:
+        when = datetime.datetime.strptime(emitted or "", EMITTED_FORMAT)
+    except ValueError:
+        return None
+    if PT:
+        return int(when.replace(tzinfo=PT).timestamp())
+    # now_pt()'s fallback is UTC-7, so undo that.
+    return int((when + datetime.timedelta(hours=7)).replace(tzinfo=datetime.timezone.utc)
+               .timestamp())
+
+
+def remember_published(index, items, data):
+    """Keep in the near-duplicate index only the `items` the digest `data`
+    published (not those cut by MAX_ITEMS or already digested), and save it."""
+    published = {entry["seen_key"] for name in DOMAINS
+                 for entry in data[f"archive_{name.lower()}"]}
+    index.keep_added(near_duplicate_key(i) for i in items if item_key(i) in published)
+    index.save()
+
+
+def open_seen_store():
+    return SeenStore(SEEN_DB, legacy=SEEN_FILE, events=EVENT_LOG)
 
 def item_key(item):
     return item.get("link") or item.get("title", "")
 
+def item_scores(item):
+    """Domain scores stored on the item when it was gathered, else computed now."""
+    scores = item.get("domain_scores")
+    if scores is None:
+        scores = item["domain_scores"] = domain_scores(item["title"], item["summary"],
+                                                       item["link"])
+    return scores
+
+def format_scores(scores):
+    """Scores as "Environmental 3, Cybersecurity 0, Astronomical 1", for humans."""
+    return ", ".join(f"{domain} {score}" for domain, score in scores.items())
+
 def summarize_domain(domain, new_items):
     if not new_items:
         return f"No new Starlink-specific {domain.lower()} items detected in monitored feeds."
@@ -199,18 +651,47 @@ def summarize_domain(domain, new_items):
     more = f" Plus {len(new_items) - 3} more item(s) in the archive below." if len(new_items) > 3 else ""
     return f"{len(new_items)} new item(s) flagged: {heads}.{more}"
 
-def build_digest_data(items):
+def archive_line(entry):
+    """One archive entry as its markdown line."""
+    # Bold headline so archive_store and build_site pick the entry up.
+    # Scores ride along as an HTML comment: hidden in Obsidian, stripped by
+    # the site, there for anyone asking "why here?".
+    why = f" <!-- scores: {format_scores(entry['scores'])} -->" if entry.get("scores") else ""
+    also = f" (also: {', '.join(entry['also'])})" if entry.get("also") else ""
+    return (f"- {entry.get('date')} | **{entry.get('headline')}** — "
+            f"{entry.get('source')} {entry.get('url')}{also}{why}")
+
+def event_records(data):
+    """The event-log lines for one run: an "item" per archive entry, then the
+    "emission" (see event_log.py)."""
+    records = []
+    for name in DOMAINS:
+        for entry in data[f"archive_{name.lower()}"]:
+            records.append(dict({"type": "item", "emitted": data["emitted"], "domain": name},
+                                **entry, key=archive_key(archive_line(entry))))
+    records.append({
+        "type": "emission", "emitted": data["emitted"], "digest_date": data["digest_date"],
+        "sections": {name: {"summary": data[f"{name.lower()}_summary"],
+                            "updated": data[f"{name.lower()}_update"]} for name in DOMAINS},
+        "items": {name: len(data[f"archive_{name.lower()}"]) for name in DOMAINS
+                  if data[f"archive_{name.lower()}"]},
+    })
+    return records
+
+def build_digest_data(items, log=None):
     """Bucket filtered feed items into domains and build the digest structure
-    that format_digest_markdown expects — pure keyword logic, no LLM."""
-    today_str = now_pt().strftime("%Y-%m-%d")
-    seen = load_seen()
-    seen_lookup = set(seen)
+    that format_digest_markdown expects — pure keyword logic, no LLM. With
+    `log` (an EventLog) the run is also appended to the event log."""
+    now = now_pt()
+    today_str = now.strftime("%Y-%m-%d")
+    seen = open_seen_store()
 
     buckets = {name: [] for name in DOMAINS}
     for item in items:
-        if item_key(item) in seen_lookup:
+        if item_key(item) in seen:
+            seen.add(item_key(item))    # still in a feed: keep it from expiring
             continue
-        domain = classify_domain(item["title"], item["summary"], item["link"])
+        domain = best_domain(item_scores(item))
         buckets[domain if domain in buckets else FALLBACK_DOMAIN].append(item)
 
     def archive_entries(domain_items):
@@ -222,10 +703,15 @@ def build_digest_data(items):
                 "headline": i["title"].strip(),
                 "source": i["source"].strip(),
                 "url": i["link"].strip(),
+                "scores": item_scores(i),
+                "also": list(dict.fromkeys(r["source"] for r in i.get("also_reported_by", ()))),
+                "published": i.get("date") or "",
+                "summary": i.get("summary", ""),
+                "seen_key": item_key(i),
             })
         return out
 
-    data = {"digest_date": today_str}
+    data = {"digest_date": today_str, "emitted": now.strftime(EMITTED_FORMAT)}
     for name in DOMAINS:
         slug = name.lower()
         data[f"{slug}_update"] = bool(buckets[name])
@@ -234,12 +720,11 @@ def build_digest_data(items):
 
     for domain_items in buckets.values():
         for i in domain_items:
-            key = item_key(i)
-            if key not in seen_lookup:
-                seen_lookup.add(key)
-                seen.append(key)
-    save_seen(seen)
+            seen.add(item_key(i))
+    seen.close()
 
+    if log is not None:
+        log.append(event_records(data))
     return data
 
 def format_digest_markdown(data):
@@ -264,17 +749,14 @@ def format_digest_markdown(data):
 
 """
 
-    # Archive sections (reconstruct format for append logic)
-    # The append logic looks for "**Archive — Domain**" and lists.
-
+    # Archive sections, for vault readers; append_archives writes the same
+    # lines to the archive shards from `data`.
     def format_archive(domain, items):
         out = f"**Archive — {domain}**\n"
         if not items:
             out += "No change\n"
         else:
-            for i in items:
-                # Bold headline so build_site.py's archive parser picks the entry up
-                out += f"- {i.get('date')} | **{i.get('headline')}** — {i.get('source')} {i.get('url')}\n"
+            out += "".join(archive_line(i) + "\n" for i in items)
         return out
 
     for name in DOMAINS:
@@ -283,28 +765,21 @@ def format_digest_markdown(data):
     return md
 
 
-def _archive_rx(domain):
-    """Match one archive block, stopping at whichever archive header comes next."""
-    later = "|".join(rf"\*\*Archive\s+—\s+{d}\*\*" for d in DOMAINS if d != domain)
-    return rf"(\*\*Archive\s+—\s+{domain}\*\*)([\s\S]*?)({later}|$)"
+# Archives are sharded by month; see archive_store.py. Every run is also
+# appended to the event log; see event_log.py.
+ARCHIVE_INDEX_FILE = STATE / "archive_index.json"
+EVENT_LOG = REPO_ROOT / "data" / "events.jsonl"
 
-RX_ARCHIVE = {name: _archive_rx(name) for name in DOMAINS}
 
-def append_archives(md):
-    for domain, rx in RX_ARCHIVE.items():
-        m = re.search(rx, md, re.I)
-        if not m:
-            continue
-        body = (m.group(2) or "").strip()
-        lines = [ln.strip() for ln in body.splitlines() if ln.strip().startswith("- ")]
-        if not lines:
-            continue
-        target = ARCHIVE / f"{domain}.md"
-        existing = target.read_text(encoding="utf-8") if target.exists() else ""
-        new_lines = [l for l in lines if l not in existing]
-        if new_lines:
-            existing = existing.rstrip() + "\n" + "\n".join(new_lines) + "\n"
-            target.write_text(existing, encoding="utf-8")
+def append_archives(data):
+    """Append each domain's new entries in `data` to its archive shards."""
+    store = ArchiveStore(ARCHIVE, ARCHIVE_INDEX_FILE)
+    store.migrate(DOMAINS)
+    for domain in DOMAINS:
+        lines = [archive_line(e) for e in data.get(f"archive_{domain.lower()}", [])]
+        if lines:
+            store.append(domain, lines)
+    store.save()
 
 def run_flag(force=False):
     """Path of the once-per-window marker: UTC hour when forced, PT hour otherwise."""
@@ -328,38 +803,67 @@ def should_emit_now(force=False):
         return False
     return not run_flag(force).exists()
 
-def write_digest(md):
-    t = now_pt()
-    fname = f"{t.strftime('%Y-%m-%d_%H%M')} — Starlink Daily Digest.md"
+def write_digest(md, data):
+    """Write the digest note and record it in Events/index.json from `data`
+    (build_digest_data's dict), so build_site needn't re-read the markdown.
+    A digest identical to the previous one isn't written again: the run goes
+    in the ledger against the earlier note. Returns (path, written)."""
+    emitted = data.get("emitted") or now_pt().strftime(EMITTED_FORMAT)
+    index = digest_index.load_index(EVENTS) or digest_index.rebuild_index(EVENTS, DOMAINS)
+    sha = digest_index.content_hash(md)
+    if sha == digest_index.latest_hash(index):
+        previous = index["latest"]["file"]
+        digest_index.log_run(EVENTS, emitted, sha, previous)
+        return EVENTS / previous, False
+
+    fname = f"{emitted} — Starlink Daily Digest.md"
     path = EVENTS / fname
     path.write_text(md, encoding="utf-8")
-    return path
+    digest_index.record(
+        index, fname, data["digest_date"],
+        {name: (data[f"{name.lower()}_summary"], data[f"{name.lower()}_update"]) for name in DOMAINS},
+        {name: len(data[f"archive_{name.lower()}"]) for name in DOMAINS},
+        sha,
+    )
+    digest_index.save_index(EVENTS, index)
+    digest_index.log_run(EVENTS, emitted, sha, fname)
+    return path, True
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--force", action="store_true", help="Force run regardless of time")
     parser.add_argument("--dry-run", action="store_true", help="Gather and classify items without writing the digest")
-    args = parser.parse_args()
+    parser.add_argument("--feed-workers", type=int, default=FEED_WORKERS,
+                        help="Feeds fetched at once (1 fetches them one at a time)")
+    parser.add_argument("--feed-per-host", type=int, default=FEED_PER_HOST,
+                        help="Most feeds fetched at once from any one host")
+    args = parser.parse_args([] if argv is None else argv)
 
     if not should_emit_now(args.force):
         print("Not an emission window (PT) or already emitted this hour.")
-        return
+        return 0
 
-    items = gather_items()
+    index = near_duplicate_index()
+    items = gather_items(workers=args.feed_workers, per_host=args.feed_per_host,
+                         persist=not args.dry_run, index=index)
+    print_http_report()
 
     if args.dry_run:
         print(f"Dry run: Gathered {len(items)} items.")
         for i in items:
-            print(f"  [{classify_domain(i['title'], i['summary'], i['link']) or '??'}] {i['title']}")
-        return
+            scores = item_scores(i)
+            print(f"  [{best_domain(scores) or '??'}] {i['title']}  ({format_scores(scores)})")
+        return 0
 
-    json_data = build_digest_data(items)
+    json_data = build_digest_data(items, log=EventLog(EVENT_LOG))
     md = format_digest_markdown(json_data)
-    p = write_digest(md)
-    append_archives(md)
+    p, written = write_digest(md, json_data)
+    append_archives(json_data)
+    remember_published(index, items, json_data)
     mark_emitted(args.force)
-    print(f"Wrote digest: {p}")
+    print(f"Wrote digest: {p}" if written else f"Digest unchanged since {p.name}; run logged")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(sys.argv[1:]))
 
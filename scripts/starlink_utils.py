@@ -1,8 +1,23 @@
 
 import re
+import os
 import sys
+import json
 import time
+import random
+import hashlib
 import datetime
+import functools
+import html
+import threading
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+try:
+    import re._parser as _sre_parse   # Python 3.11+
+except ImportError:                   # older interpreters
+    import sre_parse as _sre_parse
 
 # ---- Pacific Time (PT) ----
 try:
@@ -21,13 +36,92 @@ def now_pt():
 # unretried failure used to abort the whole scheduled run, so every fetch goes
 # through here: bounded retries with exponential backoff, and an explicit
 # FetchError so callers can decide whether to degrade instead of crash.
+STATE_DIR = Path(__file__).resolve().parents[1] / ".state"
+CACHE_DIR = STATE_DIR / "cache"
+
 USER_AGENT = "starlink-watch/1.0 (+https://github.com/bitterbuick/starlink-watch)"
 HTTP_TIMEOUT = (10, 60)   # (connect, read) seconds — never wait forever
 HTTP_ATTEMPTS = 4
+RETRY_AFTER_CAP = 120     # seconds; a longer Retry-After is treated as this
+MIN_ATTEMPT_SECONDS = 1.0
+
+CONFIG_FILE = Path(__file__).resolve().parents[1] / "data" / "starlink_config.yml"
+_configs = {}
+_config_lock = threading.Lock()
+
+def load_config(path=CONFIG_FILE):
+    """Parsed YAML config, read once per process however many stages import it.
+
+    Keyed on the file's mtime so an edited file is picked up; callers must treat
+    the returned dict as read-only since it is shared.
+    """
+    import yaml
+    path = Path(path)
+    key = (path, path.stat().st_mtime_ns)
+    with _config_lock:
+        if key not in _configs:
+            _configs[key] = yaml.safe_load(path.read_text(encoding="utf-8"))
+        return _configs[key]
 
 class FetchError(RuntimeError):
     """Raised when a URL could not be fetched after every retry."""
 
+# ---------- Pooled session ----------
+# Callers used to go through bare requests.get, which opens a fresh TCP+TLS
+# connection for every request and every retry — including the repeated trips to
+# celestrak.org and the six Google News feeds. One process-wide session keeps
+# connections alive per host instead. Retries stay in http_get, so the adapter's
+# own retry logic is off.
+POOL_HOSTS = 32        # hosts kept warm; more than the feeds + CelesTrak use
+POOL_PER_HOST = 16     # connections per host; covers the concurrent feed pass
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The shared keep-alive session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST,
+                                  max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT,
+                                    "Accept-Encoding": "gzip, deflate"})
+            _session = session
+        return _session
+
+
+def connection_stats():
+    """Requests vs new connections per host on the shared session."""
+    if _session is None:
+        return {}
+    stats = {}
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] = max(0, host["requests"] - host["connections"])
+    return stats
+
+
+def print_http_report(out=sys.stdout):
+    """Cache outcomes and connection reuse for everything this process fetched."""
+    HTTP_CACHE.print_report(out)
+    for host, s in sorted(connection_stats().items()):
+        print(f"HTTP pool: {host} — {s['requests']} request(s) over "
+              f"{s['connections']} connection(s), {s['reused']} reused", file=out)
+
 def _is_retryable(err):
     import requests
     if isinstance(err, (requests.exceptions.Timeout,
@@ -40,36 +134,600 @@ def _is_retryable(err):
         return status is not None and (status >= 500 or status == 429)
     return False
 
-def http_get(url, timeout=HTTP_TIMEOUT, attempts=HTTP_ATTEMPTS, backoff=2.0, session=None):
+def _retry_after(err):
+    """Seconds the server asked us to wait (Retry-After on a 429/503), or None."""
+    resp = getattr(err, "response", None)
+    if getattr(resp, "status_code", None) not in (429, 503):
+        return None
+    raw = (getattr(resp, "headers", None) or {}).get("Retry-After", "")
+    raw = str(raw).strip()
+    if not raw:
+        return None
+    if raw.isdigit():
+        return float(raw)
+    try:
+        when = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+# ---------- Per-host circuit breaker ----------
+# Feeds that had been dead for days still got their full retries and timeouts on
+# every run, and a CelesTrak outage cost the whole backoff ladder on each
+# endpoint. The breaker counts consecutive failed runs per host (however many
+# of a run's fetches from that host failed: one CelesTrak blip fails GP,
+# decayed and SATCAT together) and, past BREAKER_THRESHOLD, skips the host
+# outright. After the cooldown one single-attempt probe is let through
+# ("half-open"): success closes the circuit, failure re-opens it. The cooldown
+# starts at one scheduled-run interval and doubles with each further failed
+# run, up to BREAKER_MAX_COOLDOWN, so a short outage costs at most a run while
+# a dead feed soon stops costing anything. State persists in .state/ so it
+# carries across runs; a run is one process.
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 12 * 3600
+BREAKER_MAX_COOLDOWN = 4 * 24 * 3600
+BREAKER_FILE = STATE_DIR / "circuit_breaker.json"
+
+
+class CircuitOpenError(FetchError):
+    """Raised without a request when the host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive failed runs per host, persisted as JSON. Thread-safe."""
+
+    def __init__(self, path, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN,
+                 max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts = None
+        self._probing = set()
+        self._failed = set()        # hosts already counted as failed this run
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url):
+        return urlsplit(url).netloc.lower()
+
+    def _state(self):
+        if self._hosts is None:
+            try:
+                self._hosts = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._hosts = {}
+        return self._hosts
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._hosts, indent=2, sort_keys=True), encoding="utf-8")
+
+    def status(self, url):
+        """closed, open, or half-open (cooldown over; the next request is a probe)."""
+        with self._lock:
+            return self._status(self.host(url))
+
+    def _cooldown(self, info):
+        doublings = max(0, info.get("failures", 0) - self.threshold)
+        return min(self.max_cooldown, self.cooldown * 2 ** min(doublings, 16))
+
+    def _status(self, host):
+        info = self._state().get(host)
+        if not info or info.get("failures", 0) < self.threshold:
+            return "closed"
+        if time.time() - info.get("opened_at", 0) >= self._cooldown(info):
+            return "half-open"
+        return "open"
+
+    def admit(self, url):
+        """Whether a request may go out now, and if so whether it's the probe."""
+        host = self.host(url)
+        with self._lock:
+            status = self._status(host)
+            if status == "closed":
+                return True, False
+            if status == "half-open" and host not in self._probing:
+                self._probing.add(host)
+                return True, True
+            return False, False
+
+    def success(self, url):
+        host = self.host(url)
+        with self._lock:
+            self._probing.discard(host)
+            self._failed.discard(host)
+            if self._state().pop(host, None) is not None:
+                self._save()
+
+    def failure(self, url, err):
+        host = self.host(url)
+        with self._lock:
+            self._probing.discard(host)
+            info = self._state().setdefault(host, {"failures": 0})
+            info["last_error"] = str(err)[:200]
+            if host not in self._failed:
+                self._failed.add(host)
+                info["failures"] = info.get("failures", 0) + 1
+            if info["failures"] >= self.threshold:
+                # Any failure past the threshold (including a failed probe)
+                # restarts the cooldown, longer for each failed run.
+                info["opened_at"] = time.time()
+            self._save()
+
+    def describe(self, url):
+        """One-line explanation for a skipped host, for the health report."""
+        with self._lock:
+            info = dict(self._state().get(self.host(url)) or {})
+        if not info.get("opened_at"):
+            return ""
+        probe = datetime.datetime.utcfromtimestamp(info["opened_at"] + self._cooldown(info))
+        return (f"{info.get('failures', 0)} consecutive failed runs; next probe after "
+                f"{probe.strftime('%Y-%m-%d %H:%M')} UTC. Last error: {info.get('last_error', '')}")
+
+    def snapshot(self):
+        """Status of every host with failures on record."""
+        with self._lock:
+            return {host: {"status": self._status(host), **info}
+                    for host, info in sorted(self._state().items())}
+
+
+CIRCUIT_BREAKER = CircuitBreaker(BREAKER_FILE)
+
+# ---------- Conditional-GET cache ----------
+# Every run used to re-download the full SATCAT, the GP CSV, the decayed page and
+# every feed even when nothing had changed upstream since the run a few hours
+# earlier. The cache keeps each body on disk with its ETag/Last-Modified, so a
+# repeat fetch is either served outright (inside the URL's max-age, e.g. a
+# workflow rerun) or revalidated with a conditional GET that usually comes back
+# 304 with no body. It lives under .state/cache/, which is not committed; the
+# workflow carries it between runs with actions/cache.
+CHUNK_BYTES = 64 * 1024
+
+
+class _BodyReader:
+    """File-backed stand-in for `Response.raw` that closes itself at EOF."""
+
+    def __init__(self, path):
+        self._fh = open(path, "rb")
+
+    def read(self, size=-1):
+        if self._fh.closed:
+            return b""
+        chunk = self._fh.read(size)
+        if not chunk:
+            self._fh.close()
+        return chunk
+
+    def close(self):
+        self._fh.close()
+
+
+def url_key(url):
+    """Stable file-name key for a URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+
+def _write_body(resp, path):
+    """Stream a response body to `path` (atomically); returns (sha256, bytes)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(tmp, "wb") as fh:
+            for chunk in resp.iter_content(CHUNK_BYTES):
+                fh.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return digest.hexdigest(), size
+
+
+def _file_response(url, path, status=200, headers=None, sha256=None):
+    """A `requests.Response` whose body streams from a file on disk."""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp.reason = "OK" if status == 200 else ""
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.raw = _BodyReader(path)
+    resp.sha256 = sha256
+    return resp
+
+
+class HttpCache:
+    """Bodies and validators per URL, plus hit/revalidation counters.
+
+    Thread-safe: the digest fetches feeds from a pool. `stats` holds this
+    run's counters per URL; the index keeps cumulative ones across runs.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_file = self.root / "index.json"
+        self.stats = {}
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _entries(self):
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._index, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.index_file)
+
+    def _body_path(self, entry):
+        return self.root / f"{entry['key']}.body"
+
+    def lookup(self, url):
+        """The cached entry for `url`, or None if there is none (or its body is gone)."""
+        with self._lock:
+            entry = self._entries().get(url)
+        if entry and self._body_path(entry).exists():
+            return entry
+        return None
+
+    @staticmethod
+    def is_fresh(entry, max_age):
+        return bool(max_age) and time.time() - entry.get("fetched_at", 0) < max_age
+
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def response(self, url, entry):
+        """A `requests.Response` whose body streams from the cached file."""
+        resp = _file_response(url, self._body_path(entry), sha256=entry.get("sha256"),
+                              headers={"Content-Type": entry.get("content_type") or
+                                       "application/octet-stream"})
+        resp.from_cache = True
+        return resp
+
+    def store(self, url, resp, elapsed):
+        """Write a fresh 200 to disk and return a response that reads it back."""
+        key = url_key(url)
+        path = self.root / f"{key}.body"
+        sha256, size = _write_body(resp, path)
+        entry = {
+            "key": key,
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
+            "content_type": resp.headers.get("Content-Type", ""),
+            "fetched_at": time.time(),
+            "bytes": size,
+            "sha256": sha256,
+            "download_seconds": round(elapsed, 3),
+        }
+        with self._lock:
+            old = self._entries().get(url, {})
+            for counter in ("hits", "revalidated", "misses", "bytes_saved"):
+                entry[counter] = old.get(counter, 0)
+            self._index[url] = entry
+        self.record(url, "misses")
+        return self.response(url, entry)
+
+    def revalidated(self, url, entry):
+        """The server answered 304: the cached body is current again."""
+        with self._lock:
+            self._entries()[url]["fetched_at"] = time.time()
+        self.record(url, "revalidated", entry.get("bytes", 0))
+        return self.response(url, entry)
+
+    def record(self, url, outcome, bytes_saved=0):
+        """Count one outcome (hits / revalidated / misses) for `url` and persist it."""
+        with self._lock:
+            run = self.stats.setdefault(
+                url, {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0})
+            run[outcome] += 1
+            run["bytes_saved"] += bytes_saved
+            entry = self._entries().get(url)
+            if entry is not None:
+                entry[outcome] = entry.get(outcome, 0) + 1
+                entry["bytes_saved"] = entry.get("bytes_saved", 0) + bytes_saved
+            self._save()
+
+    def outcome(self, url):
+        """This run's last-known cache outcome for `url`: hit, revalidated, miss or ""."""
+        run = self.stats.get(url) or {}
+        for key, label in (("hits", "hit"), ("revalidated", "revalidated"), ("misses", "miss")):
+            if run.get(key):
+                return label
+        return ""
+
+    def summary(self):
+        """Run totals across every URL fetched through the cache."""
+        totals = {"urls": len(self.stats), "hits": 0, "revalidated": 0, "misses": 0,
+                  "bytes_saved": 0}
+        for run in self.stats.values():
+            for key in ("hits", "revalidated", "misses", "bytes_saved"):
+                totals[key] += run[key]
+        return totals
+
+    def print_report(self, out=sys.stdout):
+        for url, run in sorted(self.stats.items()):
+            print(f"HTTP cache: {url} — {run['hits']} hit(s), {run['revalidated']} "
+                  f"revalidated, {run['misses']} downloaded, "
+                  f"{run['bytes_saved'] / 1024:,.0f} KiB saved", file=out)
+
+
+HTTP_CACHE = HttpCache(CACHE_DIR / "http")
+
+# ---------- Record / replay ----------
+# There was no way to time or exercise the pipeline without the live internet.
+# With STARLINK_HTTP_RECORD=<dir> every response http_get returns is saved
+# (status, headers, body) to that cassette directory; with
+# STARLINK_HTTP_REPLAY=<dir> http_get serves from it and never opens a
+# connection — a URL missing from the cassette is a FetchError, as an outage
+# would be. Replay bypasses the cache and the circuit breaker.
+RECORD_ENV = "STARLINK_HTTP_RECORD"
+REPLAY_ENV = "STARLINK_HTTP_REPLAY"
+
+
+class Cassette:
+    """Recorded responses, one <key>.json + <key>.body pair per URL."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _paths(self, url):
+        key = url_key(url)
+        return self.root / f"{key}.json", self.root / f"{key}.body"
+
+    def has(self, url):
+        return self._paths(url)[0].exists()
+
+    def record(self, url, resp):
+        """Save `resp` and return an equivalent response read back from disk."""
+        meta_path, body_path = self._paths(url)
+        sha256, size = _write_body(resp, body_path)
+        headers = {k: v for k, v in resp.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length",
+                                        "transfer-encoding", "connection")}
+        meta = {"url": url, "status": resp.status_code, "headers": headers,
+                "bytes": size, "sha256": sha256}
+        meta_path.write_text(json.dumps(meta, indent=1, sort_keys=True), encoding="utf-8")
+        return self.replay(url)
+
+    def save(self, url, body, headers=None, status=200):
+        """Write a response directly (for synthetic fixtures).
+
+        `body` is bytes/str or an iterable of chunks, so a large fixture can be
+        generated without holding it in memory.
+        """
+        meta_path, body_path = self._paths(url)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        chunks = [body] if isinstance(body, (bytes, str)) else body
+        digest, size = hashlib.sha256(), 0
+        with open(body_path, "wb") as fh:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                fh.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        meta = {"url": url, "status": status, "headers": headers or {},
+                "bytes": size, "sha256": digest.hexdigest()}
+        meta_path.write_text(json.dumps(meta, indent=1, sort_keys=True), encoding="utf-8")
+
+    def replay(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as err:
+            raise FetchError(f"GET {url} is not in the cassette at {self.root}") from err
+        resp = _file_response(url, body_path, status=meta.get("status", 200),
+                              headers=meta.get("headers"), sha256=meta.get("sha256"))
+        resp.raise_for_status()
+        return resp
+
+
+def active_cassette():
+    """(mode, Cassette) when record or replay is switched on, else (None, None)."""
+    for mode, env in (("replay", REPLAY_ENV), ("record", RECORD_ENV)):
+        root = os.environ.get(env, "")
+        if root:
+            return mode, Cassette(root)
+    return None, None
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _cap_timeout(timeout, remaining):
+    """Shrink a (connect, read) timeout so one attempt can't overrun the deadline."""
+    if remaining is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
+
+
+def http_get(url, timeout=HTTP_TIMEOUT, attempts=HTTP_ATTEMPTS, backoff=2.0, session=None,
+             cache=None, max_age=0, stream=False, breaker=None, deadline=None):
     """GET `url`, retrying transient failures with exponential backoff.
 
     Retries connection/read timeouts and 429/5xx responses; a 4xx (other than
     429) fails immediately since retrying won't help. Raises FetchError when
     every attempt is exhausted.
+
+    With a `cache` (normally HTTP_CACHE), a copy younger than `max_age` seconds
+    is returned without touching the network, and an older one is revalidated
+    with If-None-Match / If-Modified-Since. Requests go through the shared
+    pooled session unless a `session` is passed. `stream` leaves the body
+    unread so large payloads can be consumed in chunks (cached bodies are
+    always streamed, from disk).
+
+    With a `breaker` (normally CIRCUIT_BREAKER), a host whose circuit is open
+    raises CircuitOpenError without a request. Backoff honours Retry-After,
+    is jittered, and is shortened (or abandoned) so the retries finish before
+    `deadline`, a time.monotonic() value, when one is given.
+
+    STARLINK_HTTP_RECORD / STARLINK_HTTP_REPLAY switch on cassette recording
+    or offline replay (see Cassette).
     """
-    import requests
-    getter = session.get if session is not None else requests.get
+    mode, cassette = active_cassette()
+    if mode == "replay":
+        return cassette.replay(url)
+    resp = _http_get(url, timeout, attempts, backoff, session, cache, max_age, stream,
+                     breaker, deadline)
+    if mode == "record":
+        return cassette.record(url, resp)
+    return resp
+
+
+def _http_get(url, timeout, attempts, backoff, session, cache, max_age, stream, breaker,
+              deadline):
+    entry = cache.lookup(url) if cache is not None else None
+    if entry and cache.is_fresh(entry, max_age):
+        cache.record(url, "hits", entry.get("bytes", 0))
+        return cache.response(url, entry)
+
+    if breaker is not None:
+        allowed, probe = breaker.admit(url)
+        if not allowed:
+            raise CircuitOpenError(f"GET {url} skipped: circuit open for "
+                                   f"{breaker.host(url)}")
+        if probe:
+            attempts = 1   # a half-open probe gets one try, not the full ladder
+
+    headers = {"User-Agent": USER_AGENT}
+    kwargs = {"stream": True} if stream else {}
+    if cache is not None:
+        kwargs["stream"] = True   # the body goes straight to disk
+        if entry:
+            headers.update(cache.validators(entry))
+
+    getter = (session or get_session()).get
     last = None
+    tried = 0
     for attempt in range(1, attempts + 1):
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            last = last or TimeoutError("deadline reached before the request was sent")
+            break
+        tried = attempt
         try:
-            resp = getter(url, timeout=timeout, headers={"User-Agent": USER_AGENT})
+            started = time.monotonic()
+            resp = getter(url, timeout=_cap_timeout(timeout, remaining),
+                          headers=headers, **kwargs)
             resp.raise_for_status()
-            return resp
+            if cache is None:
+                result = resp
+            elif resp.status_code == 304 and entry:
+                resp.close()
+                result = cache.revalidated(url, entry)
+            else:
+                result = cache.store(url, resp, time.monotonic() - started)
+            if breaker is not None:
+                breaker.success(url)
+            return result
         except Exception as err:
             last = err
             if attempt == attempts or not _is_retryable(err):
                 break
             delay = backoff ** attempt   # 2s, 4s, 8s
+            delay = max(delay, min(_retry_after(err) or 0.0, RETRY_AFTER_CAP))
+            delay += random.uniform(0, delay * 0.25)   # spread retries out
+            remaining = _remaining(deadline)
+            if remaining is not None:
+                # Leave at least half the remaining time for the retry itself.
+                if remaining < 2 * MIN_ATTEMPT_SECONDS:
+                    break
+                delay = min(delay, remaining / 2)
             print(f"Fetch attempt {attempt}/{attempts} for {url} failed ({err}); "
                   f"retrying in {delay:.0f}s", file=sys.stderr)
             time.sleep(delay)
-    raise FetchError(f"GET {url} failed after {attempts} attempt(s): {last}") from last
+    if breaker is not None and tried:
+        breaker.failure(url, last)
+    raise FetchError(f"GET {url} failed after {tried} attempt(s): {last}") from last
+
+# ---------- Input manifest ----------
+# When CelesTrak served exactly what it served last time, the totals and metrics
+# used to be recomputed anyway and rewritten with nothing new but generated_at —
+# a commit and a Pages deploy for nothing. Each stage records the hashes of the
+# payloads and config it was computed from, and skips when they all match.
+INPUTS_MANIFEST = STATE_DIR / "inputs_manifest.json"
+
+
+def content_hash(resp):
+    """sha256 of a response body.
+
+    Free for cached responses, which carry it; anything else has its body read
+    into memory, so pass a cache when streaming a large payload.
+    """
+    known = getattr(resp, "sha256", None)
+    if known:
+        return known
+    return hashlib.sha256(resp.content).hexdigest()
+
+
+def file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def force_recompute(flag=False):
+    return flag or os.environ.get("FORCE_RECOMPUTE", "") == "1"
+
+
+class InputManifest:
+    """Input hashes each stage last ran with, in one small JSON file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # Stages may record concurrently under the pipeline runner.
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def unchanged(self, stage, inputs):
+        """True when `stage` last ran with exactly these inputs."""
+        return self._load().get(stage, {}).get("inputs") == inputs
+
+    def record(self, stage, inputs):
+        with self._lock:
+            data = self._load()
+            data[stage] = {"inputs": inputs,
+                           "recorded_at": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+
+
+INPUTS = InputManifest(INPUTS_MANIFEST)
 
 # ---------- Starlink-only filter with “criticism/event” signal ----------
+# A rule is a pattern, or a (first, then) pair meaning "`then` somewhere after
+# `first`". Pairs replace `first.*then`, which rescans the rest of the text
+# for every occurrence of `first` and so grows with the square of its length.
 POS = [
     r"\bstarlink\b",
     r"\bstarshield\b",
-    r"\bspacex\b.*\bstarlink\b",
+    (r"\bspacex\b", r"\bstarlink\b"),
 ]
 # Subjects that mean the story is about something *else*. These are checked
 # against the headline only, and only when Starlink isn't in the headline:
@@ -98,22 +756,250 @@ CRITICISM = [
 # Note: Added 'astronomer', 'observatory', etc to CRITICISM based on intent to capture astronomical impacts.
 
 
+def _top_level_branches(rx):
+    """Split a pattern on the `|`s that aren't inside a group or class."""
+    branches, depth, start, i, in_class = [], 0, 0, 0, False
+    while i < len(rx):
+        ch = rx[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            branches.append(rx[start:i])
+            start = i + 1
+        i += 1
+    branches.append(rx[start:])
+    return branches
+
+
+# Feed summaries are often whole HTML fragments: images, iframes, tracking
+# pixels, inline styles. The filter only wants the words, and markup (URLs,
+# class names, alt text) was a source of false keyword hits. Summaries are
+# normalised once, right after parsing, and items keep the clean text.
+SUMMARY_CHARS = 1000
+# Markup is cut to this much before any regex reads it, so a hostile summary
+# costs no more than a long one. Generous: a 1000-character summary rarely
+# comes wrapped in more than a few KB of tags.
+MARKUP_CHARS = 20_000
+RX_HIDDEN_OPEN = re.compile(r"<(script|style|noscript|iframe|svg)\b", re.I)
+RX_TAG = re.compile(r"<[^<>]*>")
+
+
+def strip_hidden(text):
+    """`text` without script/style/noscript/iframe/svg blocks. The closing tag
+    is found with str.find, so it's one pass whether or not blocks are closed;
+    an unclosed block hides the rest of the text, as it would in a browser."""
+    out, pos, lower = [], 0, None
+    while True:
+        m = RX_HIDDEN_OPEN.search(text, pos)
+        if not m:
+            break
+        out.append(text[pos:m.start()])
+        if lower is None:
+            lower = text.lower()
+        close = lower.find("</" + m.group(1).lower(), m.end())
+        end = lower.find(">", close) if close != -1 else -1
+        if end == -1:
+            return " ".join(out)
+        pos = end + 1
+    out.append(text[pos:])
+    return " ".join(out)
+
+
+def clean_text(markup, limit=SUMMARY_CHARS):
+    """Visible text of an HTML fragment: tags dropped, entities decoded,
+    whitespace collapsed, cut at a word boundary after `limit` characters.
+    Only the first MARKUP_CHARS of `markup` are read."""
+    return _clean_text((markup or "")[:MARKUP_CHARS], limit)
+
+
+@functools.lru_cache(maxsize=8192)
+def _clean_text(text, limit):
+    if "<" in text:
+        text = RX_TAG.sub(" ", strip_hidden(text))
+    if "&" in text:
+        text = html.unescape(text)
+    text = " ".join(text.split())
+    if len(text) > limit:
+        text = text[:limit].rsplit(" ", 1)[0] + " …"
+    return text
+
+
+# Whatever a summary looks like, the filter and scorer read at most this much
+# of an item (title first), so no one entry can eat the feed budget.
+ITEM_TEXT_CHARS = 2000
+
+
+def item_text(title, summary, link):
+    """The lowercased blob both the filter and the domain scorer read."""
+    return " ".join([(title or ""), (summary or ""), (link or "")])[:ITEM_TEXT_CHARS].lower()
+
+
+class FollowedBy:
+    """A (first, then) rule: `then` found after a match of `first` on the same line.
+
+    Matches where `first.*then` would, in linear time: `.` stops at a newline,
+    so each line is settled by its earliest `first` (which leaves the most of
+    the line for `then`) and one search for `then` up to the line's end. Like
+    the greedy `.*`, it matches at most once per line.
+    """
+
+    def __init__(self, first, then, flags=re.I):
+        self.first = re.compile(first, flags)
+        self.then = re.compile(then, flags)
+        self.pattern = f"{first} … {then}"
+
+    def line_end(self, text, m):
+        """Where the line holding match `m` of `first` ends."""
+        end = text.find("\n", m.end())
+        return len(text) if end < 0 else end
+
+    def followed(self, text, m):
+        """Whether `then` follows match `m` of `first` on its line."""
+        return self.then.search(text, m.end(), self.line_end(text, m)) is not None
+
+    def match(self, text, pos=0):
+        """A match of `first` at `pos` with `then` after it, else None."""
+        m = self.first.match(text, pos)
+        return m if m and self.followed(text, m) else None
+
+    def search(self, text, pos=0):
+        while True:
+            m = self.first.search(text, pos)
+            if m is None or self.followed(text, m):
+                return m
+            pos = self.line_end(text, m) + 1
+
+    def findall(self, text):
+        found, m = [], self.search(text)
+        while m is not None:
+            found.append(m.group())
+            m = self.search(text, self.line_end(text, m) + 1)
+        return found
+
+
+def compile_rule(rule, flags=re.I):
+    """A compiled pattern, or a FollowedBy for a (first, then) pair."""
+    return FollowedBy(*rule, flags) if isinstance(rule, tuple) else re.compile(rule, flags)
+
+
+def compile_alternation(patterns, prefix, flags=re.I):
+    """One regex matching wherever any of `patterns` would, each in a named group.
+
+    A search over the alternation succeeds exactly when some pattern's own
+    search would, so "any of these match?" costs one scan instead of one per
+    pattern; `lastgroup` on the match says which pattern fired. When every
+    branch starts at a word boundary the `\\b` is tested once per position
+    before any alternative is tried. (first, then) pairs are left out; group
+    numbers still follow their position in `patterns`. None if nothing's left.
+    """
+    plain = [(i, rx) for i, rx in enumerate(patterns) if not isinstance(rx, tuple)]
+    if not plain:
+        return None
+    body = "|".join(f"(?P<{prefix}{i}>{rx})" for i, rx in plain)
+    if all(b.startswith(r"\b") for _, rx in plain for b in _top_level_branches(rx)):
+        body = rf"\b(?:{body})"
+    return re.compile(body, flags)
+
+
+class RelevanceMatcher:
+    """The Starlink filter, compiled once: one alternation per rule list.
+
+    Decisions are the same as searching each pattern in turn; see
+    looks_starlink_critical for the rules themselves. (first, then) pairs
+    are tried only when nothing in the alternation matched. Text is lowercased
+    first, so for ASCII text (nearly every headline) the case-sensitive
+    compile gives the same answer as re.I and lets the engine use its literal
+    fast paths; anything else goes through the re.I compile, which also folds
+    characters like the long s that lower() leaves alone.
+    """
+
+    STARLINK_HEADLINE = re.compile(r"\bstar\s?link\b|\bstarshield\b", re.I)
+
+    def __init__(self, pos, neg, criticism):
+        self.rules = {}
+        for name, patterns in (("pos", pos), ("neg", neg), ("crit", criticism)):
+            pairs = [(f"{name}{i}", FollowedBy(*rx, 0), FollowedBy(*rx, re.I))
+                     for i, rx in enumerate(patterns) if isinstance(rx, tuple)]
+            self.rules[name] = (compile_alternation(patterns, name, 0),
+                                compile_alternation(patterns, name, re.I), pairs)
+
+    def search(self, rule, text):
+        """Group name ("pos0", "crit3"...) of the `rule` pattern found in
+        lowercased `text`, or None."""
+        ascii_rx, folding_rx, pairs = self.rules[rule]
+        plain = text.isascii()
+        rx = ascii_rx if plain else folding_rx
+        m = rx.search(text) if rx is not None else None
+        if m:
+            return m.lastgroup
+        for name, ascii_pair, folding_pair in pairs:
+            if (ascii_pair if plain else folding_pair).search(text):
+                return name
+        return None
+
+    def off_topic_headline(self, title):
+        head = (title or "").lower()
+        if self.STARLINK_HEADLINE.search(head):
+            return False
+        return self.search("neg", head) is not None
+
+    def critical_text(self, text, title):
+        """looks_critical for an already-normalised item_text()."""
+        return self.decide(text, title)[0]
+
+    def decide(self, text, title):
+        """(is_critical, groups): the named group of each rule that fired, in order.
+
+        A rejection ends with the rule that caused it: no "pos" group means no
+        Starlink mention, a "neg" group an off-topic headline, and a lone
+        "pos" group no criticism signal.
+        """
+        pos = self.search("pos", text)
+        if not pos:
+            return False, ()
+        head = (title or "").lower()
+        if not self.STARLINK_HEADLINE.search(head):
+            neg = self.search("neg", head)
+            if neg:
+                return False, (pos, neg)
+        # require criticism/event signal (not marketing or generic launch)
+        crit = self.search("crit", text)
+        if not crit:
+            return False, (pos,)
+        return True, (pos, crit)
+
+    def looks_critical(self, title, summary, link):
+        return self.critical_text(item_text(title, summary, link), title)
+
+
+MATCHER = RelevanceMatcher(POS, NEG, CRITICISM)
+
+
 def _off_topic_headline(title: str) -> bool:
     """True when the headline is about another program and never names Starlink."""
-    head = (title or "").lower()
-    if re.search(r"\bstar\s?link\b|\bstarshield\b", head, re.I):
-        return False
-    return any(re.search(rx, head, re.I) for rx in NEG)
+    return MATCHER.off_topic_headline(title)
 
 
 def looks_starlink_critical(title: str, summary: str, link: str) -> bool:
-    t = " ".join([(title or ""), (summary or ""), (link or "")]).lower()
-    if not any(re.search(rx, t, re.I) for rx in POS):
-        return False
-    if _off_topic_headline(title):
-        return False
-    # require criticism/event signal (not marketing or generic launch)
-    return any(re.search(rx, t, re.I) for rx in CRITICISM)
+    """Names Starlink, isn't about another program, and carries a criticism signal."""
+    return MATCHER.looks_critical(title, summary, link)
+
+
+def filter_fingerprint():
+    """Short hash of the filter rules and of what they read; cached verdicts are
+    void once it changes."""
+    rules = json.dumps([POS, NEG, CRITICISM, "clean_text", SUMMARY_CHARS, MARKUP_CHARS,
+                        ITEM_TEXT_CHARS])
+    return hashlib.sha256(rules.encode("utf-8")).hexdigest()[:16]
 
 # ---------- Deterministic domain classification (no LLM needed) ----------
 DOMAIN_KEYWORDS = {
@@ -121,12 +1007,13 @@ DOMAIN_KEYWORDS = {
         r"\b(debris|collision|re[- ]?entry|reentry|burn[- ]?up|deorbit\w*|demis\w*)\b",
         r"\b(emission\w*|soot|black carbon|aluminum oxide|aluminium oxide|alumina|al2o3)\b",
         r"\b(atmospher\w*|stratospher\w*|mesospher\w*|ozone|climate|pollut\w*)\b",
-        r"\b(noaa|esa|faa)\b.*\b(environment\w*|atmospher\w*|ozone)\b",
+        (r"\b(noaa|esa|faa)\b", r"\b(environment\w*|atmospher\w*|ozone)\b"),
     ],
     "Cybersecurity": [
         r"\b(vulnerab\w*|exploit\w*|cve|hack\w*|breach\w*|compromise\w*|malware|apt)\b",
         r"\b(cisa|mitre|advisory|nation[- ]state|sanction\w*)\b",
-        r"\b(jam\w*|spoof\w*|outage|degrad\w*|firmware|terminal\b.*\b(security|attack))\b",
+        r"\b(jam\w*|spoof\w*|outage|degrad\w*|firmware)\b",
+        (r"\bterminal\b", r"\b(security|attack)\b"),
     ],
     "Astronomical": [
         r"\b(astronom\w*|observator\w*|telescope\w*|iau|dark sky|dark and quiet)\b",
@@ -135,16 +1022,646 @@ DOMAIN_KEYWORDS = {
     ],
 }
 
-def classify_domain(title: str, summary: str, link: str = "") -> str:
-    """Score an item against each domain's keyword set and return the best match.
+PREFIX_LEN = 3      # characters of each keyword used to index it
+_ASCII = [chr(c) for c in range(128)]
+_CATEGORY_CHARS = {
+    "CATEGORY_DIGIT": "".join(c for c in _ASCII if re.match(r"\d", c)),
+    "CATEGORY_SPACE": "".join(c for c in _ASCII if re.match(r"\s", c)),
+    "CATEGORY_WORD": "".join(c for c in _ASCII if re.match(r"\w", c)),
+}
 
-    Ties break in the order Environmental > Cybersecurity > Astronomical
-    (the order of DOMAIN_KEYWORDS). Items with no domain signal return "".
+
+def _class_chars(items):
+    """ASCII characters a [...] class accepts, or None if it's too open to list."""
+    chars = set()
+    for op, av in items:
+        if op.name == "LITERAL":
+            chars.add(chr(av).lower())
+        elif op.name == "RANGE" and av[1] - av[0] < 64:
+            chars.update(chr(c).lower() for c in range(av[0], av[1] + 1))
+        elif op.name == "CATEGORY" and av.name in _CATEGORY_CHARS:
+            chars.update(_CATEGORY_CHARS[av.name])
+        else:
+            return None
+    return chars
+
+
+def _prefixes(seq, k):
+    """Every string of up to `k` characters a match of `seq` can start with.
+
+    Works on re's parse tree, so keyword stems come straight from the patterns
+    (no second list to keep in sync). Returns None when the pattern is too open
+    to index (a leading `.`, negated class, unbounded repeat...). A prefix
+    shorter than `k` means the match can be that short.
+    """
+    out = {""}
+    for op, av in seq:
+        if all(len(p) >= k for p in out):
+            break
+        name = op.name
+        if name == "AT":
+            continue
+        if name == "LITERAL":
+            choices = {chr(av).lower()}
+        elif name == "IN":
+            choices = _class_chars(av)
+        elif name == "SUBPATTERN":
+            choices = _prefixes(av[-1], k)
+        elif name == "BRANCH":
+            choices = set()
+            for branch in av[1]:
+                sub = _prefixes(branch, k)
+                if sub is None:
+                    return None
+                choices |= sub
+        elif name in ("MAX_REPEAT", "MIN_REPEAT") and av[1] == 1:
+            choices = _prefixes(av[2], k)
+            if choices is not None and av[0] == 0:
+                choices = choices | {""}
+        else:
+            return None
+        if choices is None:
+            return None
+        out = {(p + c)[:k] if len(p) < k else p for p in out for c in choices}
+        if len(out) > 4096:
+            return None
+    return out
+
+
+def _starts_at_boundary(seq):
+    return bool(seq) and seq[0][0].name == "AT" and seq[0][1].name == "AT_BOUNDARY"
+
+
+class DomainScorer:
+    """Every domain's keyword score from one pass over the text.
+
+    Each pattern is indexed under the first few characters it can match
+    (derived from the pattern itself). One scan finds the positions where any
+    indexed stem starts, and only the patterns filed under that stem are tried
+    there. Counts are the same as `len(re.findall(rx, text, re.I))` per
+    pattern: a pattern is only retried at or after the end of its previous
+    match, exactly as findall walks the text. A (first, then) pair is indexed
+    by `first` and settled, a line at a time, where `first` first matches on
+    that line. Non-ASCII text, where re.I folds characters lower() doesn't,
+    and patterns that can't be indexed use findall.
     """
-    t = " ".join([(title or ""), (summary or ""), (link or "")]).lower()
+
+    def __init__(self, keywords, k=PREFIX_LEN):
+        self.domains = list(keywords)
+        self.patterns = [(domain, compile_rule(rx))
+                         for domain, patterns in keywords.items() for rx in patterns]
+        self.pairs = {idx for idx, (_, rx) in enumerate(self.patterns)
+                      if isinstance(rx, FollowedBy)}
+        stems, self.unindexed, anchored = {}, [], True
+        for idx, (_, rx) in enumerate(self.patterns):
+            tree = list(_sre_parse.parse(rx.first.pattern if idx in self.pairs else rx.pattern))
+            found = _prefixes(tree, k)
+            if not found or "" in found or any(not p.isascii() for p in found):
+                self.unindexed.append(idx)
+                continue
+            stems[idx] = found
+            anchored = anchored and _starts_at_boundary(tree)
+        # One stem length for the whole table, so a lookup is a single slice.
+        self.k = min((len(p) for found in stems.values() for p in found), default=k)
+        self.by_prefix = {}
+        for idx, found in stems.items():
+            for p in {p[:self.k] for p in found}:
+                self.by_prefix.setdefault(p, []).append(idx)
+        alternation = "|".join(re.escape(p) for p in sorted(self.by_prefix))
+        self.candidates = (re.compile((r"\b" if anchored else "") + f"(?=(?:{alternation}))")
+                           if self.by_prefix else None)
+
+    def _findall_scores(self, text, indices, counts=None):
+        scores = dict.fromkeys(self.domains, 0)
+        for idx in indices:
+            domain, rx = self.patterns[idx]
+            found = len(rx.findall(text))
+            scores[domain] += found
+            if counts is not None:
+                counts[idx] += found
+        return scores
+
+    def scores(self, title, summary, link=""):
+        """{domain: matches} for every domain, in DOMAIN_KEYWORDS order."""
+        return self.scores_text(item_text(title, summary, link))
+
+    def scores_text(self, t, counts=None):
+        """scores() for an already-normalised item_text().
+
+        `counts`, a list with one slot per pattern, is incremented by each
+        pattern's matches.
+        """
+        if not t.isascii() or self.candidates is None:
+            return self._findall_scores(t, range(len(self.patterns)), counts)
+        scores = self._findall_scores(t, self.unindexed, counts)
+        ends = [0] * len(self.patterns)
+        k = self.k
+        for hit in self.candidates.finditer(t):
+            pos = hit.start()
+            for idx in self.by_prefix.get(t[pos:pos + k], ()):
+                if pos < ends[idx]:
+                    continue
+                if idx in self.pairs:
+                    pair = self.patterns[idx][1]
+                    m = pair.first.match(t, pos)
+                    if m:
+                        # The rest of the line is settled with this `first`.
+                        ends[idx] = pair.line_end(t, m) + 1
+                        if pair.followed(t, m):
+                            scores[self.patterns[idx][0]] += 1
+                            if counts is not None:
+                                counts[idx] += 1
+                    continue
+                m = self.patterns[idx][1].match(t, pos)
+                if m:
+                    scores[self.patterns[idx][0]] += 1
+                    ends[idx] = max(m.end(), pos + 1)
+                    if counts is not None:
+                        counts[idx] += 1
+        return scores
+
+
+def best_domain(scores):
+    """Highest-scoring domain, first in order on a tie; "" when nothing scored."""
     best_domain, best_score = "", 0
-    for domain, patterns in DOMAIN_KEYWORDS.items():
-        score = sum(len(re.findall(rx, t, re.I)) for rx in patterns)
+    for domain, score in scores.items():
         if score > best_score:
             best_domain, best_score = domain, score
     return best_domain
+
+
+SCORER = DomainScorer(DOMAIN_KEYWORDS)
+
+
+def domain_scores(title: str, summary: str, link: str = "") -> dict:
+    """Keyword score per domain, in DOMAIN_KEYWORDS order."""
+    return SCORER.scores(title, summary, link)
+
+
+def classify_domain(title: str, summary: str, link: str = "") -> str:
+    """Score an item against each domain's keyword set and return the best match.
+
+    Ties break in the order Environmental > Cybersecurity > Astronomical
+    (the order of DOMAIN_KEYWORDS). Items with no domain signal return "".
+    """
+    return best_domain(domain_scores(title, summary, link))
+
+
+# ---------- Near-duplicate stories ----------
+# Exact title/link dedupe misses syndicated rewrites of the same story. Each
+# story is reduced to the set of words in its title and summary, and two
+# stories are the same when those sets overlap (Jaccard similarity) at least
+# `threshold`. A MinHash signature estimates that overlap, and banding it
+# (LSH) means a lookup only compares stories that share a band, not the whole
+# window. Headlines are too short for SimHash to separate a rewrite (10+ of 64
+# bits apart) from an unrelated story without banding so narrow that
+# everything collides.
+MINHASH_PERMUTATIONS = 64
+NEAR_DUP_SIMILARITY = 0.5
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(_MERSENNE))
+                 for _ in range(MINHASH_PERMUTATIONS)]
+RX_WORD = re.compile(r"[a-z0-9]{3,}")
+
+
+def story_words(title, summary):
+    """Distinct words (3+ characters) of the title and the tag-stripped summary."""
+    return set(RX_WORD.findall(f"{title or ''} {RX_TAG.sub(' ', summary or '')}".lower()))
+
+
+def minhash(words):
+    """MINHASH_PERMUTATIONS 32-bit minimums over a word set."""
+    if not words:
+        return [0] * MINHASH_PERMUTATIONS
+    hashes = [int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "big")
+              for w in words]
+    return [min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFFFFFF
+            for a, b in _PERMUTATIONS]
+
+
+def lsh_shape(threshold, permutations=MINHASH_PERMUTATIONS):
+    """(bands, rows) whose LSH cut-off, (1/bands)**(1/rows), is nearest `threshold`."""
+    shapes = [(permutations // r, r) for r in range(1, permutations + 1) if permutations % r == 0]
+    return min(shapes, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of recently kept stories, persisted across runs.
+
+    Entries unseen for `window_days` (the feed window) are dropped on save.
+    Each entry remembers which other sources' rewrites were collapsed into it.
+    """
+
+    def __init__(self, path, threshold=NEAR_DUP_SIMILARITY, window_days=30):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.window = window_days * 86400
+        self.bands, self.rows = lsh_shape(threshold)
+        self.entries = None
+        self.tables = [{} for _ in range(self.bands)]
+        self.added = set()
+
+    def _band_keys(self, signature):
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def _load(self):
+        if self.entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            self.entries = {}
+            for key, entry in data.get("entries", {}).items():
+                self._index(key, entry)
+        return self.entries
+
+    def _index(self, key, entry):
+        self.entries[key] = entry
+        for table, band in zip(self.tables, self._band_keys(self._signature(entry))):
+            table.setdefault(band, []).append(key)
+
+    @staticmethod
+    def _signature(entry):
+        sig = entry["minhash"]
+        return [int(sig[i:i + 8], 16) for i in range(0, len(sig), 8)]
+
+    def find(self, signature, key):
+        """Key of the most similar indexed story (other than `key`), or None."""
+        self._load()
+        best, best_similarity = None, self.threshold
+        seen = {key}
+        for table, band in zip(self.tables, self._band_keys(signature)):
+            for other in table.get(band, ()):
+                if other in seen or other not in self.entries:
+                    continue
+                seen.add(other)
+                theirs = self._signature(self.entries[other])
+                similarity = sum(a == b for a, b in zip(signature, theirs)) / len(signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = other, similarity
+        return best
+
+    def get(self, key):
+        return self._load().get(key)
+
+    def add(self, key, signature, source):
+        entries = self._load()
+        if key in entries:
+            entries[key]["last_seen"] = int(time.time())
+            return entries[key]
+        entry = {"minhash": "".join(f"{v:08x}" for v in signature), "source": source,
+                 "last_seen": int(time.time()), "also_reported_by": []}
+        self._index(key, entry)
+        self.added.add(key)
+        return entry
+
+    def keep_added(self, keys):
+        """Forget the stories added since loading whose key isn't in `keys`:
+        they were compared against this run but never published."""
+        keys = set(keys)
+        for key in self.added - keys:
+            self._load().pop(key, None)
+        self.added &= keys
+
+    def note_duplicate(self, key, source, link):
+        """Record that `source` ran a rewrite of the story at `key`."""
+        entry = self._load()[key]
+        entry["last_seen"] = int(time.time())
+        if not any(r["link"] == link for r in entry["also_reported_by"]):
+            entry["also_reported_by"].append({"source": source, "link": link})
+
+    def save(self):
+        cutoff = time.time() - self.window
+        keep = {k: e for k, e in self._load().items() if e["last_seen"] >= cutoff}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"threshold": self.threshold, "entries": keep},
+                                  indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# ---------- Batch classification ----------
+# The digest filters and scores every new entry of every feed in one call. Above
+# BATCH_POOL_THRESHOLD entries (a backfill, a benchmark) the batch is split
+# across worker processes; a normal run is a few hundred entries, where a pool
+# would cost more to start than it saves.
+BATCH_POOL_THRESHOLD = 20_000
+BATCH_CHUNK = 2_000
+
+
+def rules_fingerprint():
+    """Short hash of every rule list a cached classification depends on."""
+    rules = json.dumps([POS, NEG, CRITICISM, DOMAIN_KEYWORDS], sort_keys=True)
+    return hashlib.sha256(rules.encode("utf-8")).hexdigest()[:16]
+
+
+class ClassificationCache:
+    """Filter verdict and domain scores per distinct item text, kept across runs.
+
+    An entry stays in the 30-day window for about sixty runs, so most of a
+    run's texts were classified before. Entries are keyed by a hash of the
+    headline and item_text() (the off-topic check reads the headline alone, so
+    the same joined text can get a different verdict under a different
+    headline) and the file by rules_fingerprint(), so editing any rule list
+    empties it. Bounded two ways: least recently used beyond `cap` entries,
+    and anything unused for `max_age_days`. `stats` counts this run's hits and
+    misses and times the misses, to estimate what the hits saved.
+
+    The file also keeps a running tally of rule hits over every text classified
+    since it was last emptied (see RuleStats), so a rule that only fires on
+    cached texts isn't taken for dead. It shares the entries' fingerprint and
+    lifetime: whatever the cache answers was counted when it was put.
+    """
+
+    def __init__(self, path, cap=20_000, max_age_days=45):
+        self.path = Path(path)
+        self.cap = cap
+        self.max_age = max_age_days * 86400
+        self.stats = {"hits": 0, "misses": 0, "miss_seconds": 0.0}
+        self._entries = None
+        self._tally = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, title=""):
+        return hashlib.sha1(f"{title}\0{text}".encode("utf-8")).hexdigest()[:20]
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            fresh = data.get("rules") == rules_fingerprint()
+            self._entries = dict(data.get("entries", {})) if fresh else {}
+            self._tally = (data.get("tally") if fresh else None) or {
+                "since": time.strftime("%Y-%m-%d", time.gmtime()), "evaluated": 0, "hits": {}}
+        return self._entries
+
+    def get(self, key):
+        """(is_critical, scores) for a cached text, else None; marks it recently used."""
+        with self._lock:
+            entries = self._load()
+            hit = entries.pop(key, None)
+            if hit is None:
+                return None
+            hit[2] = int(time.time())
+            entries[key] = hit      # re-insert: dict order is the LRU order
+            return hit[0], hit[1]
+
+    def put(self, key, critical, scores):
+        with self._lock:
+            entries = self._load()
+            entries.pop(key, None)
+            entries[key] = [critical, scores, int(time.time())]
+
+    def record(self, hits, misses, miss_seconds):
+        with self._lock:
+            self.stats["hits"] += hits
+            self.stats["misses"] += misses
+            self.stats["miss_seconds"] += miss_seconds
+
+    def tally(self, evaluated, hits):
+        """Add texts classified and {rule: hits} to the running tally; returns it."""
+        with self._lock:
+            self._load()
+            self._tally["evaluated"] += evaluated
+            for rule, n in hits.items():
+                self._tally["hits"][rule] = self._tally["hits"].get(rule, 0) + n
+            return {"since": self._tally["since"], "evaluated": self._tally["evaluated"],
+                    "hits": dict(self._tally["hits"])}
+
+    def save(self):
+        with self._lock:
+            entries = self._load()
+            cutoff = time.time() - self.max_age
+            kept = [(k, v) for k, v in entries.items() if v[2] >= cutoff][-self.cap:]
+            self._entries = dict(kept)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"rules": rules_fingerprint(), "tally": self._tally,
+                                       "entries": self._entries}, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def summary(self):
+        """This run's hit rate and the classifier time the hits are estimated to have saved."""
+        hits, misses = self.stats["hits"], self.stats["misses"]
+        per_miss = self.stats["miss_seconds"] / misses if misses else 0.0
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "seconds_classifying": round(self.stats["miss_seconds"], 4),
+            "seconds_saved_estimate": round(hits * per_miss, 4),
+            "entries": len(self._entries or {}),
+        }
+
+
+CLASSIFY_CACHE = ClassificationCache(CACHE_DIR / "classify.json")
+
+
+# ---------- Rule instrumentation ----------
+# Which rule decided each entry, and what each rule costs. Hit counts come from
+# the classification itself (an alternation's lastgroup names the pattern that
+# fired), so they are exact and cost a dict lookup. A combined scan can't say
+# what each pattern cost, so the first text and every RULE_SAMPLE_EVERY-th one
+# after it are also run through each pattern on its own, timed. Timing every
+# pattern is ~50x the cost of classifying a text; at this rate the counters and
+# samples together add well under a tenth to a batch.
+RULE_SAMPLE_EVERY = 250
+
+
+class RuleStats:
+    """Per-pattern hit counts and sampled cost for the filter and the domain scorer.
+
+    Only texts actually classified are counted; cache hits and entries the
+    watermarks skip never reach the rules. With a cache, classify_batch adds
+    the run's counts to the cache's running tally and leaves the result in
+    `totals`, which is what a rule's hits should be judged by: a rule that
+    only matches stories already seen scores nothing this run.
+    """
+
+    REJECTIONS = ("no_starlink", "off_topic_headline", "no_criticism")
+
+    def __init__(self, sample_every=RULE_SAMPLE_EVERY):
+        self.sample_every = sample_every
+        # (label, pattern, what it reads); MATCHER's group names index the first part.
+        self.rules, self.groups = [], {}
+        for label, group, patterns, reads in (("POS", "pos", POS, "text"),
+                                              ("NEG", "neg", NEG, "headline"),
+                                              ("CRITICISM", "crit", CRITICISM, "text")):
+            for i, rx in enumerate(patterns):
+                self.groups[f"{group}{i}"] = len(self.rules)
+                self.rules.append((f"{label}[{i}]", rx, reads))
+        numbered = {}
+        for domain, _ in SCORER.patterns:
+            numbered[domain] = numbered.get(domain, -1) + 1
+            self.rules.append((f"{domain}[{numbered[domain]}]", None, "domain"))
+        self.domain_offset = len(self.groups)
+        self.compiled = [compile_rule(rx) if rx else SCORER.patterns[n - self.domain_offset][1]
+                         for n, (_, rx, _) in enumerate(self.rules)]
+        self.reset()
+
+    def reset(self):
+        n = len(self.rules)
+        self.hits, self.sample_seconds = [0] * n, [0.0] * n
+        self.evaluated = self.samples = 0
+        self.rejected = dict.fromkeys(self.REJECTIONS, 0)
+        self.seconds = {"filter": 0.0, "domain": 0.0}
+        self.totals = None
+
+    def classify(self, text, title):
+        """_classify_chunk's verdict for one text, counted and timed."""
+        self.evaluated += 1
+        if self.sample_every and self.evaluated % self.sample_every == 1 % self.sample_every:
+            self._sample(text, title)
+        started = time.perf_counter()
+        critical, groups = MATCHER.decide(text, title)
+        filtered = time.perf_counter()
+        self.seconds["filter"] += filtered - started
+        for group in groups:
+            self.hits[self.groups[group]] += 1
+        if not critical:
+            if not groups:
+                self.rejected["no_starlink"] += 1
+            elif len(groups) == 2:
+                self.rejected["off_topic_headline"] += 1
+            else:
+                self.rejected["no_criticism"] += 1
+            return False, None
+        counts = [0] * (len(self.rules) - self.domain_offset)
+        scores = SCORER.scores_text(text, counts)
+        self.seconds["domain"] += time.perf_counter() - filtered
+        for i, count in enumerate(counts):
+            self.hits[self.domain_offset + i] += count
+        return True, scores
+
+    def _sample(self, text, title):
+        head = (title or "").lower()
+        self.samples += 1
+        for n, (_, _, reads) in enumerate(self.rules):
+            rx = self.compiled[n]
+            started = time.perf_counter()
+            if reads == "domain":
+                rx.findall(text)
+            else:
+                rx.search(head if reads == "headline" else text)
+            self.sample_seconds[n] += time.perf_counter() - started
+
+    def state(self):
+        return {"hits": self.hits, "sample_seconds": self.sample_seconds,
+                "evaluated": self.evaluated, "samples": self.samples,
+                "rejected": self.rejected, "seconds": self.seconds}
+
+    def merge(self, state):
+        """Add another RuleStats' state() (a worker process's) to this one."""
+        self.hits = [a + b for a, b in zip(self.hits, state["hits"])]
+        self.sample_seconds = [a + b for a, b in zip(self.sample_seconds, state["sample_seconds"])]
+        self.evaluated += state["evaluated"]
+        self.samples += state["samples"]
+        for key in self.rejected:
+            self.rejected[key] += state["rejected"][key]
+        for key in self.seconds:
+            self.seconds[key] += state["seconds"][key]
+
+    def summary(self):
+        """Counts and costs for feed_health.json, most-hit patterns first."""
+        patterns = []
+        for n, (rule, _, reads) in enumerate(self.rules):
+            cost = self.sample_seconds[n] / self.samples * 1e6 if self.samples else None
+            patterns.append({"rule": rule, "pattern": self.compiled[n].pattern, "reads": reads,
+                             "hits": self.hits[n],
+                             "us_per_text": None if cost is None else round(cost, 2)})
+            if self.totals:
+                patterns[-1]["total_hits"] = self.totals["hits"].get(rule, 0)
+        patterns.sort(key=lambda p: -p["hits"])
+        summary = {
+            "evaluated": self.evaluated,
+            "rejected": dict(self.rejected),
+            "seconds": {k: round(v, 4) for k, v in self.seconds.items()},
+            "sampled_texts": self.samples,
+            "patterns": patterns,
+        }
+        if self.totals:
+            summary["totals"] = {"since": self.totals["since"],
+                                 "evaluated": self.totals["evaluated"]}
+        return summary
+
+
+RULE_STATS = RuleStats()
+
+
+def _classify_chunk(entries, stats=None):
+    """Verdicts for (text, title) pairs; text is item_text() already."""
+    if stats is not None:
+        return [stats.classify(text, title) for text, title in entries]
+    out = []
+    for text, title in entries:
+        if MATCHER.critical_text(text, title):
+            out.append((True, SCORER.scores_text(text)))
+        else:
+            out.append((False, None))
+    return out
+
+
+def _classify_chunk_counted(entries):
+    """_classify_chunk in a worker process, returning its RuleStats state too."""
+    stats = RuleStats()
+    return _classify_chunk(entries, stats), stats.state()
+
+
+def _classify_texts(pairs, workers, threshold, stats=None):
+    if len(pairs) < threshold or workers == 1:
+        return _classify_chunk(pairs, stats)
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    chunks = [pairs[i:i + BATCH_CHUNK] for i in range(0, len(pairs), BATCH_CHUNK)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if stats is None:
+                return [verdict for part in pool.map(_classify_chunk, chunks) for verdict in part]
+            out = []
+            for part, state in pool.map(_classify_chunk_counted, chunks):
+                out.extend(part)
+                stats.merge(state)
+            return out
+    except (OSError, BrokenProcessPool) as err:
+        # No usable process pool here (sandbox, no /dev/shm): same answer, one core.
+        print(f"Process pool unavailable ({err}); classifying in-process.", file=sys.stderr)
+        return _classify_chunk(pairs, stats)
+
+
+def classify_batch(entries, workers=None, threshold=BATCH_POOL_THRESHOLD, cache=None,
+                   stats=None, persist=True):
+    """Filter and score (title, summary, link) tuples, each exactly once.
+
+    Returns one (is_critical, domain_scores) pair per entry, in order. Scores
+    are only computed for entries that pass the filter; rejected entries get
+    None, since nothing downstream reads them. With a ClassificationCache,
+    texts classified on an earlier run are answered from it, and the cache is
+    saved afterwards unless `persist` is false. With a RuleStats, every text classified is counted in it,
+    and with both, the counts are added to the cache's tally too.
+    """
+    pairs = [(item_text(title, summary, link), title or "") for title, summary, link in entries]
+    if cache is None:
+        return _classify_texts(pairs, workers, threshold, stats)
+
+    keys = [cache.key(text, title) for text, title in pairs]
+    verdicts = [cache.get(key) for key in keys]
+    missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+    before = (stats.evaluated, list(stats.hits)) if stats is not None else None
+    started = time.perf_counter()
+    for i, verdict in zip(missing, _classify_texts([pairs[i] for i in missing],
+                                                   workers, threshold, stats)):
+        verdicts[i] = verdict
+        cache.put(keys[i], *verdict)
+    cache.record(len(pairs) - len(missing), len(missing), time.perf_counter() - started)
+    if stats is not None:
+        stats.totals = cache.tally(
+            stats.evaluated - before[0],
+            {rule: stats.hits[n] - before[1][n] for n, (rule, _, _) in enumerate(stats.rules)
+             if stats.hits[n] > before[1][n]})
+    if pairs and persist:
+        cache.save()
+    return [tuple(verdict) for verdict in verdicts]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Starlink Watch pipeline runner: every stage in one process.
+
+The scheduled job used to start one interpreter per script, each re-importing
+requests/yaml/bs4, re-reading the config and opening its own connections. This
+runs the same stages as a small DAG inside a single process instead, sharing
+the pooled session, HTTP cache, circuit breaker and parsed config, and running
+stages that don't depend on each other at the same time — the SATCAT pass and
+the feed pass are both mostly waiting on the network.
+
+    python scripts/starlink_watch.py run --force
+    python scripts/starlink_watch.py run --stages metrics,totals,digest
+
+The per-stage scripts still work on their own and remain the stage bodies; this
+only decides what runs when. Stage modules are imported when first needed, so
+`--stages site` needs nothing beyond the standard library.
+"""
+import argparse, sys, threading, time, traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+
+def run_metrics(args):
+    import compute_starlink_metrics
+    return compute_starlink_metrics.main(["--force-recompute"] if args.force_recompute else [])
+
+
+def run_totals(args):
+    import compute_space_totals
+    return compute_space_totals.main(["--force-recompute"] if args.force_recompute else [])
+
+
+def run_digest(args):
+    import starlink_daily_digest
+    return starlink_daily_digest.main(["--force"] if args.force else [])
+
+
+def run_site(args):
+    import build_site
+    build_site.build()
+    return 0
+
+
+# name -> (stages it reads the output of, body). Metrics, totals and the digest
+# write disjoint files; the site reads all three.
+STAGES = {
+    "metrics": ((), run_metrics),
+    "totals": ((), run_totals),
+    "digest": ((), run_digest),
+    "site": (("metrics", "totals", "digest"), run_site),
+}
+
+
+def run_dag(stages, selected, args, workers=None):
+    """Run `selected` stages as soon as their dependencies finish.
+
+    Dependencies outside `selected` count as satisfied (their last output is
+    on disk). A stage whose dependency failed is skipped rather than run on
+    half-updated inputs. Returns {name: {"status", "seconds", "exit_code"}}.
+    """
+    pending = {name: [d for d in stages[name][0] if d in selected] for name in selected}
+    results = {}
+    print_lock = threading.Lock()
+
+    def timed(name):
+        started = time.perf_counter()
+        try:
+            code = stages[name][1](args) or 0
+        except SystemExit as exc:
+            # A stage main calling sys.exit() (or argparse erroring) ends the
+            # stage, not the worker thread; its code is the stage's, as from
+            # the command line: None is 0, a message is printed and means 1.
+            code = exc.code
+            if not isinstance(code, int):
+                if code is not None:
+                    with print_lock:
+                        print(f"[{name}] {code}", file=sys.stderr)
+                code = 0 if code is None else 1
+        except Exception:
+            with print_lock:
+                print(f"[{name}] crashed:", file=sys.stderr)
+                traceback.print_exc()
+            code = 1
+        return code, round(time.perf_counter() - started, 3)
+
+    with ThreadPoolExecutor(max_workers=workers or len(selected) or 1) as pool:
+        running = {}
+        while pending or running:
+            for name in [n for n, deps in pending.items()
+                         if all(d in results for d in deps)]:
+                deps = pending.pop(name)
+                failed = [d for d in deps if results[d]["status"] != "ok"]
+                if failed:
+                    results[name] = {"status": "skipped", "seconds": 0.0, "exit_code": None}
+                    with print_lock:
+                        print(f"[{name}] skipped: {', '.join(failed)} did not finish",
+                              file=sys.stderr)
+                    continue
+                running[pool.submit(timed, name)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                code, seconds = future.result()
+                results[name] = {"status": "ok" if code == 0 else "failed",
+                                 "seconds": seconds, "exit_code": code}
+    return {name: results[name] for name in selected}
+
+
+def cmd_run(args):
+    selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in selected if s not in STAGES]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    results = run_dag(STAGES, selected, args, workers=args.workers)
+    print(f"Pipeline finished in {time.perf_counter() - started:.1f}s:")
+    for name, result in results.items():
+        print(f"  {name:8s} {result['status']:8s} {result['seconds']:7.1f}s")
+    return 0 if all(r["status"] == "ok" for r in results.values()) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run the pipeline stages")
+    run.add_argument("--stages", default=",".join(STAGES),
+                     help=f"Comma-separated subset of {', '.join(STAGES)}")
+    run.add_argument("--force", action="store_true",
+                     help="Emit the digest regardless of the PT window")
+    run.add_argument("--force-recompute", action="store_true",
+                     help="Rewrite metrics and totals even when their inputs are unchanged")
+    run.add_argument("--workers", type=int, default=None,
+                     help="Stages run at once (default: all that are ready)")
+    args = parser.parse_args([] if argv is None else argv)
+    return cmd_run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
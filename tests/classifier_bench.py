@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Throughput of the classifier functions the digest runs on every entry.
+
+Builds a deterministic corpus of synthetic headlines and summaries from the
+archive's own vocabulary, times looks_starlink_critical, classify_domain,
+title_key and dedupe_items over it, and writes items/second to JSON.
+
+    python tests/classifier_bench.py --size 100000 --out classifier_bench.json
+    python tests/classifier_bench.py --write-baseline     # after a deliberate change
+
+Raw items/second depend on the machine, so each run also times a fixed
+calibration workload and reports throughput relative to it; that ratio is
+what test_classifier_bench compares against the committed baseline. The
+baseline keeps the vocabulary it was measured with, so the corpus doesn't
+drift as the archive grows; --write-baseline re-reads the archive.
+"""
+import argparse, hashlib, json, random, re, sys, time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO / "scripts"))
+
+import starlink_daily_digest as digest
+from starlink_utils import classify_domain, looks_starlink_critical
+
+ARCHIVE = REPO / "Starlink Watch" / "Archive"
+BASELINE_FILE = Path(__file__).resolve().parent / "classifier_baseline.json"
+DEFAULT_SIZE = 10_000
+REPEATS = 5
+SUBJECTS = ("Starlink", "SpaceX", "Starshield", "Kuiper", "OneWeb", "Starship", "Falcon 9")
+PUBLISHERS = ("Reuters", "SpaceNews", "Ars Technica", "The Verge", "Space.com")
+RX_WORD = re.compile(r"[A-Za-z][A-Za-z0-9'-]{2,}")
+RX_HEADLINE = re.compile(r"\*\*(.+?)\*\*(.*)")
+
+
+def archive_vocabulary(archive=ARCHIVE):
+    """Distinct words of every archived headline and its note, sorted."""
+    words = set()
+    for path in sorted(archive.rglob("*.md")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            m = RX_HEADLINE.search(line)
+            if m:
+                text = re.sub(r"https?://\S+|<!--.*?-->", " ", m.group(1) + m.group(2))
+                words.update(w.lower() for w in RX_WORD.findall(text))
+    return sorted(words)
+
+
+def build_corpus(n, vocabulary, seed=20):
+    """`n` feed-item dicts. About half name a subject in the headline and one
+    in ten repeats an earlier headline with a publisher suffix, as Google News
+    does, so dedupe_items has something to drop."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        if items and rng.random() < 0.1:
+            title = f"{rng.choice(items)['title']} - {rng.choice(PUBLISHERS)}"
+        else:
+            words = rng.sample(vocabulary, rng.randint(5, 11))
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(SUBJECTS))
+            title = " ".join(words).capitalize()
+        summary = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(15, 45)))
+        items.append({"title": title, "summary": summary, "source": "bench",
+                      "link": f"https://bench.invalid/{i}", "date": f"{i:08d}"})
+    return items
+
+
+def calibrate(rounds=5_000):
+    """Calls/second of a fixed regex-and-string workload: the machine's speed."""
+    rx = re.compile(r"\b(alpha|beta\w*|gamma)\b")
+    text = "the alpha and the betamax met gamma rays over delta " * 4
+    started = time.perf_counter()
+    for i in range(rounds):
+        rx.findall(text)
+        " ".join(sorted(text.split()[: (i % 16) + 4])).lower()
+    return rounds / (time.perf_counter() - started)
+
+
+def _measure(fn, size, repeats=REPEATS):
+    """(best items/second, best calibration/second), taken alternately so a
+    change in machine load hits both."""
+    rate = machine = 0.0
+    for _ in range(repeats):
+        machine = max(machine, calibrate())
+        started = time.perf_counter()
+        fn()
+        rate = max(rate, size / (time.perf_counter() - started))
+    return rate, machine
+
+
+def run(size=DEFAULT_SIZE, vocabulary=None, repeats=REPEATS):
+    """{"items", "corpus", "calibration", "per_sec", "relative"} for one run."""
+    vocabulary = vocabulary or archive_vocabulary()
+    items = build_corpus(size, vocabulary)
+    triples = [(i["title"], i["summary"], i["link"]) for i in items]
+    benches = {
+        "looks_starlink_critical": lambda: [looks_starlink_critical(*t) for t in triples],
+        "classify_domain": lambda: [classify_domain(*t) for t in triples],
+        "title_key": lambda: [digest.title_key(i["title"]) for i in items],
+        "dedupe_items": lambda: digest.dedupe_items(items),
+    }
+    measured = {name: _measure(fn, size, repeats) for name, fn in benches.items()}
+    corpus = hashlib.sha1(json.dumps(items[:100]).encode("utf-8")).hexdigest()[:12]
+    return {
+        "items": size,
+        "corpus": corpus,
+        "calibration": round(max(machine for _, machine in measured.values())),
+        "per_sec": {name: round(rate) for name, (rate, _) in measured.items()},
+        "relative": {name: round(rate / machine, 4) for name, (rate, machine) in measured.items()},
+    }
+
+
+def load_baseline(path=BASELINE_FILE):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def regressions(result, baseline, tolerance):
+    """Functions whose relative throughput fell more than `tolerance` below baseline."""
+    out = {}
+    for name, expected in baseline["relative"].items():
+        actual = result["relative"].get(name)
+        if actual is not None and actual < expected * (1 - tolerance):
+            out[name] = {"baseline": expected, "now": actual,
+                         "change": round(actual / expected - 1, 3)}
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help="Synthetic items (10k for a quick check, up to 1M)")
+    parser.add_argument("--out", type=Path, help="Write the result JSON here")
+    parser.add_argument("--write-baseline", action="store_true",
+                        help=f"Re-read the archive vocabulary and overwrite {BASELINE_FILE.name}")
+    args = parser.parse_args(argv)
+
+    if args.write_baseline:
+        vocabulary = archive_vocabulary()
+    else:
+        vocabulary = load_baseline()["vocabulary"] if BASELINE_FILE.exists() else None
+    result = run(args.size, vocabulary)
+    for name, rate in result["per_sec"].items():
+        print(f"{name:24s} {rate:>12,} items/s  ({result['relative'][name]:.4f} x calibration)")
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.write_baseline:
+        BASELINE_FILE.write_text(json.dumps(dict(result, vocabulary=vocabulary), indent=1),
+                                 encoding="utf-8")
+        print(f"Baseline written to {BASELINE_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import archive_store
+import build_site
+
+
+class TestArchiveStore(unittest.TestCase):
+    line = ("- 2026-08-01 | **Starlink debris study** — SpaceNews https://s.example/1"
+            " <!-- scores: Environmental 2, Cybersecurity 0, Astronomical 0 -->")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        (self.dir / "Environmental").mkdir()
+        self.old_shard = self.dir / "Environmental" / "2023-10.md"
+        self.old_shard.write_text("# Environmental — 2023-10\n\n- 2023-10 | **Old entry** — x\n",
+                                  encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self):
+        return archive_store.ArchiveStore(self.dir, self.dir / "index.json")
+
+    def manifest(self):
+        return json.loads((self.dir / "manifest.json").read_text(encoding="utf-8"))
+
+    def test_entries_go_to_their_month_once(self):
+        store = self.store()
+        self.assertEqual(store.append("Environmental", [self.line, "No change"]), [self.line])
+        store.save()
+        again = self.store()
+        # Same story with different scores is still the same entry.
+        self.assertEqual(again.append("Environmental", [self.line.split(" <!--")[0]]), [])
+        self.assertEqual(again.rebuilt, [])
+        shard = self.dir / "Environmental" / "2026-08.md"
+        self.assertEqual(shard.read_text(encoding="utf-8").splitlines()[-1], self.line)
+
+        shards = self.manifest()["domains"]["Environmental"]["shards"]
+        self.assertEqual(list(shards), ["2023-10", "2026-08"])
+        self.assertEqual(shards["2026-08"]["entries"], 1)
+        note = (self.dir / "Environmental.md").read_text(encoding="utf-8")
+        self.assertIn("- [[Environmental/2026-08|2026-08]] — 1 entry", note)
+
+    def test_appending_reads_only_the_shard_it_wrote(self):
+        store = self.store()
+        store.append("Environmental", [self.line])
+        store.save()
+        reads, read_bytes, read_text = [], Path.read_bytes, Path.read_text
+
+        def spy(real):
+            def read(path, *args, **kwargs):
+                reads.append(path.name)
+                return real(path, *args, **kwargs)
+            return read
+
+        with mock.patch.object(Path, "read_text", spy(read_text)), \
+             mock.patch.object(Path, "read_bytes", spy(read_bytes)):
+            again = self.store()
+            again.append("Environmental", ["- 2026-08-02 | **Another** — A https://a/2"])
+            again.save()
+        self.assertEqual(reads, ["index.json", "manifest.json", "2026-08.md"])
+
+    def test_hand_edits_rebuild_the_shard_and_its_manifest_entry(self):
+        store = self.store()
+        store.append("Environmental", [self.line])
+        store.save()
+        with self.old_shard.open("a", encoding="utf-8") as f:
+            f.write("- 2023-10-03 | **Added by hand** — B https://b/3\n")
+        again = self.store()
+        self.assertEqual(again.append("Environmental",
+                                      ["- 2023-10-03 | **Added by hand** — B https://b/3"]), [])
+        self.assertEqual(again.rebuilt, ["Environmental/2023-10"])
+        again.save()
+        self.assertEqual(self.manifest()["domains"]["Environmental"]["shards"]["2023-10"]["entries"], 2)
+
+    def test_migration_splits_a_flat_archive(self):
+        flat = self.dir / "Astronomical.md"
+        flat.write_text("# Astronomical — Archive\n\n*Streaks and RFI.*\n\n"
+                        "- Ongoing | **Decay list** — CelesTrak https://c/1\n"
+                        "- 2022-01 | **Survey impact** — AAS https://a/1\n"
+                        "- No new items.\n"
+                        "- 2026-08-02 | **Train sighting** — X https://x/1\n",
+                        encoding="utf-8")
+        store = self.store()
+        self.assertEqual(store.migrate(["Astronomical", "Environmental"]), ["Astronomical"])
+        store.save()
+        info = self.manifest()["domains"]["Astronomical"]
+        self.assertEqual(info["description"], "Streaks and RFI.")
+        self.assertEqual({s: m["entries"] for s, m in info["shards"].items()},
+                         {"undated": 1, "2022-01": 1, "2026-08": 1})
+        self.assertNotIn("**", flat.read_text(encoding="utf-8"))
+        self.assertEqual(self.store().migrate(["Astronomical"]), [])
+
+    def test_site_lists_undated_then_months_oldest_first(self):
+        store = self.store()
+        store.append("Environmental", [self.line, "- Ongoing | **Decay list** — C https://c/1",
+                                       "- 2022-01 | **Survey impact** — AAS https://a/1"])
+        store.save()
+        with mock.patch.object(build_site, "ARCH", self.dir):
+            archives = build_site.load_archives()
+        self.assertEqual([e["title"] for e in archives[0]["entries"]],
+                         ["Decay list", "Survey impact", "Old entry", "Starlink debris study"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import benchmark
+
+
+class TestSyntheticBenchmark(unittest.TestCase):
+    def test_every_stage_runs_offline_and_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "bench.json"
+            code = benchmark.main(["--synthetic", "--satcat-scale", "0.01", "--feeds", "2",
+                                   "--entries", "5", "--out", str(out)])
+            report = json.loads(out.read_text(encoding="utf-8"))
+        self.assertEqual(code, 0)
+        self.assertEqual(list(report["stages"]), list(benchmark.DEFAULT_STAGES))
+        for stage in report["stages"].values():
+            self.assertEqual(stage["exit_code"], 0)
+            self.assertGreater(stage["seconds"], 0)
+
+
+class TestFilterBenchmark(unittest.TestCase):
+    def test_new_implementations_agree_with_the_old_ones(self):
+        result = benchmark.bench_filter(2000)
+        self.assertTrue(result["identical"])
+        self.assertGreater(result["accepted"], 0)
+        self.assertTrue(result["classify"]["identical"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import json
 import sys
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
@@ -102,5 +104,70 @@ class TestComparisonSection(unittest.TestCase):
                       build_site.render_stacked_bars([], build_site.COMPARISON_CHARTS[0]))
 
 
+class TestFeedHealthSection(unittest.TestCase):
+    def test_open_circuit_is_labelled_as_such(self):
+        health = {"feeds_ok": 0, "feeds_configured": 1, "feeds": [
+            {"name": "Dead feed", "status": "circuit_open", "entries": 0, "recent": 0,
+             "matched": 0, "detail": "3 consecutive failures"}]}
+        html = build_site.render_feed_health(health)
+        self.assertIn(">circuit open<", html)
+        self.assertNotIn("unreachable", html)
+
+    def test_rule_table_lists_the_top_patterns_and_dead_ones(self):
+        rules = {"evaluated": 40, "sampled_texts": 1,
+                 "rejected": {"no_starlink": 30, "off_topic_headline": 2, "no_criticism": 5},
+                 "patterns": [{"rule": "POS[0]", "pattern": r"\bstarlink\b", "hits": 10,
+                               "us_per_text": 1.25},
+                              {"rule": "NEG[3]", "pattern": r"\boneweb\b", "hits": 0,
+                               "us_per_text": None}]}
+        html = build_site.render_feed_health({"feeds": [
+            {"name": "A", "status": "ok", "entries": 40, "recent": 40, "matched": 3}],
+            "rules": rules})
+        self.assertIn("<td>POS[0]</td>", html)
+        self.assertIn("1.2 µs", html)
+        # Without running totals, a rule idle this run isn't called dead.
+        self.assertNotIn("No hits", html)
+
+        rules["totals"] = {"since": "2026-09-01", "evaluated": 900}
+        rules["patterns"][0]["total_hits"] = 250
+        rules["patterns"][1]["total_hits"] = 0
+        html = build_site.render_rule_stats(rules)
+        self.assertIn("<th>Since 2026-09-01</th>", html)
+        self.assertIn("No hits in the 900 entries classified since 2026-09-01: NEG[3].", html)
+        rules["patterns"][1]["total_hits"] = 4
+        self.assertNotIn("No hits", build_site.render_rule_stats(rules))
+
+
+class TestArchiveParsing(unittest.TestCase):
+    def test_score_comment_is_not_part_of_the_entry(self):
+        line = ("- 2026-08-01 | **Starlink debris study** — SpaceNews https://s.example/1"
+                " <!-- scores: Environmental 2, Cybersecurity 0, Astronomical 0 -->\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "Environmental.md"
+            path.write_text("# Environmental — Archive\n" + line, encoding="utf-8")
+            entry = build_site.parse_archive_file("Environmental", path)["entries"][0]
+        self.assertEqual(entry["title"], "Starlink debris study")
+        self.assertEqual(entry["primary_url"], "https://s.example/1")
+        self.assertEqual(entry["rest"], "SpaceNews")
+
+
+class TestLatestDigest(unittest.TestCase):
+    def test_missing_index_is_rebuilt_once_from_the_markdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            events = Path(tmp)
+            for stamp, flag in (("2026-08-01_0900", "No"), ("2026-08-02_0900", "Yes")):
+                (events / f"{stamp} — Starlink Daily Digest.md").write_text(
+                    f"## Starlink Daily Digest — {stamp[:10]}\n\n### Environmental\nSummary {stamp}.\n\n"
+                    f"## Summary of Changes\n| Environmental | {flag} |\n", encoding="utf-8")
+            with mock.patch.object(build_site, "EVENTS", events):
+                digest = build_site.load_latest_digest()
+                self.assertTrue((events / "index.json").exists())
+                with mock.patch.object(Path, "glob", side_effect=AssertionError("globbed")):
+                    self.assertEqual(build_site.load_latest_digest(), digest)
+        self.assertEqual(digest["date"], "2026-08-02")
+        self.assertEqual(digest["sections"][0], ("Environmental", "Summary 2026-08-02_0900.", "Yes"))
+        self.assertEqual(digest["sections"][1], ("Cybersecurity", "", "No"))
+
+
 if __name__ == "__main__":
     unittest.main()
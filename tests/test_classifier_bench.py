@@ -0,0 +1,41 @@
+import json
+import os
+import unittest
+
+import classifier_bench
+
+# Timing a 10k-item corpus takes a few seconds and depends on the machine
+# being quiet, so the gate only runs when asked:
+#   STARLINK_BENCH=1 python -m unittest discover -s tests -p test_classifier_bench.py
+# STARLINK_BENCH_TOLERANCE (default 0.35) is the slowdown allowed against the
+# committed baseline; STARLINK_BENCH_SIZE and STARLINK_BENCH_OUT set the corpus
+# size and where to write the measured JSON.
+ENABLED = os.environ.get("STARLINK_BENCH") == "1"
+TOLERANCE = float(os.environ.get("STARLINK_BENCH_TOLERANCE", "0.35"))
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        vocabulary = classifier_bench.load_baseline()["vocabulary"]
+        self.assertEqual(classifier_bench.build_corpus(50, vocabulary),
+                         classifier_bench.build_corpus(50, vocabulary))
+
+    def test_regressions_respect_the_tolerance(self):
+        baseline = {"relative": {"title_key": 1.0, "dedupe_items": 1.0}}
+        result = {"relative": {"title_key": 0.7, "dedupe_items": 0.5}}
+        self.assertEqual(list(classifier_bench.regressions(result, baseline, 0.35)),
+                         ["dedupe_items"])
+
+
+@unittest.skipUnless(ENABLED, "set STARLINK_BENCH=1 to run the classifier benchmark")
+class TestClassifierThroughput(unittest.TestCase):
+    def test_throughput_is_within_tolerance_of_the_baseline(self):
+        baseline = classifier_bench.load_baseline()
+        size = int(os.environ.get("STARLINK_BENCH_SIZE", baseline["items"]))
+        result = classifier_bench.run(size, baseline["vocabulary"])
+        if os.environ.get("STARLINK_BENCH_OUT"):
+            with open(os.environ["STARLINK_BENCH_OUT"], "w", encoding="utf-8") as out:
+                json.dump(result, out, indent=2)
+        slower = classifier_bench.regressions(result, baseline, TOLERANCE)
+        self.assertFalse(slower, f"slower than baseline beyond {TOLERANCE:.0%}: "
+                                 f"{json.dumps(slower)}")
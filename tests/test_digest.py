@@ -1,6 +1,10 @@
 
+import datetime
 import json
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -8,7 +12,11 @@ from unittest import mock
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
 import starlink_daily_digest as digest
-from starlink_utils import looks_starlink_critical
+from starlink_utils import ClassificationCache, looks_starlink_critical
+
+
+def memory_seen_store():
+    return digest.SeenStore(":memory:")
 
 
 class TestRecall(unittest.TestCase):
@@ -72,6 +80,74 @@ class TestDedupe(unittest.TestCase):
         self.assertEqual(len(digest.dedupe_items(items)), 2)
 
 
+class TestNearDuplicates(unittest.TestCase):
+    original = {"title": "Starlink satellites are falling back to Earth at a rate of one to "
+                         "two per day, astronomer says",
+                "summary": "<p>The reentries could affect the upper atmosphere.</p>",
+                "link": "https://a.example/1", "source": "A", "date": "2"}
+    rewrite = {"title": "Starlink satellites now falling back to Earth at a rate of one "
+                        "to two per day, an astronomer says",
+               "summary": "The reentries could affect the upper atmosphere",
+               "link": "https://b.example/1", "source": "B", "date": "1"}
+    unrelated = {"title": "FCC approves SpaceX plan for more Starlink satellites in lower orbit",
+                 "summary": "", "link": "https://c.example/1", "source": "C", "date": "1"}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "near.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def collapse(self, items, threshold=0.5):
+        index = digest.NearDuplicateIndex(self.path, threshold=threshold)
+        out = digest.collapse_near_duplicates([dict(i) for i in items], index)
+        index.save()
+        return out
+
+    def test_rewrites_collapse_onto_the_first_copy(self):
+        out = self.collapse([self.original, self.rewrite, self.unrelated])
+        self.assertEqual([i["source"] for i in out], ["A", "C"])
+        self.assertEqual(out[0]["also_reported_by"],
+                         [{"source": "B", "link": "https://b.example/1"}])
+
+    def test_rewrites_of_earlier_runs_are_dropped_and_noted(self):
+        self.collapse([self.original])
+        out = self.collapse([self.rewrite, self.unrelated])
+        self.assertEqual([i["source"] for i in out], ["C"])
+        entries = json.loads(self.path.read_text())["entries"]
+        kept = entries[digest.title_key(self.original["title"])]
+        self.assertEqual(kept["also_reported_by"],
+                         [{"source": "B", "link": "https://b.example/1"}])
+
+    def test_a_story_is_not_a_duplicate_of_itself_next_run(self):
+        self.collapse([self.original])
+        self.assertEqual(len(self.collapse([self.original])), 1)
+
+    def test_only_published_stories_are_remembered(self):
+        index = digest.NearDuplicateIndex(self.path, threshold=0.5)
+        items = digest.collapse_near_duplicates([dict(self.original), dict(self.unrelated)],
+                                                index)
+        data = {f"archive_{d.lower()}": [] for d in digest.DOMAINS}
+        # The original was cut (MAX_ITEMS, or a dry run): only C went out.
+        data[f"archive_{digest.DOMAINS[0].lower()}"] = [{"seen_key": self.unrelated["link"]}]
+        digest.remember_published(index, items, data)
+        self.assertEqual([i["source"] for i in self.collapse([self.rewrite])], ["B"])
+
+    def test_threshold_is_configurable(self):
+        strict = self.collapse([self.original, self.rewrite], threshold=0.99)
+        self.assertEqual(len(strict), 2)
+        with mock.patch.object(digest, "FEEDS", {"near_duplicates": {"similarity": 0.8}}):
+            self.assertEqual(digest.near_duplicate_index().threshold, 0.8)
+
+    def test_archive_line_lists_the_other_sources(self):
+        item = dict(self.original, domain_scores={"Environmental": 1},
+                    also_reported_by=[{"source": "B", "link": "https://b.example/1"}])
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
+            md = digest.format_digest_markdown(digest.build_digest_data([item]))
+        self.assertIn("https://a.example/1 (also: B)", md)
+
+
 class TestBucketing(unittest.TestCase):
     def item(self, title, summary=""):
         return {"title": title, "summary": summary, "link": f"https://x/{hash(title)}",
@@ -79,23 +155,20 @@ class TestBucketing(unittest.TestCase):
 
     def test_unclassifiable_items_land_in_the_fallback_domain(self):
         items = [self.item("Starlink licence revoked after court filing")]
-        with mock.patch.object(digest, "load_seen", return_value=[]), \
-             mock.patch.object(digest, "save_seen"):
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
             data = digest.build_digest_data(items)
         self.assertTrue(data["regulatory_update"])
         self.assertEqual(len(data["archive_regulatory"]), 1)
 
     def test_topic_items_still_reach_their_domain(self):
         items = [self.item("Starlink reentry alumina in the stratosphere")]
-        with mock.patch.object(digest, "load_seen", return_value=[]), \
-             mock.patch.object(digest, "save_seen"):
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
             data = digest.build_digest_data(items)
         self.assertTrue(data["environmental_update"])
         self.assertFalse(data["regulatory_update"])
 
     def test_markdown_carries_every_domain_section_and_archive(self):
-        with mock.patch.object(digest, "load_seen", return_value=[]), \
-             mock.patch.object(digest, "save_seen"):
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
             data = digest.build_digest_data([self.item("Starlink debris event")])
         md = digest.format_digest_markdown(data)
         for name in digest.DOMAINS:
@@ -103,28 +176,447 @@ class TestBucketing(unittest.TestCase):
             self.assertIn(f"**Archive — {name}**", md)
             self.assertRegex(md, rf"\| {name} \| (Yes|No) \|")
 
-    def test_archive_regex_isolates_each_domain_block(self):
-        with mock.patch.object(digest, "load_seen", return_value=[]), \
-             mock.patch.object(digest, "save_seen"):
+    def test_stored_scores_decide_the_domain_and_reach_the_archive(self):
+        item = self.item("Starlink debris event")
+        item["domain_scores"] = {"Environmental": 0, "Cybersecurity": 2, "Astronomical": 0}
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store), \
+             mock.patch.object(digest, "domain_scores") as rescored:
+            data = digest.build_digest_data([item])
+        rescored.assert_not_called()
+        self.assertTrue(data["cybersecurity_update"])
+        md = digest.format_digest_markdown(data)
+        self.assertIn("<!-- scores: Environmental 0, Cybersecurity 2, Astronomical 0 -->", md)
+
+    def test_archives_are_appended_per_domain_from_the_data(self):
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
             data = digest.build_digest_data([
                 self.item("Starlink debris event"),
                 self.item("Starlink licence revoked after court filing"),
             ])
-        md = digest.format_digest_markdown(data)
-        import re
-        env = re.search(digest.RX_ARCHIVE["Environmental"], md, re.I).group(2)
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(digest, "ARCHIVE", Path(tmp)), \
+             mock.patch.object(digest, "ARCHIVE_INDEX_FILE", Path(tmp) / "index.json"):
+            digest.append_archives(data)
+            env = (Path(tmp) / "Environmental" / "2026-08.md").read_text(encoding="utf-8")
         self.assertIn("debris event", env)
         self.assertNotIn("licence revoked", env)
 
+    def test_run_is_appended_to_the_event_log(self):
+        item = dict(self.item("Starlink debris event", "Alumina measured."),
+                    domain_scores={"Environmental": 2})
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
+            log = digest.EventLog(Path(tmp) / "events.jsonl")
+            data = digest.build_digest_data([item], log=log)
+            records = [json.loads(ln) for ln in log.path.read_text(encoding="utf-8").splitlines()]
+        logged, emission = records
+        self.assertEqual(logged["domain"], "Environmental")
+        self.assertEqual(logged["summary"], "Alumina measured.")
+        self.assertEqual(logged["published"], "2026-08-01T00:00:00")
+        self.assertEqual(logged["scores"], {"Environmental": 2})
+        self.assertEqual(logged["key"], digest.archive_key(digest.archive_line(data["archive_environmental"][0])))
+        self.assertEqual(emission["type"], "emission")
+        self.assertEqual(emission["emitted"], data["emitted"])
+        self.assertEqual(emission["items"], {"Environmental": 1})
+        self.assertTrue(emission["sections"]["Environmental"]["updated"])
+
+
+class TestDigestIndex(unittest.TestCase):
+    def test_written_digest_is_indexed_as_its_markdown_reads(self):
+        item = {"title": "Starlink debris event", "summary": "", "link": "https://x/1",
+                "source": "test", "date": "2026-08-01T00:00:00"}
+        with mock.patch.object(digest, "open_seen_store", side_effect=memory_seen_store):
+            data = digest.build_digest_data([item])
+        md = digest.format_digest_markdown(data)
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(digest, "EVENTS", Path(tmp)):
+            path, _ = digest.write_digest(md, data)
+            written = digest.digest_index.load_index(tmp)
+            parsed = digest.digest_index.rebuild_index(tmp, digest.DOMAINS)
+        self.assertEqual(written["latest"]["file"], path.name)
+        self.assertEqual(written, parsed)
+        self.assertEqual(written["digests"][path.name]["items"], {"Environmental": 1})
+
+    def test_identical_digest_is_logged_not_written(self):
+        data = {"digest_date": "2026-08-01"}
+        for name in digest.DOMAINS:
+            data.update({f"{name.lower()}_update": False, f"{name.lower()}_summary": "Nothing.",
+                         f"archive_{name.lower()}": []})
+        md = digest.format_digest_markdown(data)
+        times = [datetime.datetime(2026, 8, 1, h) for h in (9, 10, 11)]
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(digest, "EVENTS", Path(tmp)), \
+             mock.patch.object(digest, "now_pt", side_effect=times):
+            results = [digest.write_digest(md, data) for _ in times]
+            files = sorted(p.name for p in Path(tmp).glob("*.md"))
+            runs = digest.digest_index.read_ledger(tmp)
+        self.assertEqual([written for _, written in results], [True, False, False])
+        self.assertEqual(files, ["2026-08-01_0900 — Starlink Daily Digest.md"])
+        self.assertEqual(sorted(runs), ["2026-08-01_0900", "2026-08-01_1000", "2026-08-01_1100"])
+        self.assertEqual({file for _, file in runs.values()}, set(files))
+
+    def test_compaction_folds_existing_duplicates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            events = Path(tmp)
+            for stamp, body in (("2026-08-01_0900", "A"), ("2026-08-01_1000", "A"),
+                                ("2026-08-01_1100", "B"), ("2026-08-01_1200", "A")):
+                (events / f"{stamp} — Starlink Daily Digest.md").write_text(body, encoding="utf-8")
+            index = digest.digest_index.rebuild_index(events, digest.DOMAINS)
+            removed = digest.digest_index.compact(events, index)
+            left = sorted(p.name[:15] for p in events.glob("*.md"))
+            runs = digest.digest_index.read_ledger(events)
+            self.assertEqual(digest.digest_index.compact(events, index), [])
+            self.assertEqual(digest.digest_index.read_ledger(events), runs)
+        self.assertEqual(len(removed), 2)
+        self.assertEqual(left, ["2026-08-01_0900", "2026-08-01_1100"])
+        self.assertEqual(sorted(index["digests"]), [f"{s} — Starlink Daily Digest.md" for s in left])
+        self.assertEqual(index["latest"]["file"], "2026-08-01_0900 — Starlink Daily Digest.md")
+        self.assertEqual([file[:15] for _, file in (runs[k] for k in sorted(runs))],
+                         ["2026-08-01_0900", "2026-08-01_0900", "2026-08-01_1100", "2026-08-01_0900"])
+
+
+class TestSeenStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "seen.sqlite"
+        self.legacy = Path(self.tmp.name) / "seen_items.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keys_persist_across_runs(self):
+        store = digest.SeenStore(self.db)
+        store.add("https://example.com/a")
+        store.close()
+        store = digest.SeenStore(self.db)
+        self.assertIn("https://example.com/a", store)
+        self.assertNotIn("https://example.com/b", store)
+        store.close()
+
+    def test_keys_expire_after_the_feed_window_not_a_count(self):
+        store = digest.SeenStore(self.db)
+        for i in range(5000):
+            store.add(f"https://example.com/{i}")
+        store.close()
+        later = time.time() + 86400 * (digest.FEED_WINDOW_DAYS - 1)
+        with mock.patch.object(digest.time, "time", return_value=later):
+            store = digest.SeenStore(self.db)
+            self.assertEqual(len(store), 5000)
+            store.add("https://example.com/0")     # still being served
+            store.close()
+        with mock.patch.object(digest.time, "time", return_value=later + 2 * 86400):
+            digest.SeenStore(self.db).close()      # each run prunes as it closes
+            store = digest.SeenStore(self.db)
+            self.assertEqual(len(store), 1)
+            self.assertIn("https://example.com/0", store)
+            store.close()
+
+    def test_json_list_is_migrated_once(self):
+        self.legacy.write_text(json.dumps(["https://example.com/old"]))
+        store = digest.SeenStore(self.db, legacy=self.legacy)
+        self.assertIn("https://example.com/old", store)
+        store.close()
+        self.assertFalse(self.legacy.exists())
+
+    def test_digested_items_are_not_repeated(self):
+        item = {"title": "Starlink debris event", "summary": "", "source": "A",
+                "link": "https://example.com/d", "date": "2026-08-01T00:00:00"}
+        with mock.patch.object(digest, "SEEN_DB", self.db), \
+             mock.patch.object(digest, "SEEN_FILE", self.legacy), \
+             mock.patch.object(digest, "EVENT_LOG", Path(self.tmp.name) / "events.jsonl"):
+            first = digest.build_digest_data([dict(item)])
+            second = digest.build_digest_data([dict(item)])
+        self.assertEqual(sum(len(first[f"archive_{d.lower()}"]) for d in digest.DOMAINS), 1)
+        self.assertEqual(sum(len(second[f"archive_{d.lower()}"]) for d in digest.DOMAINS), 0)
+
+    def test_a_lost_store_is_rebuilt_from_the_event_log(self):
+        events = Path(self.tmp.name) / "events.jsonl"
+        now = digest.now_pt()
+        recent = now.strftime(digest.EMITTED_FORMAT)
+        # Two hours inside the window in Pacific time; read as UTC it would be
+        # five or more hours outside it.
+        edge = (now - datetime.timedelta(days=digest.FEED_WINDOW_DAYS, hours=-2)
+                ).strftime(digest.EMITTED_FORMAT)
+        digest.EventLog(events).append([
+            {"type": "item", "emitted": recent, "url": "https://example.com/new",
+             "headline": "New", "seen_key": "https://example.com/new\n"},
+            {"type": "item", "emitted": recent, "url": "", "headline": "No link"},
+            {"type": "item", "emitted": edge, "url": "https://example.com/edge"},
+            {"type": "item", "emitted": "2020-01-01_0900", "url": "https://example.com/old"},
+            {"type": "item", "emitted": None, "url": "https://example.com/imported"},
+            {"type": "emission", "emitted": recent},
+        ])
+        store = digest.SeenStore(self.db, events=events)
+        self.assertIn("https://example.com/new\n", store)     # as item_key had it
+        self.assertIn("No link", store)
+        self.assertIn("https://example.com/edge", store)
+        self.assertEqual(len(store), 3)
+        store.close()
+
+    def test_migrated_keys_survive_losing_the_store(self):
+        events = Path(self.tmp.name) / "events.jsonl"
+        self.legacy.write_text(json.dumps(["https://example.com/old"]))
+        item = {"title": "Starlink debris event ", "summary": "", "source": "A",
+                "link": " https://example.com/d\n", "date": "2026-08-01T00:00:00"}
+        with mock.patch.object(digest, "SEEN_DB", self.db), \
+             mock.patch.object(digest, "SEEN_FILE", self.legacy), \
+             mock.patch.object(digest, "EVENT_LOG", events):
+            # The first run migrates the JSON list.
+            first = digest.build_digest_data([dict(item)], log=digest.EventLog(events))
+            self.assertFalse(self.legacy.exists())
+            self.db.unlink()                                    # the cache is evicted
+            second = digest.build_digest_data([dict(item)], log=digest.EventLog(events))
+            store = digest.open_seen_store()
+            self.assertIn("https://example.com/old", store)
+            store.close()
+        self.assertEqual(sum(len(first[f"archive_{d.lower()}"]) for d in digest.DOMAINS), 1)
+        self.assertEqual(sum(len(second[f"archive_{d.lower()}"]) for d in digest.DOMAINS), 0)
+
+
+class TestConcurrentFetch(unittest.TestCase):
+    feeds = [
+        {"name": "slow", "url": "https://a.example/slow"},
+        {"name": "fast", "url": "https://b.example/fast"},
+        {"name": "broken", "url": "https://c.example/broken"},
+    ]
+
+    def test_results_come_back_in_configured_order(self):
+        def fake_fetch(feed, deadline=None):
+            if feed["name"] == "slow":
+                time.sleep(0.05)
+            if feed["name"] == "broken":
+                raise RuntimeError("boom")
+            return feed["name"]
+
+        with mock.patch.object(digest, "fetch_feed", side_effect=fake_fetch):
+            results = digest.fetch_feeds(self.feeds, workers=3)
+        self.assertEqual([r[0] for r in results], ["slow", "fast", None])
+        self.assertIsInstance(results[2][1], RuntimeError)
+
+    def test_feeds_running_at_the_deadline_time_out_and_queued_ones_are_skipped(self):
+        release = threading.Event()
+
+        def fake_fetch(feed, deadline=None):
+            if feed["name"] == "slow":
+                release.wait(2)
+            return feed["name"]
+
+        # A second feed from the slow host waits behind it and never starts.
+        feeds = self.feeds + [{"name": "queued", "url": "https://a.example/queued"}]
+        with mock.patch.object(digest, "fetch_feed", side_effect=fake_fetch):
+            results = digest.fetch_feeds(feeds, workers=3, per_host=1, budget=0.2)
+        release.set()
+        self.assertIsNone(results[0][0])
+        self.assertIsInstance(results[0][1], digest.FeedTimeoutError)
+        self.assertEqual(results[1], ("fast", None))
+        self.assertEqual(results[3], (None, None))
+
+    def test_per_host_limit_is_respected(self):
+        feeds = [{"name": str(i), "url": f"https://news.example/{i}"} for i in range(6)]
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def fake_fetch(feed, deadline=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return feed["name"]
+
+        with mock.patch.object(digest, "fetch_feed", side_effect=fake_fetch):
+            results = digest.fetch_feeds(feeds, workers=6, per_host=2)
+        self.assertEqual([r[0] for r in results], [str(i) for i in range(6)])
+        self.assertLessEqual(peak[0], 2)
+
+    def test_a_busy_host_does_not_hold_the_other_workers(self):
+        # Every news.example feed waits for the other host's feed: it is only
+        # reached if the queued news.example feeds aren't parked in workers.
+        feeds = [{"name": str(i), "url": f"https://news.example/{i}"} for i in range(4)]
+        feeds.append({"name": "other", "url": "https://other.example/rss"})
+        other_done = threading.Event()
+
+        def fake_fetch(feed, deadline=None):
+            if feed["name"] == "other":
+                other_done.set()
+            else:
+                other_done.wait(2)
+            return feed["name"]
+
+        with mock.patch.object(digest, "fetch_feed", side_effect=fake_fetch):
+            results = digest.fetch_feeds(feeds, workers=2, per_host=1, budget=1)
+        self.assertEqual([r[0] for r in results], ["0", "1", "2", "3", "other"])
+
+
+class TestCircuitOpenFeeds(unittest.TestCase):
+    def test_open_circuit_is_reported_as_its_own_status(self):
+        feeds = {"feeds": [{"name": "Dead feed", "url": "https://dead.example/rss"}]}
+        err = digest.CircuitOpenError("circuit open for dead.example")
+        with mock.patch.object(digest, "FEEDS", feeds), \
+             mock.patch.object(digest, "fetch_feeds", return_value=[(None, err)]), \
+             mock.patch.object(digest, "save_watermarks"), \
+             mock.patch.object(digest, "NearDuplicateIndex"), \
+             mock.patch.object(digest, "FEED_HEALTH_FILE") as health_file:
+            self.assertEqual(digest.gather_items(), [])
+            payload = json.loads(health_file.write_text.call_args[0][0])
+        self.assertEqual(payload["feeds"][0]["status"], "circuit_open")
+        self.assertEqual(payload["feeds_circuit_open"], 1)
+        self.assertEqual(payload["feeds_failed"], 0)
+
+
+def rss(*titles):
+    now = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime())
+    items = "".join(f"<item><title>{t}</title><link>https://n.example/{i}</link>"
+                    f"<guid>https://n.example/{i}</guid><pubDate>{now}</pubDate></item>"
+                    for i, t in enumerate(titles))
+    return digest.parse_feed(f"<rss version='2.0'><channel>{items}</channel></rss>".encode())
+
+
+RSS_SAMPLE = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>
+<item><title>Starlink outage &amp; recovery</title><link>https://x.example/1</link>
+<guid isPermaLink="false">g1</guid>
+<description>&lt;p&gt;Users report &lt;b&gt;outages&lt;/b&gt;&lt;/p&gt;&lt;script&gt;track()&lt;/script&gt;</description>
+<pubDate>Tue, 10 Jun 2025 04:00:00 -0700</pubDate></item>
+<item><title>Undated item</title><link>https://x.example/2</link>
+<dc:date>2025-06-10T10:00:00Z</dc:date><description><![CDATA[<a href="https://y">more</a>]]></description></item>
+</channel></rss>"""
+
+ATOM_SAMPLE = b"""<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">
+<entry><title>Debris study</title><link rel="alternate" href="https://a.example/1"/>
+<link rel="self" href="https://a.example/self"/><id>tag:1</id>
+<updated>2025-06-10T10:00:00+02:00</updated><content type="html">&lt;p&gt;body&lt;/p&gt;</content></entry>
+<entry><title>Second</title><link href="https://a.example/2"/><id>tag:2</id>
+<published>2025-06-09T10:00:00Z</published><summary>short</summary></entry>
+</feed>"""
+
+
+class TestFeedParsing(unittest.TestCase):
+    fields = ("id", "title", "link", "summary", "published_parsed", "updated_parsed")
+
+    def assert_matches_feedparser(self, data):
+        fast = digest.parse_feed(data)
+        self.assertEqual(fast.parser, "fast")
+        reference = digest.feedparser.parse(data)
+        self.assertEqual(len(fast.entries), len(reference.entries))
+        for ours, theirs in zip(fast.entries, reference.entries):
+            for field in self.fields:
+                with self.subTest(field=field):
+                    mine, expected = getattr(ours, field), theirs.get(field)
+                    if field == "summary":
+                        # gather_items reads both through clean_text.
+                        mine, expected = digest.clean_text(mine), digest.clean_text(expected)
+                    self.assertEqual(mine, expected)
+
+    def test_rss_fields_match_feedparser(self):
+        self.assert_matches_feedparser(RSS_SAMPLE)
+
+    def test_atom_fields_match_feedparser(self):
+        self.assert_matches_feedparser(ATOM_SAMPLE)
+
+    def test_finished_items_are_released(self):
+        items = "".join(f"<item><title>Story {i}</title><link>https://x/{i}</link></item>"
+                        for i in range(50))
+        data = f"<rss><channel><title>Feed</title>{items}</channel></rss>".encode()
+        seen, iterparse = [], digest.ET.iterparse
+
+        def spy(*args, **kwargs):
+            for event, el in iterparse(*args, **kwargs):
+                seen.append(el)
+                yield event, el
+
+        with mock.patch.object(digest.ET, "iterparse", spy):
+            parsed = digest.fast_parse(data)
+        self.assertEqual(len(parsed.entries), 50)
+        channel = next(el for el in seen if el.tag == "channel")
+        self.assertEqual(len(channel), 0)
+
+    def test_feeds_the_fast_path_cannot_read_fall_back(self):
+        cases = {
+            "rdf": b"<rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'/>",
+            "html entity": b"<rss><channel><item><title>A&nbsp;B</title></item></channel></rss>",
+            "truncated": b"<rss><channel><item><title>Cut off",
+        }
+        for name, data in cases.items():
+            with self.subTest(name):
+                self.assertEqual(digest.parse_feed(data)["parser"], "feedparser")
+
+
+class TestWatermarks(unittest.TestCase):
+    feeds = {"feeds": [{"name": "News", "url": "https://n.example/rss"}]}
+    titles = ["Starlink outage hits Europe", "Starlink expands to a new market",
+              "Kuiper launch slips"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.marks = Path(self.tmp.name) / "feed_watermarks.json"
+        self.cache = ClassificationCache(Path(self.tmp.name) / "classify.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_once(self, parsed, persist=True):
+        with mock.patch.object(digest, "FEEDS", self.feeds), \
+             mock.patch.object(digest, "WATERMARK_FILE", self.marks), \
+             mock.patch.object(digest, "NEAR_DUP_FILE", Path(self.tmp.name) / "near.json"), \
+             mock.patch.object(digest, "fetch_feeds", return_value=[(parsed, None)]), \
+             mock.patch.object(digest, "CLASSIFY_CACHE", self.cache), \
+             mock.patch.object(digest, "classify_batch",
+                               wraps=digest.classify_batch) as judged, \
+             mock.patch.object(digest, "FEED_HEALTH_FILE") as health_file:
+            items = digest.gather_items(persist=persist)
+            payload = json.loads(health_file.write_text.call_args[0][0])
+        self.assertEqual(judged.call_count, 1)    # one batch for the whole run
+        return items, payload, len(judged.call_args[0][0])
+
+    def test_rejected_entries_are_not_refiltered(self):
+        items, payload, judged = self.run_once(rss(*self.titles))
+        self.assertEqual((len(items), judged, payload["entries_new"]), (1, 3, 3))
+        self.assertEqual(payload["feeds"][0]["parser"], "fast")
+        self.assertEqual(payload["parsers"], {"fast": 1})
+
+        items, payload, judged = self.run_once(rss(*self.titles, "Starlink debris study"))
+        # Only the new entry and the one that matched last time are filtered.
+        self.assertEqual(judged, 2)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(payload["entries_recent"], 4)
+        self.assertEqual(payload["entries_new"], 1)
+        self.assertEqual(payload["entries_previously_seen"], 3)
+        self.assertEqual(payload["items_matched"], 2)
+
+    def test_cached_verdicts_are_reused_and_reported(self):
+        self.run_once(rss(*self.titles))
+        self.marks.unlink()      # without watermarks every entry is looked up again
+        _, payload, _ = self.run_once(rss(*self.titles))
+        self.assertEqual(payload["classify_cache"]["hits"], 3)
+        self.assertEqual(payload["classify_cache"]["misses"], 3)
+        self.assertEqual(payload["classify_cache"]["hit_rate"], 0.5)
+
+    def test_items_keep_the_cleaned_summary(self):
+        now = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime())
+        parsed = digest.parse_feed(
+            f"""<rss version='2.0'><channel><item><title>Starlink outage hits Europe</title>
+            <link>https://n.example/1</link><pubDate>{now}</pubDate><description>
+            &lt;img src="https://cdn.example/x.jpg"&gt;&lt;p&gt;Users report
+            &lt;b&gt;outages&lt;/b&gt;&amp;amp;more&lt;/p&gt;</description></item>
+            </channel></rss>""".encode())
+        items, _, _ = self.run_once(parsed)
+        self.assertEqual(items[0]["summary"], "Users report outages &more")
+
+    def test_changed_filter_rules_void_the_watermarks(self):
+        self.run_once(rss(*self.titles))
+        with mock.patch.object(digest, "filter_fingerprint", return_value="changed"):
+            _, payload, judged = self.run_once(rss(*self.titles))
+        self.assertEqual(judged, 3)
+        self.assertEqual(payload["entries_new"], 3)
+
 
-class TestSeenFile(unittest.TestCase):
-    def test_cap_keeps_the_most_recent_keys(self):
-        keys = [f"https://example.com/{i:05d}" for i in range(digest.SEEN_CAP + 50)]
-        with mock.patch.object(digest, "SEEN_FILE") as seen_file:
-            digest.save_seen(keys)
-            written = json.loads(seen_file.write_text.call_args[0][0])
-        self.assertEqual(len(written), digest.SEEN_CAP)
-        self.assertEqual(written[-1], keys[-1])   # newest survives
+    def test_a_dry_run_leaves_the_state_alone(self):
+        self.run_once(rss(*self.titles), persist=False)
+        self.assertFalse(self.marks.exists())
+        self.assertFalse(self.cache.path.exists())
+        _, payload, judged = self.run_once(rss(*self.titles))
+        self.assertEqual((judged, payload["entries_new"]), (3, 3))
 
 
 class TestFeedHealth(unittest.TestCase):
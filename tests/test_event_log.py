@@ -0,0 +1,103 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import archive_store
+import build_site
+import digest_index
+import event_log
+
+
+class TestEventLog(unittest.TestCase):
+    line = ("- 2026-08-01 | **Starlink debris study** — SpaceNews https://s.example/1"
+            " (also: Reuters, AP) <!-- scores: Environmental 2, Cybersecurity 0 -->")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.log = event_log.EventLog(self.dir / "events.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_archive_line_becomes_a_structured_record(self):
+        record = event_log.entry_record("Environmental", self.line)
+        self.assertEqual(record["source"], "SpaceNews")
+        self.assertEqual(record["url"], "https://s.example/1")
+        self.assertEqual(record["also"], ["Reuters", "AP"])
+        self.assertEqual(record["scores"], {"Environmental": 2, "Cybersecurity": 0})
+        self.assertEqual(record["key"], archive_store.archive_key(self.line))
+        self.assertIsNone(event_log.entry_record("Environmental", "- No new items."))
+
+    def test_site_entry_matches_the_markdown_parse(self):
+        path = self.dir / "Environmental.md"
+        path.write_text(self.line + "\n", encoding="utf-8")
+        parsed = build_site.parse_archive_file("Environmental", path)["entries"][0]
+        self.assertEqual(build_site.log_entry(event_log.entry_record("Environmental", self.line)),
+                         parsed)
+
+    def test_import_is_idempotent(self):
+        store = archive_store.ArchiveStore(self.dir / "Archive", self.dir / "index.json")
+        store.append("Environmental", [self.line, "- 2022-01 | **Old** — x https://o/1"])
+        store.save()
+        events = self.dir / "Events"
+        events.mkdir()
+        index = digest_index.empty_index()
+        digest_index.record(index, "2026-08-01_0900 — Starlink Daily Digest.md", "2026-08-01",
+                            {"Environmental": ("One item.", True)}, {"Environmental": 1}, "abc")
+        digest_index.save_index(events, index)
+
+        args = dict(archive_dir=self.dir / "Archive", events_dir=events, domains=["Environmental"])
+        self.assertEqual(event_log.import_archives(self.log, **args), (2, 1))
+        self.assertEqual(event_log.import_archives(self.log, **args), (0, 0))
+        records = list(event_log.read_events(self.log.path))
+        self.assertEqual([r.get("headline") for r in records], ["Old", "Starlink debris study", None])
+        self.assertEqual(records[-1]["sections"]["Environmental"]["summary"], "One item.")
+
+    def test_site_streams_entries_and_latest_digest_from_the_log(self):
+        record = event_log.entry_record("Environmental", self.line)
+        sections = {"Environmental": {"summary": "One item.", "updated": True}}
+        self.log.append([
+            record,
+            {"type": "emission", "emitted": "2026-08-01_0900", "digest_date": "2026-08-01",
+             "sections": sections, "items": {"Environmental": 1}},
+            dict(record, emitted="2026-08-02_0900"),
+            {"type": "emission", "emitted": "2026-07-31_0900", "digest_date": "2026-07-31",
+             "sections": {}, "items": {}},
+        ])
+        with self.log.path.open("a", encoding="utf-8") as f:
+            f.write('{"type": "item", "dom')     # killed mid-write
+        with mock.patch.object(build_site, "ARCH", self.dir):
+            archives, digest = build_site.load_event_log(self.log.path)
+        self.assertEqual([len(a["entries"]) for a in archives], [1, 0, 0, 0])
+        self.assertEqual(archives[0]["entries"][0]["rest"], "SpaceNews (also: Reuters, AP)")
+        self.assertEqual(digest["date"], "2026-08-01")
+        self.assertEqual(digest["sections"][0], ("Environmental", "One item.", "Yes"))
+        self.assertIsNone(build_site.load_event_log(self.dir / "missing.jsonl"))
+
+    def test_site_follows_hand_edits_to_the_archives(self):
+        store = archive_store.ArchiveStore(self.dir / "Archive", self.dir / "index.json")
+        removed = "- 2026-08-02 | **Retracted** — X https://x/2"
+        store.append("Environmental", [self.line, removed])
+        store.save()
+        self.log.append([event_log.entry_record("Environmental", self.line),
+                         event_log.entry_record("Environmental", removed)])
+        shard = self.dir / "Archive" / "Environmental" / "2026-08.md"
+        text = shard.read_text(encoding="utf-8").replace(removed + "\n", "")
+        shard.write_text(text + "- 2026-08-03 | **Added by hand** — B https://b/3\n",
+                         encoding="utf-8")
+        (shard.parent / "2026-09.md").write_text(
+            "# Environmental — 2026-09\n\n- 2026-09-01 | **New month** — C https://c/4\n",
+            encoding="utf-8")
+        with mock.patch.object(build_site, "ARCH", self.dir / "Archive"):
+            archives, _ = build_site.load_event_log(self.log.path)
+        self.assertEqual([e["title"] for e in archives[0]["entries"]],
+                         ["Starlink debris study", "Added by hand", "New month"])
+
+
+if __name__ == "__main__":
+    unittest.main()
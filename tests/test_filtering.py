@@ -1,12 +1,18 @@
 
 import unittest
+import random
+import re
 import sys
 import os
+import tempfile
+import time
 from pathlib import Path
+from unittest import mock
 
 # Add scripts directory to path to import starlink_utils
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
+import starlink_utils
 from starlink_utils import looks_starlink_critical
 
 class TestStarlinkFiltering(unittest.TestCase):
@@ -50,5 +56,303 @@ class TestStarlinkFiltering(unittest.TestCase):
         # Test: Starship launch WITHOUT criticism
         self.assertFalse(looks_starlink_critical("Starship launches Starlink", "Successful mission", ""))
 
+def regex(rule):
+    """A rule as a single regex; a (first, then) pair as the `.*` it replaced."""
+    return ".*".join(rule) if isinstance(rule, tuple) else rule
+
+
+def per_pattern_reference(title, summary, link):
+    """The filter as written before RelevanceMatcher: one re.search per pattern."""
+    t = " ".join([(title or ""), (summary or ""), (link or "")]).lower()
+    if not any(re.search(regex(rx), t, re.I) for rx in starlink_utils.POS):
+        return False
+    head = (title or "").lower()
+    if not re.search(r"\bstar\s?link\b|\bstarshield\b", head, re.I) and \
+            any(re.search(regex(rx), head, re.I) for rx in starlink_utils.NEG):
+        return False
+    return any(re.search(regex(rx), t, re.I) for rx in starlink_utils.CRITICISM)
+
+
+class TestMatcherEquivalence(unittest.TestCase):
+    cases = [
+        ("Starlink outage hits Europe", "Users reported downtime.", "http://example.com"),
+        ("Starshield vulnerabilities exposed", "Hackers claim access.", "http://example.com"),
+        ("SpaceX Starlink debris concerns", "ESA worried about reentry.", "http://example.com"),
+        ("Astronomers complain about Starlink brightness", "Telescopes affected.", ""),
+        ("Starship launch successful", "Spacex launches heavy rocket.", "http://example.com"),
+        ("Starlink expands to new country", "Service now available in Antarctica.", ""),
+        ("Blue Origin announces new rocket", "Jeff Bezos reveals plans.", "http://example.com"),
+        ("SpaceX Falcon 9 launches crew", "Astronauts go to ISS.", "http://example.com"),
+        ("Starship launches Starlink", "Debris everywhere", ""),
+        ("Starship launches Starlink", "Successful mission", ""),
+        ("Starlink satellites deorbit near the ISS, operators warn", "Close approaches.", ""),
+        ("Artemis II crew prepares for launch", "Unrelated to Starlink outage history.", ""),
+        ("Crew-9 docks; Starlink terminals jammed", "", ""),
+        ("SPACEX says STARLINK OUTAGE is over", "", "https://x/STARLINK"),
+        ("Falcon 9 flies", "spacex and then much later starlink debris", ""),
+        # Non-ASCII text takes the re.I path; the long s folds to "s" there.
+        ("ſtarlink débris étude", "Ozone concerns", ""),
+        ("Starlink–Kuiper rivalry heats up", "Regulators weigh spectrum", ""),
+        (None, None, None),
+    ]
+
+    def test_matches_the_per_pattern_filter(self):
+        for title, summary, link in self.cases:
+            with self.subTest(title=title):
+                self.assertEqual(looks_starlink_critical(title, summary, link),
+                                 per_pattern_reference(title, summary, link))
+
+    def test_lastgroup_names_the_pattern_that_fired(self):
+        self.assertEqual(starlink_utils.MATCHER.search("crit", "a starlink outage today"),
+                         "crit0")
+        self.assertEqual(starlink_utils.MATCHER.search("pos", "spacex, and later, starlink"),
+                         "pos0")
+        self.assertEqual(starlink_utils.MATCHER.search("pos", "spacex, and later, starlinks"),
+                         None)
+
+
+def findall_reference(title, summary, link):
+    """Domain scores as classify_domain used to count them: findall per pattern."""
+    t = " ".join([(title or ""), (summary or ""), (link or "")]).lower()
+    return {domain: sum(len(re.findall(regex(rx), t, re.I)) for rx in patterns)
+            for domain, patterns in starlink_utils.DOMAIN_KEYWORDS.items()}
+
+
+class TestDomainScorer(unittest.TestCase):
+    cases = TestMatcherEquivalence.cases + [
+        ("Starlink reentry alumina in the stratosphere", "Ozone, ozone and more ozone.", ""),
+        ("NOAA says Starlink debris harms the atmosphere", "ESA agrees on ozone", ""),
+        ("Starlink terminal firmware has a security flaw", "Terminal attack surface", ""),
+        ("Jamming and spoofing of Starlink terminals", "jammed, jam, jammers", ""),
+        ("Astronomers: Starlink streaks ruin telescope surveys", "Dark sky advocates", ""),
+        ("Starlink rf interference at radio-quiet zones", "RFI and radioastronomy", ""),
+        ("Re-entry, reentry and re entry", "burn-up burnup burn up", ""),
+        ("Starlink", "", "https://example.com/debris/outage/cve-2026"),
+        # `.*` stops at a newline: a pair holds within one line, once per line.
+        ("NOAA on Starlink\nozone report", "", ""),
+        ("ESA on ozone\nFAA on the atmosphere", "noaa\nozone", ""),
+        ("Starlink terminal\nsecurity", "terminal attack\nterminal attack", ""),
+    ]
+
+    def test_scores_match_findall_for_every_domain(self):
+        for title, summary, link in self.cases:
+            with self.subTest(title=title):
+                self.assertEqual(starlink_utils.domain_scores(title, summary, link),
+                                 findall_reference(title, summary, link))
+
+    def test_every_keyword_pattern_is_indexed(self):
+        self.assertEqual(starlink_utils.SCORER.unindexed, [])
+
+    def test_ties_break_in_domain_order(self):
+        scores = {"Environmental": 1, "Cybersecurity": 1, "Astronomical": 0}
+        self.assertEqual(starlink_utils.best_domain(scores), "Environmental")
+        self.assertEqual(starlink_utils.classify_domain("Starlink debris outage", ""),
+                         "Environmental")
+        self.assertEqual(starlink_utils.classify_domain("Starlink expands", ""), "")
+
+
+class TestPathologicalText(unittest.TestCase):
+    """1 MB summaries built from the words that start the (first, then) rules.
+
+    As `first.*then` regexes these took minutes (each `first` rescans to the
+    end); the ceilings are far above what the linear checks need.
+    """
+    words = ("spacex terminal noaa esa faa starship starlink ozone debris security "
+             "attack the of report").split()
+
+    def texts(self):
+        rng = random.Random(1)
+        yield "repeat", ("spacex terminal noaa " * 50_000)[:1_000_000]
+        yield "random", " ".join(rng.choice(self.words) for _ in range(200_000))[:1_000_000]
+        yield "one word", "x" * 1_000_000
+
+    def test_rules_stay_linear_on_a_megabyte(self):
+        for name, text in self.texts():
+            with self.subTest(name):
+                started = time.perf_counter()
+                starlink_utils.MATCHER.critical_text(text, "headline")
+                starlink_utils.SCORER.scores_text(text)
+                self.assertLess(time.perf_counter() - started, 3.0)
+
+    def test_clean_text_stays_linear_on_a_megabyte_of_unclosed_tags(self):
+        rng = random.Random(2)
+        pieces = ("<script>x ", "<style>", "<svg ", "<iframe src=a ", "<", "<b ", "</scr", "&amp")
+        cases = {
+            "unclosed script": "<script>x " * 100_000,
+            "bare brackets": "<" * 1_000_000,
+            "fragments": "".join(rng.choice(pieces) for _ in range(150_000))[:1_000_000],
+        }
+        for name, markup in cases.items():
+            with self.subTest(name):
+                started = time.perf_counter()
+                clean = starlink_utils.clean_text(markup + "</script> tail")
+                self.assertLess(time.perf_counter() - started, 3.0)
+                self.assertLessEqual(len(clean), starlink_utils.SUMMARY_CHARS + 2)
+
+    def test_items_are_cut_to_the_text_budget(self):
+        entries = [("Starlink report", text, "https://x") for _, text in self.texts()]
+        with mock.patch.object(starlink_utils, "_classify_chunk",
+                               wraps=starlink_utils._classify_chunk) as chunk:
+            starlink_utils.classify_batch(entries)
+        judged = [text for call in chunk.call_args_list for text, _ in call.args[0]]
+        self.assertEqual(len(judged), len(entries))
+        self.assertTrue(all(len(text) == starlink_utils.ITEM_TEXT_CHARS for text in judged))
+
+
+class TestClassifyBatch(unittest.TestCase):
+    entries = [tuple(x or "" for x in case) for case in TestDomainScorer.cases]
+
+    def expected(self):
+        return [(looks_starlink_critical(*e),
+                 starlink_utils.domain_scores(*e) if looks_starlink_critical(*e) else None)
+                for e in self.entries]
+
+    def test_batch_matches_the_single_item_helpers(self):
+        self.assertEqual(starlink_utils.classify_batch(self.entries), self.expected())
+
+    def test_process_pool_gives_the_same_answers(self):
+        with mock.patch.object(starlink_utils, "BATCH_CHUNK", 4):
+            verdicts = starlink_utils.classify_batch(self.entries, workers=2, threshold=1)
+        self.assertEqual(verdicts, self.expected())
+
+
+class TestRuleStats(unittest.TestCase):
+    entries = [
+        ("Starlink outage hits Europe", "Ozone and debris concerns.", ""),
+        ("Starlink expands to a new market", "", ""),
+        ("Kuiper launch slips", "", ""),
+        ("Falcon 9 launches another batch", "Starlink satellites aboard.", ""),
+    ]
+
+    def test_counting_does_not_change_the_verdicts(self):
+        stats = starlink_utils.RuleStats()
+        self.assertEqual(starlink_utils.classify_batch(self.entries, stats=stats),
+                         starlink_utils.classify_batch(self.entries))
+
+    def test_each_rejection_is_attributed_to_its_rule(self):
+        stats = starlink_utils.RuleStats(sample_every=1)
+        starlink_utils.classify_batch(self.entries, stats=stats)
+        summary = stats.summary()
+        self.assertEqual(summary["evaluated"], 4)
+        self.assertEqual(summary["rejected"], {"no_starlink": 1, "off_topic_headline": 1,
+                                               "no_criticism": 1})
+        hits = {p["rule"]: p["hits"] for p in summary["patterns"]}
+        self.assertEqual(hits["POS[0]"], 3)
+        self.assertEqual(hits["NEG[1]"], 1)          # the Falcon 9 headline
+        self.assertEqual(hits["CRITICISM[0]"], 1)    # "outage"
+        self.assertEqual(hits["Environmental[0]"], 1)
+        self.assertEqual(summary["sampled_texts"], 4)
+        self.assertTrue(all(p["us_per_text"] is not None for p in summary["patterns"]))
+
+    def test_cached_texts_still_count_in_the_running_totals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "classify.json"
+            starlink_utils.classify_batch(self.entries, cache=starlink_utils.ClassificationCache(path),
+                                          stats=starlink_utils.RuleStats())
+            stats = starlink_utils.RuleStats()
+            starlink_utils.classify_batch(self.entries, cache=starlink_utils.ClassificationCache(path),
+                                          stats=stats)
+        summary = stats.summary()
+        self.assertEqual(summary["evaluated"], 0)           # every text was cached
+        self.assertEqual(summary["totals"]["evaluated"], 4)
+        totals = {p["rule"]: p["total_hits"] for p in summary["patterns"]}
+        self.assertEqual(totals["POS[0]"], 3)
+        self.assertEqual(totals["CRITICISM[0]"], 1)
+
+    def test_worker_counts_are_merged(self):
+        stats = starlink_utils.RuleStats()
+        with mock.patch.object(starlink_utils, "BATCH_CHUNK", 2):
+            starlink_utils.classify_batch(self.entries, workers=2, threshold=1, stats=stats)
+        self.assertEqual(stats.evaluated, 4)
+        self.assertEqual(sum(stats.rejected.values()), 3)
+
+
+class TestCleanText(unittest.TestCase):
+    def test_markup_is_reduced_to_visible_text(self):
+        markup = ('<p style="color:red">Starlink&nbsp;<b>outage</b> &amp; recovery</p>'
+                  '<script>track("ozone")</script><iframe src="x"></iframe>\n\n<br/>Done.')
+        self.assertEqual(starlink_utils.clean_text(markup), "Starlink outage & recovery Done.")
+
+    def test_attributes_no_longer_produce_keyword_hits(self):
+        summary = ('<img src="https://cdn.example/debris-reentry-ozone.jpg" alt="">'
+                   '<a class="hack-breach" href="https://x">Starlink adds new plans</a>')
+        clean = starlink_utils.clean_text(summary)
+        self.assertEqual(clean, "Starlink adds new plans")
+        self.assertTrue(looks_starlink_critical("Starlink update", summary, ""))
+        self.assertFalse(looks_starlink_critical("Starlink update", clean, ""))
+
+    def test_long_text_is_cut_at_a_word(self):
+        clean = starlink_utils.clean_text("word " * 500, limit=42)
+        self.assertLessEqual(len(clean), 44)
+        self.assertTrue(clean.endswith("word …"))
+
+    def test_plain_text_passes_through(self):
+        self.assertEqual(starlink_utils.clean_text("  Starlink  outage "), "Starlink outage")
+
+    def test_unclosed_hidden_block_hides_the_rest(self):
+        self.assertEqual(starlink_utils.clean_text("Starlink <b>outage</b><script>track(1)"),
+                         "Starlink outage")
+        self.assertEqual(starlink_utils.clean_text("a <style>x</STYLE > b <svg><path/></svg>c"),
+                         "a b c")
+
+
+class TestClassificationCache(unittest.TestCase):
+    entries = TestClassifyBatch.entries
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "classify.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_second_run_is_answered_from_disk(self):
+        first = starlink_utils.classify_batch(self.entries,
+                                              cache=starlink_utils.ClassificationCache(self.path))
+        cache = starlink_utils.ClassificationCache(self.path)
+        with mock.patch.object(starlink_utils, "MATCHER") as matcher:
+            second = starlink_utils.classify_batch(self.entries, cache=cache)
+        matcher.critical_text.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(cache.summary()["hit_rate"], 1.0)
+
+    def test_rule_change_empties_the_cache(self):
+        starlink_utils.classify_batch(self.entries,
+                                      cache=starlink_utils.ClassificationCache(self.path))
+        with mock.patch.object(starlink_utils, "CRITICISM", starlink_utils.CRITICISM + ["x"]):
+            cache = starlink_utils.ClassificationCache(self.path)
+            starlink_utils.classify_batch(self.entries[:2], cache=cache)
+        self.assertEqual(cache.stats["hits"], 0)
+
+    def test_headline_is_part_of_the_key(self):
+        # Same joined text, but only the second headline is off-topic.
+        cache = starlink_utils.ClassificationCache(self.path)
+        starlink_utils.classify_batch([("Falcon 9 launch", "Starlink outage hits users", "")],
+                                      cache=cache)
+        entry = ("Falcon 9 launch Starlink", "outage hits users", "")
+        self.assertEqual(starlink_utils.classify_batch([entry], cache=cache),
+                         starlink_utils.classify_batch([entry]))
+        self.assertTrue(starlink_utils.classify_batch([entry], cache=cache)[0][0])
+
+    def test_least_recently_used_entries_are_evicted_first(self):
+        cache = starlink_utils.ClassificationCache(self.path, cap=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, False, None)
+        cache.get("a")
+        cache.save()
+        again = starlink_utils.ClassificationCache(self.path, cap=2)
+        self.assertIsNone(again.get("b"))
+        self.assertIsNotNone(again.get("a"))
+        self.assertIsNotNone(again.get("c"))
+
+    def test_entries_unused_past_the_age_limit_are_dropped(self):
+        cache = starlink_utils.ClassificationCache(self.path, max_age_days=1)
+        cache.put("old", True, {"Environmental": 1})
+        cache.put("new", False, None)
+        cache._entries["old"][2] -= 2 * 86400
+        cache.save()
+        self.assertEqual(list(starlink_utils.ClassificationCache(self.path)._load()), ["new"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,10 @@
-
+import json
+import os
 import sys
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest import mock
 
@@ -9,19 +13,29 @@ import requests
 # Add scripts directory to path to import starlink_utils
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
-from starlink_utils import FetchError, http_get
+import starlink_utils
+from starlink_utils import (CircuitBreaker, CircuitOpenError, FetchError, HttpCache,
+                            RECORD_ENV, REPLAY_ENV, connection_stats, get_session, http_get)
 
 
 class FakeResponse:
-    def __init__(self, status_code=200, text=""):
+    def __init__(self, status_code=200, text="", headers=None):
         self.status_code = status_code
         self.text = text
         self.content = text.encode("utf-8")
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
 
     def raise_for_status(self):
         if self.status_code >= 400:
             raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
 
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
 
 class FakeSession:
     """Replays a scripted sequence of responses/exceptions, recording each call."""
@@ -87,6 +101,222 @@ class TestHttpGet(unittest.TestCase):
         self.assertEqual(resp.text, "ok")
         self.assertEqual(len(session.calls), 2)
 
+    def test_honors_retry_after(self):
+        session = FakeSession([FakeResponse(429, headers={"Retry-After": "30"}),
+                               FakeResponse(200, "ok")])
+        with mock.patch("starlink_utils.time.sleep") as sleep:
+            http_get("https://example.com", session=session)
+        self.assertGreaterEqual(sleep.call_args[0][0], 30)
+
+    def test_backoff_is_shortened_to_fit_the_deadline(self):
+        session = FakeSession([FakeResponse(503), FakeResponse(200, "ok")])
+        deadline = starlink_utils.time.monotonic() + 5
+        with mock.patch("starlink_utils.time.sleep") as sleep:
+            http_get("https://example.com", session=session, deadline=deadline)
+        self.assertLessEqual(sleep.call_args[0][0], 2.5)
+        _url, kwargs = session.calls[0]
+        self.assertLessEqual(max(kwargs["timeout"]), 5)
+
+    def test_gives_up_when_no_time_is_left_to_retry(self):
+        session = FakeSession([FakeResponse(503)])
+        deadline = starlink_utils.time.monotonic() + 0.5
+        with mock.patch("starlink_utils.time.sleep") as sleep:
+            with self.assertRaises(FetchError):
+                http_get("https://example.com", session=session, deadline=deadline)
+        sleep.assert_not_called()
+        self.assertEqual(len(session.calls), 1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    url = "https://dead.example/feed"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "breaker.json"
+        self.breaker = self.new_run()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def new_run(self):
+        """A breaker as the next run (a new process) sees it."""
+        self.breaker = CircuitBreaker(self.path, threshold=2, cooldown=3600, max_cooldown=4 * 3600)
+        return self.breaker
+
+    def fail_once(self, url=None):
+        session = FakeSession([requests.exceptions.ConnectionError("refused")])
+        with self.assertRaises(FetchError):
+            http_get(url or self.url, session=session, attempts=1, breaker=self.breaker)
+
+    def fail_runs(self, n):
+        for _ in range(n):
+            self.new_run()
+            self.fail_once()
+
+    def test_opens_after_consecutive_failed_runs_and_skips_the_host(self):
+        self.fail_runs(2)
+        session = FakeSession([])
+        with self.assertRaises(CircuitOpenError):
+            http_get("https://dead.example/other", session=session, breaker=self.breaker)
+        self.assertEqual(session.calls, [])
+
+    def test_state_persists_across_runs(self):
+        self.fail_runs(2)
+        self.assertEqual(self.new_run().status(self.url), "open")
+
+    def test_one_bad_run_does_not_blank_the_next(self):
+        # Several endpoints on the host fail in the same run: one failed run.
+        for path in ("gp", "decayed", "satcat"):
+            self.fail_once(f"https://dead.example/{path}")
+        self.assertEqual(self.breaker.status(self.url), "closed")
+        session = FakeSession([FakeResponse(200, "back")])
+        http_get(self.url, session=session, breaker=self.new_run())
+        self.assertEqual(len(session.calls), 1)
+
+    def test_cooldown_doubles_with_each_failed_probe_up_to_the_cap(self):
+        self.fail_runs(2)
+        now = starlink_utils.time.time()
+        waits = []
+        for _ in range(4):
+            info = json.loads(self.path.read_text(encoding="utf-8"))["dead.example"]
+            waits.append(self.breaker._cooldown(info))
+            with mock.patch("starlink_utils.time.time", return_value=now + 10 * 3600):
+                self.new_run()
+                self.fail_once()
+            now += 10 * 3600
+        self.assertEqual(waits, [3600, 7200, 4 * 3600, 4 * 3600])
+
+    def test_half_open_probe_gets_one_attempt_and_closes_on_success(self):
+        self.fail_runs(2)
+        with mock.patch("starlink_utils.time.time",
+                        return_value=starlink_utils.time.time() + 7200):
+            self.assertEqual(self.breaker.status(self.url), "half-open")
+            session = FakeSession([FakeResponse(200, "back")])
+            http_get(self.url, session=session, breaker=self.breaker)
+        self.assertEqual(self.breaker.status(self.url), "closed")
+
+    def test_failed_probe_reopens_without_retrying(self):
+        self.fail_runs(2)
+        with mock.patch("starlink_utils.time.time",
+                        return_value=starlink_utils.time.time() + 7200):
+            session = FakeSession([requests.exceptions.ConnectTimeout("timed out")])
+            with mock.patch("starlink_utils.time.sleep") as sleep:
+                with self.assertRaises(FetchError):
+                    http_get(self.url, session=session, breaker=self.breaker)
+            sleep.assert_not_called()
+            self.assertEqual(self.breaker.status(self.url), "open")
+
+
+class TestHttpCache(unittest.TestCase):
+    url = "https://example.com/satcat.csv"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def prime(self):
+        session = FakeSession([FakeResponse(200, "a,b\n1,2\n", headers={
+            "ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "Content-Type": "text/csv; charset=utf-8"})])
+        return http_get(self.url, session=session, cache=self.cache), session
+
+    def test_download_is_stored_and_returned(self):
+        resp, session = self.prime()
+        self.assertEqual(resp.text, "a,b\n1,2\n")
+        self.assertTrue(session.calls[0][1]["stream"])
+        self.assertEqual(self.cache.stats[self.url]["misses"], 1)
+
+    def test_fresh_copy_skips_the_network(self):
+        self.prime()
+        session = FakeSession([])
+        resp = http_get(self.url, session=session, cache=self.cache, max_age=3600)
+        self.assertEqual(resp.content, b"a,b\n1,2\n")
+        self.assertEqual(session.calls, [])
+        self.assertEqual(self.cache.outcome(self.url), "hit")
+
+    def test_stale_copy_is_revalidated_and_served_on_304(self):
+        self.prime()
+        session = FakeSession([FakeResponse(304)])
+        resp = http_get(self.url, session=session, cache=self.cache, max_age=0)
+        headers = session.calls[0][1]["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.assertEqual(resp.text, "a,b\n1,2\n")
+        run = self.cache.stats[self.url]
+        self.assertEqual(run["revalidated"], 1)
+        self.assertEqual(run["bytes_saved"], len(b"a,b\n1,2\n"))
+
+    def test_counters_persist_across_instances(self):
+        self.prime()
+        again = HttpCache(Path(self.tmp.name))
+        entry = again.lookup(self.url)
+        self.assertEqual(entry["misses"], 1)
+        self.assertEqual(entry["etag"], '"v1"')
+
+
+class TestCassette(unittest.TestCase):
+    url = "https://example.com/feed.xml"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recorded_response_replays_without_the_network(self):
+        session = FakeSession([FakeResponse(200, "<rss/>", headers={"ETag": '"v1"'})])
+        with mock.patch.dict(os.environ, {RECORD_ENV: self.tmp.name}):
+            recorded = http_get(self.url, session=session)
+        self.assertEqual(recorded.text, "<rss/>")
+        with mock.patch.dict(os.environ, {REPLAY_ENV: self.tmp.name}):
+            replayed = http_get(self.url, session=FakeSession([]))
+        self.assertEqual(replayed.content, b"<rss/>")
+        self.assertEqual(replayed.headers["ETag"], '"v1"')
+
+    def test_replay_of_unrecorded_url_is_a_fetch_error(self):
+        with mock.patch.dict(os.environ, {REPLAY_ENV: self.tmp.name}):
+            with self.assertRaises(FetchError):
+                http_get(self.url, session=FakeSession([]))
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledSession(unittest.TestCase):
+    def test_session_is_shared(self):
+        self.assertIs(get_session(), get_session())
+        self.assertEqual(get_session().headers["User-Agent"], starlink_utils.USER_AGENT)
+
+    def test_repeat_requests_reuse_one_connection(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/feed"
+            for _ in range(3):
+                self.assertEqual(http_get(url).text, "ok")
+        finally:
+            server.shutdown()
+            server.server_close()
+        stats = connection_stats()["127.0.0.1"]
+        self.assertGreaterEqual(stats["requests"], 3)
+        self.assertEqual(stats["requests"] - stats["connections"], stats["reused"])
+        self.assertGreaterEqual(stats["reused"], 2)
+
 
 if __name__ == "__main__":
     unittest.main()
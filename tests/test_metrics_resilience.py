@@ -10,7 +10,7 @@ from unittest import mock
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
 import compute_starlink_metrics as metrics
-from starlink_utils import FetchError
+from starlink_utils import FetchError, InputManifest
 
 
 class TestMetricsResilience(unittest.TestCase):
@@ -62,5 +62,28 @@ class TestMetricsResilience(unittest.TestCase):
                 self.assertEqual(metrics.fetch_recent_decayed_starlink(), 0)
 
 
+class TestUnchangedInputs(unittest.TestCase):
+    def run_main(self, tmp, stamp, *argv):
+        with mock.patch.object(metrics, "DATA", tmp), \
+             mock.patch.object(metrics, "INPUTS", InputManifest(tmp / "inputs.json")), \
+             mock.patch.object(metrics, "fetch_starlink_active_count", return_value=8000), \
+             mock.patch.object(metrics, "fetch_recent_decayed_starlink", return_value=1200), \
+             mock.patch.object(metrics, "ts", return_value=stamp):
+            self.assertEqual(metrics.main(list(argv)), 0)
+        return json.loads((tmp / "metrics.json").read_text())["generated_at"]
+
+    def test_same_inputs_on_the_same_day_leave_metrics_untouched(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            self.assertEqual(self.run_main(tmp, "first"), "first")
+            self.assertEqual(self.run_main(tmp, "second"), "first")
+
+    def test_force_recompute_rewrites(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            self.run_main(tmp, "first")
+            self.assertEqual(self.run_main(tmp, "second", "--force-recompute"), "second")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@ import io
 import json
 import sys
 import tempfile
+import tracemalloc
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -12,7 +13,7 @@ from unittest import mock
 sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
 import compute_space_totals as totals
-from starlink_utils import FetchError
+from starlink_utils import FetchError, InputManifest
 
 HEADER = ["OBJECT_NAME", "OBJECT_ID", "NORAD_CAT_ID", "OBJECT_TYPE", "OPS_STATUS_CODE",
           "OWNER", "LAUNCH_DATE", "LAUNCH_SITE", "DECAY_DATE", "PERIOD", "INCLINATION",
@@ -38,6 +39,37 @@ def parsed(rows):
     return list(csv.DictReader(io.StringIO(as_csv(rows))))
 
 
+class StreamedResponse:
+    """Serves a CSV body in chunks, the way a streamed download arrives."""
+
+    encoding = "utf-8"
+    sha256 = None
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    @property
+    def content(self):
+        return b"".join(self.chunks)
+
+    def iter_content(self, chunk_size=1):
+        return iter(self.chunks)
+
+
+def synthetic_catalog(n):
+    """Chunks of an n-row catalogue, generated lazily so the body never exists whole."""
+    yield as_csv([]).encode("utf-8")
+    for start in range(0, n, 500):
+        batch = []
+        for i in range(start, min(n, start + 500)):
+            if i % 3 == 0:
+                batch.append(row(f"STARLINK-{i}", "PAY", decay="" if i % 2 else "2024-05-02"))
+            else:
+                batch.append(row(f"OBJECT {i} DEB", "DEB", rcs=str(0.01 * (i % 50)),
+                                 decay="" if i % 4 else f"{2000 + i % 25}-01-01"))
+        yield as_csv(batch).split("\r\n", 1)[1].encode("utf-8")
+
+
 class TestMassModel(unittest.TestCase):
     def test_rcs_drives_the_estimate(self):
         small = totals.estimate_mass_kg("DEB", 0.01)
@@ -130,9 +162,8 @@ class TestSummaries(unittest.TestCase):
 
 class TestCatalogFetch(unittest.TestCase):
     def test_rejects_a_catalogue_missing_expected_columns(self):
-        class Resp:
-            text = "FOO,BAR\n1,2\n"
-        with mock.patch.object(totals, "http_get", return_value=Resp()):
+        resp = StreamedResponse([b"FOO,BAR\n1,2\n"])
+        with mock.patch.object(totals, "http_get", return_value=resp):
             with self.assertRaises(totals.CatalogError):
                 totals.fetch_catalog()
 
@@ -153,5 +184,70 @@ class TestCatalogFetch(unittest.TestCase):
                 self.assertEqual(totals.main(), 1)
 
 
+class TestUnchangedInputs(unittest.TestCase):
+    body = as_csv([row("STARLINK-1", "PAY"), row("SL-8 R/B", "R/B", decay="2024-01-01")])
+
+    def run_main(self, tmp, *argv, body=None):
+        resp = StreamedResponse([(body or self.body).encode("utf-8")])
+        with mock.patch.object(totals, "DATA", tmp), \
+             mock.patch.object(totals, "INPUTS", InputManifest(tmp / "inputs.json")), \
+             mock.patch.object(totals, "http_get", return_value=resp), \
+             mock.patch.object(totals, "build_totals", wraps=totals.build_totals) as build:
+            self.assertEqual(totals.main(list(argv)), 0)
+        return build.call_count
+
+    def test_identical_payload_skips_the_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            self.assertEqual(self.run_main(tmp), 1)
+            before = (tmp / "space_totals.json").read_text()
+            self.assertEqual(self.run_main(tmp), 0)
+            self.assertEqual((tmp / "space_totals.json").read_text(), before)
+
+    def test_changed_payload_or_force_rebuilds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            self.run_main(tmp)
+            self.assertEqual(self.run_main(tmp, "--force-recompute"), 1)
+            changed = self.body + as_csv([row("STARLINK-2", "PAY")]).split("\r\n", 1)[1]
+            self.assertEqual(self.run_main(tmp, body=changed), 1)
+
+
+class TestStreamingIngestion(unittest.TestCase):
+    def test_streamed_totals_match_the_materialized_ones_byte_for_byte(self):
+        chunks = list(synthetic_catalog(3000))
+        body = b"".join(chunks)
+        # Split mid-line and mid-CRLF to exercise the line reassembly.
+        odd_chunks = [body[i:i + 977] for i in range(0, len(body), 977)]
+        with mock.patch.object(totals, "ts", return_value="2026-01-01T00:00:00Z"):
+            expected = json.dumps(totals.build_totals(
+                list(csv.DictReader(io.StringIO(body.decode("utf-8"))))), indent=2)
+            with mock.patch.object(totals, "http_get",
+                                   return_value=StreamedResponse(odd_chunks)):
+                streamed = json.dumps(totals.build_totals(totals.fetch_catalog()), indent=2)
+        self.assertEqual(streamed, expected)
+
+    def test_peak_memory_stays_flat_as_the_catalogue_grows(self):
+        def peak(n):
+            resp = StreamedResponse(synthetic_catalog(n))
+            resp.sha256 = "synthetic"   # as a cached response carries; nothing to re-read
+            with mock.patch.object(totals, "http_get", return_value=resp):
+                tracemalloc.start()
+                try:
+                    result = totals.build_totals(totals.fetch_catalog())
+                    return result, tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+        peak(100)   # first-use allocations (codec, csv and regex caches)
+        _, small_peak = peak(5_000)
+        large_result, large_peak = peak(40_000)
+        self.assertEqual(large_result["catalog_objects"], 40_000)
+        # 40k rows as dicts would be tens of MB; streaming stays well under 2 MB
+        # and doesn't grow with the row count.
+        self.assertLess(large_peak, 2 * 1024 * 1024)
+        self.assertLess(large_peak, small_peak + 256 * 1024)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import threading
+import unittest
+from unittest import mock
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add scripts directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import starlink_watch
+
+
+def stage(log, code=0, barrier=None):
+    def run(args):
+        if barrier:
+            barrier.wait(timeout=5)
+        log.append(run.name)
+        return code
+    return run
+
+
+def dag(log, codes=None, barrier=None):
+    codes = codes or {}
+    stages = {}
+    for name, deps in (("metrics", ()), ("totals", ()), ("digest", ()),
+                       ("site", ("metrics", "totals", "digest"))):
+        body = stage(log, codes.get(name, 0), barrier if not deps else None)
+        body.name = name
+        stages[name] = (deps, body)
+    return stages
+
+
+class TestRunDag(unittest.TestCase):
+    args = SimpleNamespace(force=False, force_recompute=False)
+
+    def test_independent_stages_overlap_and_site_runs_last(self):
+        log = []
+        # Only passes if all three fetch stages are in flight at once.
+        barrier = threading.Barrier(3)
+        results = starlink_watch.run_dag(dag(log, barrier=barrier), list(starlink_watch.STAGES),
+                                         self.args)
+        self.assertEqual(log[-1], "site")
+        self.assertEqual(sorted(log[:3]), ["digest", "metrics", "totals"])
+        self.assertTrue(all(r["status"] == "ok" for r in results.values()))
+
+    def test_failed_dependency_skips_the_site(self):
+        log = []
+        results = starlink_watch.run_dag(dag(log, codes={"totals": 1}),
+                                         list(starlink_watch.STAGES), self.args)
+        self.assertEqual(results["totals"]["status"], "failed")
+        self.assertEqual(results["site"]["status"], "skipped")
+        self.assertNotIn("site", log)
+
+    def test_unselected_dependencies_count_as_done(self):
+        log = []
+        results = starlink_watch.run_dag(dag(log), ["site"], self.args)
+        self.assertEqual(log, ["site"])
+        self.assertEqual(list(results), ["site"])
+
+    def test_crashing_stage_is_reported_as_failed(self):
+        def boom(args):
+            raise RuntimeError("boom")
+        with mock.patch("sys.stderr"):
+            results = starlink_watch.run_dag({"metrics": ((), boom)}, ["metrics"], self.args)
+        self.assertEqual(results["metrics"]["status"], "failed")
+
+    def test_a_stage_calling_sys_exit_fails_without_escaping(self):
+        log = []
+        stages = dag(log)
+        stages["totals"] = ((), lambda args: sys.exit(2))
+        stages["digest"] = ((), lambda args: sys.exit("no feeds configured"))
+        stages["metrics"] = ((), lambda args: sys.exit(0))
+        with mock.patch("sys.stderr"):
+            results = starlink_watch.run_dag(stages, list(starlink_watch.STAGES), self.args)
+        self.assertEqual(results["totals"], {"status": "failed", "seconds": mock.ANY,
+                                             "exit_code": 2})
+        self.assertEqual(results["digest"]["exit_code"], 1)
+        self.assertEqual(results["metrics"]["status"], "ok")
+        self.assertEqual(results["site"]["status"], "skipped")
+        self.assertNotIn("site", log)
+
+
+if __name__ == "__main__":
+    unittest.main()